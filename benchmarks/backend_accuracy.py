@@ -0,0 +1,114 @@
+import argparse
+import json
+import time
+import numpy as np
+import cycle_model
+
+# Accuracy-vs-speed comparison of the tabular property backends against HEOS
+# over the full slider ranges, for every refrigerant. Pairs that
+# cycle_model.VALIDATED_BACKENDS does not allow are measured as well, so the
+# report shows why they are refused.
+#
+#   python -m benchmarks.backend_accuracy [--points 20] [--json out.json]
+#   python -m benchmarks.backend_accuracy --refrigerant R32 R410A
+
+STATE_KEYS = ('P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4')
+
+
+def slider_grid(n):
+    freq, eev, fan = np.meshgrid(np.linspace(*cycle_model.FREQ_RANGE, n),
+                                 np.linspace(*cycle_model.EEV_RANGE, n),
+                                 np.linspace(*cycle_model.FAN_RANGE, n), indexing='ij')
+    return freq.ravel(), eev.ravel(), fan.ravel()
+
+
+def time_backend(freq, eev, fan, refrigerant, backend, repeat):
+    # Best of repeat; the first run also pays for building (or loading) the tables
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = cycle_model.solve_batch(freq, eev, fan, refrigerant, backend)
+        best = min(best, time.perf_counter() - start)
+    return results, best
+
+
+def _max_dev(values):
+    # Points both backends fail on (inf - inf) do not count; one-sided failures show as inf
+    values = np.abs(values)
+    return float(np.nanmax(values)) if not np.all(np.isnan(values)) else 0.0
+
+
+def run_refrigerant(freq, eev, fan, refrigerant, repeat):
+    backends, reference, reference_time = {}, None, None
+    for backend in cycle_model.BACKENDS:
+        with cycle_model.unvalidated_backends():
+            # Table build (or load from CACHE_DIR), timed on its own; BICUBIC and TTSE
+            # share one set of tables per fluid, so the second one finds it in memory
+            start = time.perf_counter()
+            cycle_model.fluid_state(refrigerant, backend)
+            setup_time = time.perf_counter() - start
+            results, elapsed = time_backend(freq, eev, fan, refrigerant, backend, repeat)
+        if reference is None:
+            reference, reference_time = results, elapsed
+
+        entry = {
+            'validated': backend in cycle_model.backends_for(refrigerant),
+            'setup_s': setup_time,
+            'batch_s': elapsed,
+            'us_per_point': elapsed / freq.size * 1e6,
+            'speedup': reference_time / elapsed,
+            'max_abs_dev': {},
+        }
+        for key in STATE_KEYS + ('eer',):
+            entry['max_abs_dev'][key] = _max_dev(results[key] - reference[key])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            entry['max_rel_dev_eer'] = _max_dev(results['eer'] / reference['eer'] - 1)
+        backends[backend] = entry
+    return {'backends': backends}
+
+
+def run(n, repeat, refrigerants=cycle_model.REFRIGERANTS):
+    freq, eev, fan = slider_grid(n)
+    report = {'points': int(freq.size), 'refrigerants': {}}
+    for refrigerant in refrigerants:
+        report['refrigerants'][refrigerant] = run_refrigerant(freq, eev, fan, refrigerant, repeat)
+    return report
+
+
+def print_report(report):
+    print(f"{report['points']} operating points over the full slider ranges")
+    for refrigerant, fluid in report['refrigerants'].items():
+        print()
+        print(f"{refrigerant}")
+        print(f"{'backend':<14}{'validated':>10}{'setup (s)':>10}{'µs/point':>10}{'speedup':>9}"
+              f"{'max ΔP (kPa)':>14}{'max Δh (kJ/kg)':>16}{'max ΔEER':>12}")
+        for backend, entry in fluid['backends'].items():
+            dev = entry['max_abs_dev']
+            dP = max(dev[f'P{i}'] for i in range(1, 5))
+            dh = max(dev[f'h{i}'] for i in range(1, 5))
+            print(f"{backend:<14}{'yes' if entry['validated'] else 'no':>10}{entry['setup_s']:>10.3f}"
+                  f"{entry['us_per_point']:>10.1f}{entry['speedup']:>9.1f}{dP:>14.4f}{dh:>16.4f}{dev['eer']:>12.5f}")
+        print("per state point max |Δ| vs HEOS")
+        print(f"{'backend':<14}" + ''.join(f"{key:>10}" for key in STATE_KEYS))
+        for backend, entry in fluid['backends'].items():
+            print(f"{backend:<14}" + ''.join(f"{entry['max_abs_dev'][key]:>10.4f}" for key in STATE_KEYS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabular backend accuracy/speed benchmark")
+    parser.add_argument('--points', type=int, default=20, help="grid points per control axis")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--refrigerant', nargs='+', default=list(cycle_model.REFRIGERANTS),
+                        choices=cycle_model.REFRIGERANTS, help="fluids to compare (default: all)")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.points, args.repeat, args.refrigerant)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
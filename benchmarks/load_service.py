@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import signal
+import subprocess
+import sys
+import time
+import numpy as np
+import cycle_model
+from benchmarks.suite import REPO_DIR
+
+# Load generator for the JSON-lines evaluation service. Starts service.py on
+# a free port (or targets a running one with --port), then runs closed-loop
+# clients that each keep one request outstanding for --duration seconds and
+# reports throughput and latency percentiles.
+#
+#   python -m benchmarks.load_service --clients 64 --duration 10
+#   python -m benchmarks.load_service --window-ms 0     # coalescing off
+#   python -m benchmarks.load_service --port 8765       # existing service
+
+
+def request_points(n_distinct, seed=0):
+    # n_distinct random slider positions; clients draw from them, so a small
+    # pool exercises in-flight deduplication and a large one batching
+    rng = np.random.default_rng(seed)
+    return [{'freq': round(rng.uniform(*cycle_model.FREQ_RANGE)),
+             'eev': round(rng.uniform(*cycle_model.EEV_RANGE)),
+             'fan': round(rng.uniform(*cycle_model.FAN_RANGE), -1)} for _ in range(n_distinct)]
+
+
+async def client(host, port, points, deadline, seed, latencies, errors):
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+    request_id = 0
+    try:
+        while time.perf_counter() < deadline:
+            request_id += 1
+            request = dict(points[rng.integers(len(points))], id=request_id)
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b"\n")
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if 'error' in response or response.get('id') != request_id:
+                errors.append(response)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, clients, duration, points):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, points, start + duration, seed, latencies, errors)
+                           for seed in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def start_service(workers, window_ms):
+    args = [sys.executable, 'service.py', '--port', '0', '--window-ms', str(window_ms)]
+    if workers:
+        args += ['--workers', str(workers)]
+    process = subprocess.Popen(args, cwd=REPO_DIR, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise SystemExit(f"service did not start: {line.strip()}")
+    print(line.strip())
+    host, port = line.split()[2].rsplit(':', 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the evaluation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None, help="use a running service instead of starting one")
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--distinct', type=int, default=10000, help="distinct operating points requested")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes of the started service")
+    parser.add_argument('--window-ms', type=float, default=2.0, help="coalescing window of the started service")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    process = None
+    host, port = args.host, args.port
+    if port is None:
+        process, host, port = start_service(args.workers, args.window_ms)
+    try:
+        # Short warm-up so pool start-up is not counted
+        asyncio.run(run_load(host, port, args.clients, 1.0, request_points(args.distinct, seed=1)))
+        latencies, errors, elapsed = asyncio.run(
+            run_load(host, port, args.clients, args.duration, request_points(args.distinct)))
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGINT)  # lets the service shut its pool down and print its stats
+            served = process.communicate(timeout=30)[0].strip()
+            if served:
+                print(served)
+
+    latencies = np.array(latencies) * 1000
+    report = {
+        'clients': args.clients,
+        'distinct_points': args.distinct,
+        'requests': int(latencies.size),
+        'errors': len(errors),
+        'throughput_per_s': latencies.size / elapsed,
+        'latency_ms': {name: float(np.percentile(latencies, q)) for name, q in
+                       (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests from {args.clients} clients in {elapsed:.1f} s, "
+              f"{report['errors']} errors")
+        print(f"throughput {report['throughput_per_s']:.0f} req/s")
+        print("latency " + "  ".join(f"{name} {value:.1f} ms" for name, value in report['latency_ms'].items()))
+    if errors:
+        raise SystemExit(f"first error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+import numpy as np
+import cycle_model
+import rendering
+
+# Memory soak test for the Streamlit rendering path: renders thousands of
+# cycles and samples the resident set size. After warm-up RSS should stay
+# flat; --legacy runs the old pyplot path (new figure per rerun, never
+# closed) for comparison.
+#
+#   python -m benchmarks.soak_render --renders 5000 [--max-growth-mb 10]
+
+
+def rss_mb():
+    # Current RSS where /proc is available, peak RSS otherwise
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def legacy_render(points):
+    import io
+    import matplotlib.pyplot as plt
+    import dome_cache
+    import ph_diagram
+    fig, ax = plt.subplots(figsize=rendering.FIGSIZE)
+    P_range, h_sat_liq, h_sat_vap = dome_cache.get_dome()
+    ax.plot(h_sat_vap, P_range, 'b-', alpha=0.7)
+    ax.plot(h_sat_liq, P_range, 'b-', alpha=0.7)
+    ax.plot(*ph_diagram.cycle_xy(points), 'r-o', linewidth=2)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS soak test of the P-h renderer")
+    parser.add_argument('--renders', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--legacy', action='store_true', help="use the old pyplot path instead")
+    parser.add_argument('--max-growth-mb', type=float, default=None,
+                        help="exit non-zero if RSS grows more than this after warm-up")
+    args = parser.parse_args()
+
+    if args.legacy:
+        import matplotlib
+        matplotlib.use('Agg')
+        render = legacy_render
+    else:
+        render = rendering.get_renderer().render_png
+
+    rng = np.random.default_rng(0)
+    n_points = 256
+    results = cycle_model.solve_batch(rng.uniform(*cycle_model.FREQ_RANGE, n_points),
+                                      rng.uniform(*cycle_model.EEV_RANGE, n_points),
+                                      rng.uniform(*cycle_model.FAN_RANGE, n_points))
+    cycles = [cycle_model.points_from_results(results, i) for i in range(n_points)]
+
+    for i in range(args.warmup):
+        render(cycles[i % n_points])
+    gc.collect()
+    start_rss = rss_mb()
+    print(f"after {args.warmup} warm-up renders: {start_rss:.1f} MB")
+
+    every = max(1, args.renders // args.samples)
+    start = time.perf_counter()
+    for i in range(1, args.renders + 1):
+        render(cycles[i % n_points])
+        if i % every == 0:
+            print(f"{i:>8} renders  {rss_mb():8.1f} MB  {(time.perf_counter() - start) / i * 1000:6.2f} ms/render")
+    gc.collect()
+    growth = rss_mb() - start_rss
+    print(f"RSS growth after warm-up: {growth:+.1f} MB")
+
+    if args.max_growth_mb is not None and growth > args.max_growth_mb:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
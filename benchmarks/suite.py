@@ -0,0 +1,393 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+import cycle_model
+import dome_cache
+import export
+import optimizer
+import rendering
+import replay
+import sensitivity
+import snapshot_store
+import surrogate
+import uncertainty
+
+# Headless benchmark suite for the hot paths of both apps.
+#
+#   python -m benchmarks.suite                          # run and print
+#   python -m benchmarks.suite --save-baseline          # store as baseline
+#   python -m benchmarks.suite --compare --threshold 0.2
+#
+# Every metric is a duration in seconds (lower is better) except the ones
+# listed in HIGHER_IS_BETTER. A metric regresses when it is worse than the
+# baseline by more than the threshold (relative).
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results.json')
+
+HIGHER_IS_BETTER = {'batch_points_per_s', 'export_charts_per_min'}
+SNAPSHOT_COUNTS = (10, 1000, 100000)
+# Headless modules must not drag these in at import time
+HEADLESS_MODULES = ('cycle_model', 'dome_cache', 'result_cache', 'sweep', 'optimizer', 'surrogate', 'evaluate',
+                    'sensitivity', 'uncertainty', 'replay', 'service', 'snapshot_store', 'profiling')
+UI_MODULES = ('matplotlib', 'pandas', 'streamlit', 'tkinter', 'PIL')
+
+
+def measure(fn, repeat, number=1):
+    # Median wall time of one call over `repeat` rounds of `number` calls
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+def bench_single_point(repeat):
+    return {'single_point_s': measure(lambda: cycle_model.solve_point(60, 50, 750), repeat, number=50)}
+
+
+def bench_batch(repeat, n=10000):
+    rng = np.random.default_rng(0)
+    freq = rng.uniform(*cycle_model.FREQ_RANGE, n)
+    eev = rng.uniform(*cycle_model.EEV_RANGE, n)
+    fan = rng.uniform(*cycle_model.FAN_RANGE, n)
+    elapsed = measure(lambda: cycle_model.solve_batch(freq, eev, fan), repeat)
+    evaluations = float(cycle_model.solve_batch(freq[:1], eev[:1], fan[:1])['property_evaluations'][0])
+    return {'batch_10k_s': elapsed, 'batch_points_per_s': n / elapsed, 'property_evaluations_per_cycle': evaluations}
+
+
+def bench_dome(repeat):
+    P_min, P_max = dome_cache.DOME_P_RANGE
+    build = measure(lambda: dome_cache.build_dome(cycle_model.REFRIGERANT, P_min, P_max, dome_cache.DOME_POINTS), repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved_dir = cycle_model.CACHE_DIR
+        cycle_model.CACHE_DIR = tmp
+        try:
+            dome_cache.clear_memory_cache()
+            dome_cache.get_dome()  # writes the .npy file
+
+            def cold_load():
+                dome_cache.clear_memory_cache()
+                dome_cache.get_dome()
+            disk = measure(cold_load, repeat, number=10)
+            warm = measure(dome_cache.get_dome, repeat, number=1000)
+        finally:
+            cycle_model.CACHE_DIR = saved_dir
+            dome_cache.clear_memory_cache()
+    return {'dome_build_s': build, 'dome_disk_load_s': disk, 'dome_memory_hit_s': warm}
+
+
+def render_figure(points):
+    # Full figure build per call, as plot_cycle() used to do
+    P_min, P_max = dome_cache.DOME_P_RANGE
+    P_range, h_sat_liq, h_sat_vap = dome_cache.get_dome()
+    fig = Figure(figsize=(6, 5))
+    ax = fig.add_subplot(111)
+    ax.plot(h_sat_vap, P_range, 'b-', label='Saturated Vapor', alpha=0.7)
+    ax.plot(h_sat_liq, P_range, 'b-', label='Saturated Liquid', alpha=0.7)
+    cycle_h = [points[i]['h'] for i in (1, 2, 3, 4, 1)]
+    cycle_p = [points[i]['P'] for i in (1, 2, 3, 4, 1)]
+    ax.plot(cycle_h, cycle_p, 'r-o', label='Refrigeration Cycle', linewidth=2)
+    for i in range(1, 5):
+        ax.annotate(f'{i}', (points[i]['h'], points[i]['P']), xytext=(5, 5), textcoords='offset points',
+                    fontsize=10, fontweight='bold')
+    ax.set_xlabel('Enthalpy (kJ/kg)')
+    ax.set_ylabel('Pressure (kPa)')
+    ax.set_title('R32 Refrigeration Cycle P-H Diagram')
+    ax.legend()
+    ax.grid(True)
+    ax.set_xlim(min(h_sat_liq) - 50, 800)
+    ax.set_ylim(P_min, P_max)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def compare_snapshots(count):
+    rng = np.random.default_rng(2)
+    results = cycle_model.solve_batch(rng.uniform(*cycle_model.FREQ_RANGE, count),
+                                      rng.uniform(*cycle_model.EEV_RANGE, count),
+                                      rng.uniform(*cycle_model.FAN_RANGE, count))
+    return [{"cycle": cycle_model.points_from_results(results, i), "metrics": {"eer": results['eer'][i]}}
+            for i in range(count)]
+
+
+def bench_render(repeat):
+    points = cycle_model.solve_point(60, 50, 750)
+    dome_cache.get_dome()
+    renderer = rendering.get_renderer()
+    svg_renderer = rendering.CycleVectorRenderer()
+    compare_1, compare_500 = compare_snapshots(1), compare_snapshots(500)
+    return {
+        'render_full_figure_s': measure(lambda: render_figure(points), repeat),
+        'render_png_s': measure(lambda: renderer.render_png(points), repeat, number=10),
+        'render_svg_s': measure(lambda: svg_renderer.render_svg(points), repeat, number=10),
+        'render_compare_1_s': measure(lambda: rendering.render_comparison_png(compare_1), repeat),
+        'render_compare_500_s': measure(lambda: rendering.render_comparison_png(compare_500), repeat),
+    }
+
+
+def make_snapshots(count):
+    # Distinct slider positions on the Streamlit grid, as saved from the sidebar
+    rng = np.random.default_rng(1)
+    points = cycle_model.solve_point(60, 50, 750)
+    settings = set()
+    while len(settings) < count:
+        settings.add((int(rng.integers(300, 1201)) / 10, int(rng.integers(0, 1001)) / 10, int(rng.integers(0, 151)) * 10))
+    return [(freq, eev, fan, points) for freq, eev, fan in settings]
+
+
+def bench_snapshots(repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SNAPSHOT_COUNTS:
+            rows = make_snapshots(count)
+            rounds = max(1, min(repeat, 3)) if count >= 100000 else repeat
+            paths = iter(os.path.join(tmp, f'{count}_{i}.db') for i in range(rounds + 1))
+
+            def save():
+                store = snapshot_store.SnapshotStore(next(paths))
+                store.add_many(rows)
+                store.close()
+
+            save()
+            store = snapshot_store.SnapshotStore(os.path.join(tmp, f'{count}_0.db'))
+            first_id = store.page(0, 1)[0][0]
+            results[f'snapshot_save_{count}_s'] = measure(save, rounds)
+            results[f'snapshot_load_{count}_s'] = measure(lambda: store.get(first_id), repeat, number=100)
+            results[f'snapshot_page_{count}_s'] = measure(lambda: store.page(count // 2, 50), repeat, number=10)
+            results[f'snapshot_query_{count}_s'] = measure(
+                lambda: store.query({"freq": (50, 70), "eer": (5, None)}), rounds)
+            store.close()
+    return results
+
+
+def bench_export(repeat, count=200):
+    # Bulk export of a stored snapshot set: PNG + SVG charts and both tables, in-process
+    with tempfile.TemporaryDirectory() as tmp:
+        store = snapshot_store.SnapshotStore(os.path.join(tmp, 'export.db'))
+        store.add_many(make_snapshots(count))
+        store.close()
+        stats = {}
+
+        def run():
+            stats.update(export.export(os.path.join(tmp, 'out'), ('png', 'svg'), ('csv', 'json'),
+                                       store_path=os.path.join(tmp, 'export.db'), workers=1))
+        elapsed = measure(run, max(1, repeat // 3))
+    return {'export_charts_per_min': stats['charts'] / elapsed * 60}
+
+
+def bench_optimizer(repeat):
+    optimizer.optimize('eer')  # loads the search tables
+    results = {}
+    for name, kwargs in (('eer', {'objective': 'eer'}),
+                         ('target', {'objective': 'cooling_effect', 'target': 230, 'start': (60, 50, 750)})):
+        results[f'optimize_{name}_s'] = measure(lambda: optimizer.optimize(**kwargs), repeat)
+        results[f'optimize_{name}_evaluations'] = optimizer.optimize(**kwargs)['evaluations']
+    return results
+
+
+def bench_surrogate(repeat, n=1000000):
+    start = time.perf_counter()
+    model = surrogate.build()
+    build = time.perf_counter() - start
+    rng = np.random.default_rng(3)
+    samples = [rng.uniform(low, high, n) for low, high in surrogate.RANGES]
+    return {
+        'surrogate_build_s': build,
+        'surrogate_1m_s': measure(lambda: model.evaluate(*samples), repeat),
+        'surrogate_eer_max_abs_error': surrogate.validate(model, 5000)['errors']['eer']['max_abs'],
+    }
+
+
+def bench_sensitivity(repeat):
+    # One Jacobian at a point, and a freq x EEV map on the grid vs. a Jacobian per grid point
+    axes = (np.linspace(30, 120, 46), np.linspace(0, 100, 51), 750)
+    return {
+        'sensitivity_point_s': measure(lambda: sensitivity.analyze(60, 50, 750), repeat),
+        'sensitivity_point_evaluations': sensitivity.analyze(60, 50, 750)['evaluations'],
+        'sensitivity_map_s': measure(lambda: sensitivity.sensitivity_map(*axes), repeat),
+        'sensitivity_map_pointwise_s': measure(
+            lambda: sensitivity.jacobian(*np.meshgrid(*axes, indexing='ij')), max(1, repeat // 3)),
+    }
+
+
+def bench_uncertainty(repeat, n=1000000):
+    # Monte Carlo run at the UI's default size, and the streaming aggregation alone over 1M samples
+    values = np.random.default_rng(4).normal(size=(n, len(uncertainty.OUTPUTS)))
+
+    def aggregate():
+        stats = uncertainty.StreamingStats(uncertainty.OUTPUTS, np.full(len(uncertainty.OUTPUTS), -5),
+                                           np.full(len(uncertainty.OUTPUTS), 5))
+        for start in range(0, n, uncertainty.CHUNK_SIZE):
+            stats.add(values[start:start + uncertainty.CHUNK_SIZE])
+        return stats.summary()
+    return {
+        'uncertainty_20k_s': measure(lambda: uncertainty.propagate(60, 50, 750, samples=20000), max(1, repeat // 3)),
+        'uncertainty_stats_1m_s': measure(aggregate, repeat),
+    }
+
+
+def write_log(path, seconds, seed=0):
+    # Synthetic 1 Hz control log: slow drifts recorded at sensor resolution
+    t = np.arange(seconds)
+    rng = np.random.default_rng(seed)
+    freq = np.round(np.clip(60 + 20 * np.sin(t / 5400) + rng.normal(0, 0.3, seconds), 30, 120), 1)
+    eev = np.round(np.clip(50 + 15 * np.sin(t / 2700 + 1), 0, 100))
+    fan = np.round(np.clip(750 + 300 * np.sin(t / 3600 + 2), 0, 1500), -1)
+    np.savetxt(path, np.column_stack([t, freq, eev, fan]), delimiter=',', fmt=['%d', '%.1f', '%.0f', '%.0f'],
+               header='time,freq,eev,fan', comments='')
+
+
+def bench_replay(repeat):
+    # A week of 1 Hz data streamed from CSV to CSV
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'week.csv')
+        write_log(log, 7 * 86400)
+
+        def run():
+            replay._memo.clear()  # time the cold replay, not memo hits from the previous round
+            with open(os.path.join(tmp, 'out.csv'), 'w', encoding='utf-8', newline='') as out:
+                return replay.replay(log, out)
+        return {'replay_week_s': measure(run, max(1, repeat // 3)), 'replay_week_solved': run()['solved']}
+
+
+def run_python(*args):
+    subprocess.run([sys.executable, *args], cwd=REPO_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def bench_cold_start(repeat):
+    check = (f"import sys, {', '.join(HEADLESS_MODULES)}; "
+             f"print(','.join(m for m in {UI_MODULES!r} if m in sys.modules))")
+    leaked = subprocess.run([sys.executable, '-c', check], cwd=REPO_DIR, check=True, capture_output=True,
+                            text=True).stdout.strip()
+    if leaked:
+        print(f"  headless imports pull in: {leaked}", file=sys.stderr)
+
+    # Parent plus one spawned pool worker (what platforms without fork pay per
+    # worker); run from -c so the worker does not re-import this suite
+    spawn_worker = ("import multiprocessing, cycle_model; from concurrent.futures import ProcessPoolExecutor\n"
+                    "if __name__ == '__main__':\n"
+                    "    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:\n"
+                    "        pool.submit(cycle_model.solve_point, 60, 50, 750).result()")
+
+    return {
+        'cold_start_interpreter_s': measure(lambda: run_python('-c', 'pass'), repeat),
+        'cold_start_core_import_s': measure(lambda: run_python('-c', 'import cycle_model'), repeat),
+        'cold_start_cli_point_s': measure(lambda: run_python('evaluate.py', '60', '50', '750'), repeat),
+        'cold_start_spawn_pool_s': measure(lambda: run_python('-c', spawn_worker), repeat),
+        'cold_start_ui_modules': len(leaked.split(',')) if leaked else 0,
+    }
+
+
+BENCHMARKS = {
+    'single_point': bench_single_point,
+    'batch': bench_batch,
+    'dome': bench_dome,
+    'render': bench_render,
+    'snapshots': bench_snapshots,
+    'optimizer': bench_optimizer,
+    'surrogate': bench_surrogate,
+    'sensitivity': bench_sensitivity,
+    'replay': bench_replay,
+    'export': bench_export,
+    'uncertainty': bench_uncertainty,
+    'cold_start': bench_cold_start,
+}
+
+
+def run(names, repeat):
+    metrics = {}
+    for name in names:
+        start = time.perf_counter()
+        metrics.update(BENCHMARKS[name](repeat))
+        print(f"  {name:<14} done in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return {
+        'metrics': metrics,
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+        },
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    rows = []
+    for key, value in results['metrics'].items():
+        base = baseline['metrics'].get(key)
+        if base is None:
+            rows.append((key, value, None, None, ''))
+            continue
+        better, worse = (value, base) if key in HIGHER_IS_BETTER else (base, value)
+        if better == 0:
+            # Zero baselines are guards (e.g. cold_start_ui_modules): any increase regresses
+            change = float('inf') if worse > 0 else 0.0
+        else:
+            change = worse / better - 1
+        flag = 'REGRESSION' if change > threshold else ''
+        if flag:
+            regressions.append(key)
+        rows.append((key, value, base, change, flag))
+    return rows, regressions
+
+
+def print_rows(rows):
+    print(f"{'metric':<28}{'current':>14}{'baseline':>14}{'change':>9}")
+    for key, value, base, change, flag in rows:
+        base_text = f"{base:>14.6g}" if base is not None else f"{'-':>14}"
+        change_text = f"{change:>+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{key:<28}{value:>14.6g}{base_text} {change_text} {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless performance benchmark suite")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--compare', action='store_true', help="fail if any metric regressed past the threshold")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run(args.only, args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {'metrics': {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    rows, regressions = compare(results, baseline, args.threshold)
+    print_rows(rows)
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.compare:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
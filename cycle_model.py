@@ -0,0 +1,381 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import CoolProp.CoolProp as CP
+import profiling
+
+# Headless cycle model shared by the tkinter and Streamlit front ends.
+# Every function accepts scalars or NumPy arrays. Arrays are flashed point by
+# point in a Python loop over one reused CoolProp AbstractState per thread,
+# with no fluid lookup or string parsing per point. The flashes themselves
+# dominate: HEOS runs at about 6k cycles/s (a 10k-point batch takes ~1.6 s)
+# and the validated tables at about 90k cycles/s. CoolProp's vectorised
+# PropsSI runs the same flashes in C++ and measured no faster.
+
+REFRIGERANT = 'R32'
+# Fluids offered in the UIs (CoolProp names; R410A is its pseudo-pure model)
+REFRIGERANTS = ('R32', 'R410A', 'R290', 'R1234yf')
+
+# On-disk cache for precomputed property data (saturation domes, ...)
+CACHE_DIR = os.environ.get('CYCLE_SIM_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+
+# Property backends: the exact Helmholtz-energy EOS, or CoolProp's bicubic /
+# TTSE interpolation tables built from it. Tables are generated on first use
+# and cached under CACHE_DIR/tables for later processes.
+BACKENDS = ('HEOS', 'BICUBIC&HEOS', 'TTSE&HEOS')
+DEFAULT_BACKEND = 'HEOS'
+# Tables checked against HEOS over the slider ranges with
+# benchmarks/backend_accuracy.py (max |ΔEER| below 0.02). CoolProp's default
+# table ranges are far off elsewhere (ΔEER in the tens for R410A on BICUBIC,
+# in the thousands for R290), so other fluid/backend pairs are refused.
+VALIDATED_BACKENDS = {
+    'R32': ('HEOS', 'BICUBIC&HEOS', 'TTSE&HEOS'),
+    'R410A': ('HEOS', 'TTSE&HEOS'),
+}
+TABLES_DIR = os.path.join(CACHE_DIR, 'tables')
+
+# Control ranges of the UI sliders
+FREQ_RANGE = (30.0, 120.0)  # Hz
+EEV_RANGE = (0.0, 100.0)  # %
+FAN_RANGE = (0.0, 1500.0)  # RPM
+
+# Properties read from every state point flash, in the units of the results:
+# T (°C), P (kPa), h (kJ/kg), s (kJ/kg/K), Q (vapour quality, NaN outside
+# the dome) and rho (kg/m3)
+STATE_FIELDS = ('T', 'P', 'h', 's', 'Q', 'rho')
+
+RESULT_KEYS = ('P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4',
+               'cooling_effect', 'compressor_work', 'eer',
+               'discharge_temp', 'quality_4', 'pressure_ratio', 'property_evaluations') \
+    + tuple(f'{field}{i}' for i in range(1, 5) for field in STATE_FIELDS if field not in ('P', 'h'))
+
+
+def operating_conditions(freq, eev, fan):
+    freq = np.asarray(freq, dtype=float)
+    eev = np.asarray(eev, dtype=float)
+    fan = np.asarray(fan, dtype=float)
+
+    # Evaporation temperature based on EEV: base 5°C, increases with opening
+    T_evap_base = 5  # °C
+    T_evap = T_evap_base + (eev / 100) * 10  # Increase by 10°C at max opening
+
+    # Condensation temperature based on fan RPM and compressor freq:
+    # Base 50°C, decreases with fan RPM, increases with compressor freq (more heat load)
+    T_cond_base = 50  # °C
+    T_cond = T_cond_base - (fan / 1500) * 15 + (freq - 60) / 60 * 10  # Adjust for freq
+
+    # Suction superheat: base 10°C, decreases with opening
+    SH = 10 - (eev / 100) * 8  # Decrease by 8°C at max opening
+
+    # Discharge temp increases with freq
+    discharge_temp_raise = (freq - 60) * 0.1  # 0.1°C per Hz over 60
+
+    return T_evap, T_cond, SH, discharge_temp_raise
+
+
+def props(output, name1, value1, name2, value2, refrigerant, backend=DEFAULT_BACKEND):
+    profiler = profiling.current()
+    if profiler is None:
+        return _props(output, name1, value1, name2, value2, refrigerant, backend)
+    start = time.perf_counter()
+    out = _props(output, name1, value1, name2, value2, refrigerant, backend)
+    profiler.record_property_call(f"{name1}/{name2}", out.size, time.perf_counter() - start)
+    return out
+
+
+def _props(output, name1, value1, name2, value2, refrigerant, backend):
+    state = fluid_state(refrigerant, backend)
+    value1, value2 = np.broadcast_arrays(np.atleast_1d(np.asarray(value1, dtype=float)),
+                                         np.atleast_1d(np.asarray(value2, dtype=float)))
+    pair, swap = _update_pair(name1, name2)
+    output_key = _output_key(output)
+    if swap:
+        value1, value2 = value2, value1
+
+    # The state is updated in place; no fluid lookup or string parsing per point
+    out = np.empty(value1.size)
+    for i, (v1, v2) in enumerate(zip(value1.ravel().tolist(), value2.ravel().tolist())):
+        try:
+            state.update(pair, v1, v2)
+            out[i] = state.keyed_output(output_key)
+        except ValueError:
+            out[i] = np.inf  # same marker PropsSI uses for failed array entries
+    return out.reshape(value1.shape)
+
+
+_update_pairs = {}
+_output_keys = {}
+_pure = {}
+
+
+def _update_pair(name1, name2):
+    # (CoolProp input pair, whether the values have to be swapped for it)
+    pair = _update_pairs.get((name1, name2))
+    if pair is None:
+        key, first, _ = CP.generate_update_pair(CP.get_parameter_index(name1), 1.0,
+                                                CP.get_parameter_index(name2), 2.0)
+        pair = _update_pairs[(name1, name2)] = (key, first == 2.0)
+    return pair
+
+
+def _output_key(output):
+    key = _output_keys.get(output)
+    if key is None:
+        key = _output_keys[output] = CP.get_parameter_index(output)
+    return key
+
+
+def _is_pure(refrigerant):
+    # Pseudo-pure mixtures (R410A) have separate bubble and dew curves
+    pure = _pure.get(refrigerant)
+    if pure is None:
+        pure = _pure[refrigerant] = CP.get_fluid_param_string(refrigerant, 'pure') == 'true'
+    return pure
+
+
+# Pool of low-level CoolProp states. A state is created the first time a
+# (refrigerant, backend) pair is used and reused afterwards, so startup pays
+# for nothing and switching fluids pays for nothing twice. AbstractState
+# objects are not thread safe, so each thread keeps its own pool.
+_pool = threading.local()
+
+
+def backends_for(refrigerant):
+    return VALIDATED_BACKENDS.get(refrigerant, ('HEOS',))
+
+
+def validated_backend(refrigerant, backend):
+    # backend where it is validated for the fluid, the exact EOS elsewhere
+    return backend if backend in backends_for(refrigerant) else 'HEOS'
+
+
+@contextmanager
+def unvalidated_backends():
+    # Lets accuracy benchmarks measure the tables fluid_state otherwise refuses (this thread only)
+    previous = getattr(_pool, 'unvalidated', False)
+    _pool.unvalidated = True
+    try:
+        yield
+    finally:
+        _pool.unvalidated = previous
+
+
+def fluid_state(refrigerant=REFRIGERANT, backend=DEFAULT_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown property backend: {backend}")
+    if backend not in backends_for(refrigerant) and not getattr(_pool, 'unvalidated', False):
+        raise ValueError(f"The {backend} tables are not validated for {refrigerant}; "
+                         f"use one of {', '.join(backends_for(refrigerant))}")
+    states = getattr(_pool, 'states', None)
+    if states is None:
+        states = _pool.states = {}
+    state = states.get((backend, refrigerant))
+    if state is None:
+        if backend != 'HEOS':
+            # Tabular backends build (or load) their tables on construction
+            os.makedirs(TABLES_DIR, exist_ok=True)
+            # CoolProp appends its own sub-directory name without a separator
+            CP.set_config_string(CP.ALTERNATIVE_TABLES_DIRECTORY, os.path.join(TABLES_DIR, ""))
+        state = states[(backend, refrigerant)] = CP.AbstractState(backend, refrigerant)
+    return state
+
+
+_critical = {}
+_critical_lock = threading.Lock()
+
+
+def critical_point(refrigerant=REFRIGERANT):
+    # (Tcrit in K, Pcrit in Pa), looked up once per fluid and process
+    with _critical_lock:
+        point = _critical.get(refrigerant)
+        if point is None:
+            state = fluid_state(refrigerant, 'HEOS')
+            point = _critical[refrigerant] = (state.T_critical(), state.p_critical())
+    return point
+
+
+class StateRecord:
+    # Flashed states of a batch: one row per property (SI units) in a single array
+    __slots__ = ('data',) + STATE_FIELDS
+
+    def __init__(self, data):
+        self.data = data
+        self.T, self.P, self.h, self.s, self.Q, self.rho = data
+
+    @property
+    def size(self):
+        return self.data.shape[1]
+
+    def take(self, index):
+        return StateRecord(self.data[:, index])
+
+
+def flash(name1, value1, name2, value2, refrigerant=REFRIGERANT, backend=DEFAULT_BACKEND):
+    profiler = profiling.current()
+    if profiler is None:
+        return _flash(name1, value1, name2, value2, refrigerant, backend)
+    start = time.perf_counter()
+    record = _flash(name1, value1, name2, value2, refrigerant, backend)
+    profiler.record_property_call(f"{name1}/{name2}", record.size, time.perf_counter() - start)
+    return record
+
+
+def _flash(name1, value1, name2, value2, refrigerant, backend):
+    # One update per point; every property of the state is read from it
+    state = fluid_state(refrigerant, backend)
+    value1 = np.ravel(np.asarray(value1, dtype=float))
+    value2 = np.ravel(np.asarray(value2, dtype=float))
+    if value1.size != value2.size:
+        value1, value2 = np.broadcast_arrays(value1, value2)
+    pair, swap = _update_pair(name1, name2)
+    if swap:
+        value1, value2 = value2, value1
+
+    rows = []
+    failed = (np.inf,) * len(STATE_FIELDS)  # same marker PropsSI uses for failed array entries
+    for v1, v2 in zip(value1.tolist(), value2.tolist()):
+        try:
+            state.update(pair, v1, v2)
+            rows.append((state.T(), state.p(), state.hmass(), state.smass(), state.Q(), state.rhomass()))
+        except ValueError:
+            rows.append(failed)
+    record = _record(rows)
+    # Single-phase states report Q as -1 (HEOS) or -1000 (tables)
+    record.Q[(record.Q < 0) | (record.Q > 1)] = np.nan
+    return record
+
+
+def _saturation(T, refrigerant, backend):
+    # Saturated liquid and vapour at T, plus the number of flashes; repeated
+    # slider positions in a batch (e.g. a grid) are flashed once
+    T = np.ravel(np.asarray(T, dtype=float))
+    T_unique, inverse = np.unique(T, return_inverse=True) if T.size > 1 else (T, None)
+    profiler = profiling.current()
+    start = time.perf_counter()
+    liquid, vapour = _flash_saturation(T_unique, refrigerant, backend)
+    if profiler is not None:
+        profiler.record_property_call("T/Q", T_unique.size, time.perf_counter() - start)
+    if inverse is not None:
+        liquid, vapour = liquid.take(inverse), vapour.take(inverse)
+    return liquid, vapour, T_unique.size * (1 if _is_pure(refrigerant) else 2)
+
+
+def _flash_saturation(T, refrigerant, backend):
+    # Saturated liquid (bubble point) and vapour (dew point) at T; for pure
+    # fluids both phases come from one update
+    state = fluid_state(refrigerant, backend)
+    pure = _is_pure(refrigerant)
+    liquid, vapour = [], []
+    failed = (np.inf,) * len(STATE_FIELDS)
+    for T_sat in T.tolist():
+        try:
+            state.update(CP.QT_INPUTS, 0, T_sat)
+            T_out, P = state.T(), state.p()
+            liquid_row = (T_out, P, state.saturated_liquid_keyed_output(CP.iHmass),
+                          state.saturated_liquid_keyed_output(CP.iSmass), 0.0,
+                          state.saturated_liquid_keyed_output(CP.iDmass))
+            if pure:
+                vapour_row = (T_out, P, state.saturated_vapor_keyed_output(CP.iHmass),
+                              state.saturated_vapor_keyed_output(CP.iSmass), 1.0,
+                              state.saturated_vapor_keyed_output(CP.iDmass))
+            else:
+                state.update(CP.QT_INPUTS, 1, T_sat)
+                vapour_row = (state.T(), state.p(), state.hmass(), state.smass(), 1.0, state.rhomass())
+        except ValueError:
+            liquid_row = vapour_row = failed
+        liquid.append(liquid_row)
+        vapour.append(vapour_row)
+    return _record(liquid), _record(vapour)
+
+
+def _record(rows):
+    return StateRecord(np.array(rows, dtype=float).reshape(-1, len(STATE_FIELDS)).T)
+
+
+def _two_phase(liquid, vapour, h):
+    # Mixture of a saturated pair at enthalpy h, without another flash; at the
+    # vapour's (dew) pressure, which differs from the liquid's for pseudo-pure fluids
+    Q = (h - liquid.h) / (vapour.h - liquid.h)
+    return StateRecord(np.vstack([
+        liquid.T, vapour.P, h, liquid.s + Q * (vapour.s - liquid.s), Q,
+        1 / ((1 - Q) / liquid.rho + Q / vapour.rho),
+    ]))
+
+
+def _state_results(i, state):
+    # SI record -> result columns in UI units
+    return {
+        f'T{i}': state.T - 273.15, f'P{i}': state.P / 1000, f'h{i}': state.h / 1000,
+        f's{i}': state.s / 1000, f'Q{i}': state.Q, f'rho{i}': state.rho,
+    }
+
+
+def solve_batch(freq, eev, fan, refrigerant=REFRIGERANT, backend=DEFAULT_BACKEND):
+    freq, eev, fan = np.broadcast_arrays(np.asarray(freq, dtype=float),
+                                         np.asarray(eev, dtype=float),
+                                         np.asarray(fan, dtype=float))
+    shape = freq.shape
+    T_evap, T_cond, SH, discharge_temp_raise = operating_conditions(freq.ravel(), eev.ravel(), fan.ravel())
+
+    # Five flashes per cycle at most (seven for pseudo-pure fluids), each read out completely
+    evap_liquid, evap_vapour, n_evap = _saturation(T_evap + 273.15, refrigerant, backend)
+    state3, _, n_cond = _saturation(T_cond + 273.15, refrigerant, backend)  # condenser outlet: saturated liquid
+    P_evap, P_cond = evap_vapour.P, state3.P
+
+    state1 = flash('P', P_evap, 'T', T_evap + SH + 273.15, refrigerant, backend)
+
+    # Isentropic compression, discharge raised with compressor speed
+    state2s = flash('P', P_cond, 'S', state1.s, refrigerant, backend)
+    state2 = flash('P', P_cond, 'T', state2s.T + discharge_temp_raise, refrigerant, backend)
+
+    # Expander: isenthalpic, into the dome at the evaporating pressure
+    state4 = _two_phase(evap_liquid, evap_vapour, state3.h)
+
+    cooling_effect = (state1.h - state4.h) / 1000
+    compressor_work = (state2.h - state1.h) / 1000
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eer = np.where(compressor_work != 0, cooling_effect / compressor_work, 0.0)
+    # Property evaluations per cycle: 3 state flashes plus the shared saturation flashes
+    evaluations = 3 + (n_evap + n_cond) / max(P_evap.size, 1)
+
+    results = {}
+    for i, state in enumerate((state1, state2, state3, state4), start=1):
+        results.update(_state_results(i, state))
+    results.update({
+        'cooling_effect': cooling_effect,
+        'compressor_work': compressor_work,
+        'eer': eer,
+        'discharge_temp': state2.T - 273.15,  # °C
+        'quality_4': state4.Q,
+        'pressure_ratio': P_cond / P_evap,
+        'property_evaluations': np.full(P_evap.shape, evaluations),
+    })
+    return {key: results[key].reshape(shape) for key in RESULT_KEYS}
+
+
+def cycle_performance(points):
+    cooling_effect = points[1]['h'] - points[4]['h']
+    compressor_work = points[2]['h'] - points[1]['h']
+    eer = cooling_effect / compressor_work if compressor_work != 0 else 0
+    return cooling_effect, compressor_work, eer
+
+
+def cycle_summary(points):
+    # Figures beyond the P-h points; snapshots saved before T2/Q4 were stored lack T and Q
+    return {
+        'discharge_temp': points[2].get('T'),
+        'quality_4': points[4].get('Q'),
+        'pressure_ratio': points[2]['P'] / points[1]['P'],
+    }
+
+
+def points_from_results(results, index=()):
+    return {i: {field: float(results[f'{field}{i}'][index]) for field in STATE_FIELDS} for i in range(1, 5)}
+
+
+def solve_point(freq, eev, fan, refrigerant=REFRIGERANT, backend=DEFAULT_BACKEND):
+    # Single operating point in the {state: {"P", "h"}} layout used by the UIs
+    return points_from_results(solve_batch(freq, eev, fan, refrigerant, backend))
@@ -1,24 +1,41 @@
-import streamlit as st
-import matplotlib.pyplot as plt
-import numpy as np
-import CoolProp.CoolProp as CP
-import json
-import matplotlib.font_manager as fm
+import multiprocessing
 import os
-
-# Streamlit Cloud 환경에서 NanumGothic 설치 후 사용
-font_path = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
-if os.path.exists(font_path):
-    fm.fontManager.addfont(font_path)
-    plt.rcParams['font.family'] = 'NanumGothic'
-else:
-    plt.rcParams['font.family'] = 'DejaVu Sans'  # 기본 폰트
-plt.rcParams['axes.unicode_minus'] = False
+import streamlit as st
+import cycle_model
+import result_cache
+import profiling
+import rendering
+import snapshot_store
+import optimizer
+import ph_diagram
+import sensitivity
+import uncertainty
+
+rendering.setup_fonts()
+
+SNAPSHOT_PAGE_SIZE = 50
+COMPARE_LIMIT = 1000  # most snapshots overlaid in one compare plot
+
+OPTIMIZER_OBJECTIVES = {"최대 EER": "eer", "목표 냉방효과": "cooling_effect"}
+
+# Jacobian table: one column per control, derivatives per slider unit
+SENSITIVITY_COLUMNS = {"freq": "주파수 (/Hz)", "eev": "EEV (/%)", "fan": "팬 (/RPM)"}
+
+UNCERTAINTY_DISTRIBUTIONS = {"정규분포 (허용오차 = σ)": "normal", "균등분포 (허용오차 = ±)": "uniform"}
+UNCERTAINTY_SAMPLES = 20000  # default sample count; a few seconds with the full model
+UNCERTAINTY_MAX_SAMPLES = 100000  # blocks the session's script thread: ~15 s on a single core
+UNCERTAINTY_WORKERS = os.cpu_count() or 1  # chunks are solved on every core
+UNCERTAINTY_COLUMNS = {"value": "공칭값", "mean": "평균", "std": "표준편차",
+                       "low": f"{uncertainty.CONFIDENCE:.0%} 하한", "high": f"{uncertainty.CONFIDENCE:.0%} 상한"}
+
+COMPARE_COLUMNS = {
+    "name": "스냅샷", "freq": "주파수 (Hz)", "eev": "EEV (%)", "fan": "팬 (RPM)",
+    "P_evap": "증발압력 (kPa)", "P_cond": "응축압력 (kPa)",
+    "cooling_effect": "냉방효과 (kJ/kg)", "compressor_work": "압축기 일 (kJ/kg)", "eer": "EER",
+}
 
 class RefrigerationCycleWebSimulator:
     def __init__(self):
-        if 'snapshots' not in st.session_state:
-            st.session_state.snapshots = {}
         if 'current_cycle' not in st.session_state:
             st.session_state.current_cycle = None
         if 'current_freq' not in st.session_state:
@@ -27,11 +44,22 @@ class RefrigerationCycleWebSimulator:
             st.session_state.current_eev = 50.0
         if 'current_fan' not in st.session_state:
             st.session_state.current_fan = 750
-        self.snapshots = st.session_state.snapshots
+        if 'current_refrigerant' not in st.session_state:
+            st.session_state.current_refrigerant = cycle_model.REFRIGERANT
+        self.store = snapshot_store.get_store()
         self.current_cycle = st.session_state.current_cycle
         self.current_freq = st.session_state.current_freq
         self.current_eev = st.session_state.current_eev
         self.current_fan = st.session_state.current_fan
+        self.current_refrigerant = st.session_state.current_refrigerant
+        self.refrigerant = cycle_model.REFRIGERANT
+
+    def select_refrigerant(self):
+        # Fluid states are created on first use, so only selected fluids cost setup
+        self.refrigerant = st.sidebar.selectbox("냉매", cycle_model.REFRIGERANTS, key="refrigerant")
+        if self.current_refrigerant != self.refrigerant:
+            # The stored cycle belongs to the previous fluid
+            self.current_cycle = st.session_state.current_cycle = None
 
     def setup_ui(self):
         st.title("에어컨 냉동사이클 시뮬레이터")
@@ -50,73 +78,156 @@ class RefrigerationCycleWebSimulator:
         if st.button("계산 및 플롯"):
             self.calculate_cycle(comp_freq, eev_opening, fan_rpm)
 
+        self.setup_optimizer()
+        self.setup_sensitivity(comp_freq, eev_opening, fan_rpm)
+        self.setup_uncertainty(comp_freq, eev_opening, fan_rpm)
+        if st.session_state.pop("optimum_applied", False):
+            self.calculate_cycle(comp_freq, eev_opening, fan_rpm)
+
+    def setup_optimizer(self):
+        with st.expander("최적화"):
+            objective = OPTIMIZER_OBJECTIVES[st.selectbox("목표", list(OPTIMIZER_OBJECTIVES), key="opt_objective")]
+            target = None
+            if objective == "cooling_effect":
+                target = st.number_input("목표 냉방효과 (kJ/kg)", value=230.0, step=1.0, key="opt_target")
+            max_discharge_temp = None
+            if st.checkbox("최대 토출 온도 제한", key="opt_limit"):
+                max_discharge_temp = st.number_input("최대 토출 온도 (°C)", value=90.0, step=1.0, key="opt_limit_value")
+
+            col1, col2, col3 = st.columns(3)
+            bounds = (
+                col1.slider("주파수 범위 (Hz)", 30.0, 120.0, (30.0, 120.0), step=0.1, key="opt_freq"),
+                col2.slider("EEV 범위 (%)", 0.0, 100.0, (0.0, 100.0), step=0.1, key="opt_eev"),
+                col3.slider("팬 범위 (RPM)", 0, 1500, (0, 1500), step=10, key="opt_fan"),
+            )
+            # Runs before the next rerun, while the input sliders can still be moved to the optimum
+            st.button("최적화 실행", on_click=self.run_optimizer,
+                      args=(objective, target, max_discharge_temp, bounds, self.refrigerant))
+
+            if "optimum" in st.session_state:
+                result = st.session_state.optimum
+                if result is None:
+                    st.warning("조건을 만족하는 설정이 없습니다")
+                    return
+                settings, metrics = result["settings"], result["metrics"]
+                st.success(f"최적 설정: {settings['freq']:.1f} Hz, EEV {settings['eev']:.1f} %, "
+                           f"팬 {int(settings['fan'])} RPM")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("EER", f"{metrics['eer']:.2f}")
+                col2.metric("냉방효과", f"{metrics['cooling_effect']:.1f} kJ/kg")
+                col3.metric("토출 온도", f"{metrics['discharge_temp']:.1f} °C")
+                st.caption(f"평가 {result['evaluations']}회, 반복 {result['iterations']}회, "
+                           f"{result['elapsed_s'] * 1000:.1f} ms")
+
+    def setup_sensitivity(self, freq, eev, fan):
+        with st.expander("민감도 분석"):
+            if st.button("민감도 계산", key="sens_button"):
+                # Jacobian and tornado swings at the current sliders, each one batched solve
+                with profiling.stage('sensitivity'):
+                    st.session_state.sensitivity = (
+                        (freq, eev, fan, self.refrigerant),
+                        sensitivity.analyze(freq, eev, fan, refrigerant=self.refrigerant))
+            if "sensitivity" not in st.session_state:
+                return
+            (freq, eev, fan, refrigerant), result = st.session_state.sensitivity
+            st.caption(f"{refrigerant}, {freq:.1f} Hz, EEV {eev:.1f} %, 팬 {int(fan)} RPM 기준 "
+                       f"(평가 {result['evaluations']}회)")
+
+            import pandas as pd
+            names = ph_diagram.LABELS_KO['outputs']
+            df = pd.DataFrame.from_dict(result['jacobian'], orient='index')[list(SENSITIVITY_COLUMNS)]
+            df.insert(0, "값", pd.Series(result['base']))
+            df.index = [names[key] for key in df.index]
+            st.dataframe(df.rename(columns=SENSITIVITY_COLUMNS).style.format("{:.4g}"))
+
+            outputs = {names[key]: key for key in sensitivity.OUTPUTS}
+            output = outputs[st.selectbox("토네이도 차트 출력", list(outputs), key="sens_output")]
+            st.image(rendering.render_tornado_png(result['swings'][output], output), use_column_width=True)
+            st.caption(f"각 제어값을 범위의 ±{sensitivity.SWING_FRACTION:.0%}만큼 따로 움직였을 때의 변화")
+
+    def setup_uncertainty(self, freq, eev, fan):
+        with st.expander("불확도 분석"):
+            col1, col2, col3 = st.columns(3)
+            tolerance = (
+                col1.number_input("주파수 허용오차 (Hz)", min_value=0.0, value=uncertainty.DEFAULT_TOLERANCE[0],
+                                  step=0.1, key="unc_freq"),
+                col2.number_input("EEV 허용오차 (%)", min_value=0.0, value=uncertainty.DEFAULT_TOLERANCE[1],
+                                  step=0.1, key="unc_eev"),
+                col3.number_input("팬 허용오차 (RPM)", min_value=0.0, value=uncertainty.DEFAULT_TOLERANCE[2],
+                                  step=1.0, key="unc_fan"),
+            )
+            col1, col2 = st.columns(2)
+            distribution = UNCERTAINTY_DISTRIBUTIONS[col1.selectbox("분포", list(UNCERTAINTY_DISTRIBUTIONS),
+                                                                    key="unc_dist")]
+            samples = col2.number_input("샘플 수", min_value=1000, max_value=UNCERTAINTY_MAX_SAMPLES,
+                                        value=UNCERTAINTY_SAMPLES, step=10000, key="unc_samples")
+            if st.button("불확도 계산", key="unc_button"):
+                # Sampled and solved in chunks on worker processes; only the running statistics are
+                # kept. Spawned, not forked: the Streamlit server process is multi-threaded
+                with profiling.stage('uncertainty'):
+                    st.session_state.uncertainty = (
+                        (freq, eev, fan, self.refrigerant),
+                        uncertainty.propagate(freq, eev, fan, tolerance, distribution, int(samples),
+                                              refrigerant=self.refrigerant, workers=UNCERTAINTY_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn')))
+            if "uncertainty" not in st.session_state:
+                return
+            (freq, eev, fan, refrigerant), result = st.session_state.uncertainty
+            st.caption(f"{refrigerant}, {freq:.1f} Hz, EEV {eev:.1f} %, 팬 {int(fan)} RPM 기준, "
+                       f"샘플 {result['samples']}개 ({result['elapsed_s']:.1f} s)")
+
+            import pandas as pd
+            names = ph_diagram.LABELS_KO['outputs']
+            stats = result['stats']
+            df = pd.DataFrame.from_dict({key: {"value": result['values'][key],
+                                               **{column: stats[key][column] for column in ("mean", "std", "low", "high")}}
+                                         for key in uncertainty.METRICS}, orient='index')
+            df.index = [names[key] for key in df.index]
+            st.dataframe(df.rename(columns=UNCERTAINTY_COLUMNS).style.format("{:.5g}"))
+            st.image(rendering.render_uncertainty_png(result, refrigerant), use_column_width=True)
+
+    def run_optimizer(self, objective, target, max_discharge_temp, bounds, refrigerant):
+        # Warm start from the current slider position
+        start = (st.session_state.comp_freq, st.session_state.eev_opening, st.session_state.fan_rpm)
+        result = optimizer.optimize(objective, target, max_discharge_temp, bounds, start, refrigerant)
+        st.session_state.optimum = result
+        if result is not None:
+            st.session_state["comp_freq"] = result["settings"]["freq"]
+            st.session_state["eev_opening"] = result["settings"]["eev"]
+            st.session_state["fan_rpm"] = int(result["settings"]["fan"])
+            st.session_state.optimum_applied = True
+
     def calculate_cycle(self, freq, eev, fan):
         self.current_freq = freq
         self.current_eev = eev
         self.current_fan = fan
+        self.current_refrigerant = self.refrigerant
 
-        # Simplified model
-        # Base values for R32 at typical conditions
-        refrigerant = 'R32'
-
-        # Evaporation temperature based on EEV: base 5°C, increases with opening
-        T_evap_base = 5  # °C
-        T_evap = T_evap_base + (eev / 100) * 10  # Increase by 10°C at max opening
-
-        # Condensation temperature based on fan RPM and compressor freq:
-        # Base 50°C, decreases with fan RPM, increases with compressor freq (more heat load)
-        T_cond_base = 50  # °C
-        T_cond = T_cond_base - (fan / 1500) * 15 + (freq - 60) / 60 * 10  # Adjust for freq
-
-        # Suction superheat: base 10°C, decreases with opening
-        SH = 10 - (eev / 100) * 8  # Decrease by 8°C at max opening
-
-        # Compression ratio and discharge temp increase with freq
-        ratio_mult = freq / 60
-        discharge_temp_raise = (freq - 60) * 0.1  # 0.1°C per Hz over 60
-
-        P_evap = CP.PropsSI('P', 'T', T_evap + 273.15, 'Q', 1, refrigerant) / 1000  # kPa
-        P_cond = CP.PropsSI('P', 'T', T_cond + 273.15, 'Q', 0, refrigerant) / 1000  # kPa
-
-        T_suction = T_evap + SH
-        h1 = CP.PropsSI('H', 'T', T_suction + 273.15, 'P', P_evap * 1000, refrigerant) / 1000  # kJ/kg
-
-        # Isentropic compression
-        s1 = CP.PropsSI('S', 'T', T_suction + 273.15, 'P', P_evap * 1000, refrigerant) / 1000  # kJ/kg/K
-        P2 = P_cond * 1000
-        T2s = CP.PropsSI('T', 'P', P2, 'S', s1 * 1000, refrigerant) - 273.15 + discharge_temp_raise
-        h2s = CP.PropsSI('H', 'T', T2s + 273.15, 'P', P2, refrigerant) / 1000
-
-        # Assume some efficiency, but for simplicity use isentropic
-        h2 = h2s
-
-        # Condenser outlet: saturated liquid
-        T3 = T_cond
-        h3 = CP.PropsSI('H', 'T', T3 + 273.15, 'Q', 0, refrigerant) / 1000
-
-        # Expander: isenthalpic
-        h4 = h3
-        T4 = CP.PropsSI('T', 'H', h4 * 1000, 'P', P_evap * 1000, refrigerant) - 273.15
-
-        points = {
-            1: {"P": P_evap, "h": h1},
-            2: {"P": P_cond, "h": h2},
-            3: {"P": P_cond, "h": h3},
-            4: {"P": P_evap, "h": h4}
-        }
+        # Shared across all sessions of this server process
+        with profiling.stage('solve'):
+            points = result_cache.solve_point(freq, eev, fan, self.refrigerant)
 
         self.current_cycle = points
         st.session_state.current_cycle = points
         st.session_state.current_freq = self.current_freq
         st.session_state.current_eev = self.current_eev
         st.session_state.current_fan = self.current_fan
+        st.session_state.current_refrigerant = self.current_refrigerant
         self.update_table(points)
         self.plot_cycle(points)
 
+        stats = result_cache.shared_cache.stats()
+        st.caption(f"결과 캐시: 적중 {stats['hits']} / 미스 {stats['misses']} "
+                   f"(적중률 {stats['hit_rate']:.0%}, {stats['size']}/{stats['maxsize']} 항목)")
+
     def update_table(self, points):
         if points is None:
             return
 
+        with profiling.stage('table'):
+            self._update_table(points)
+
+    def _update_table(self, points):
         st.header("상태점 테이블 및 성능")
 
         import pandas as pd
@@ -126,124 +237,137 @@ class RefrigerationCycleWebSimulator:
         df = df.round(1)
         st.table(df.set_index('상태점'))
 
-        # Calculate performance
-        cooling_effect = points[1]['h'] - points[4]['h']
-        compressor_work = points[2]['h'] - points[1]['h']
-        eer = cooling_effect / compressor_work if compressor_work != 0 else 0
+        cooling_effect, compressor_work, eer = cycle_model.cycle_performance(points)
 
         col1, col2, col3 = st.columns(3)
         col1.metric("냉방효과", f"{cooling_effect:.1f} kJ/kg")
         col2.metric("압축기 일", f"{compressor_work:.1f} kJ/kg")
         col3.metric("EER", f"{eer:.2f}")
 
+        summary = cycle_model.cycle_summary(points)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("토출 온도", "--" if summary['discharge_temp'] is None else f"{summary['discharge_temp']:.1f} °C")
+        col2.metric("4점 건도", "--" if summary['quality_4'] is None else f"{summary['quality_4']:.3f}")
+        col3.metric("압축비", f"{summary['pressure_ratio']:.2f}")
+
     def plot_cycle(self, points):
         if points is None:
             return
 
         st.header("P-H 선도")
 
-        # 한글 폰트 설정
-        font_path = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
-        if os.path.exists(font_path):
-            fm.fontManager.addfont(font_path)
-            plt.rcParams['font.family'] = 'NanumGothic'
-        else:
-            plt.rcParams['font.family'] = 'DejaVu Sans'
-        plt.rcParams['axes.unicode_minus'] = False
-
-        fig, ax = plt.subplots(figsize=(6, 5))
-
-        # Get saturation curve
-        refrigerant = 'R32'
-        h_sat_liq = []
-        h_sat_vap = []
-        P_min = 200
-        P_max = 3500
-        P_range = np.linspace(P_min, P_max, 200)
-
-        for P in P_range:
-            h_l = CP.PropsSI('H', 'P', P * 1000, 'Q', 0, refrigerant) / 1000
-            h_v = CP.PropsSI('H', 'P', P * 1000, 'Q', 1, refrigerant) / 1000
-            h_sat_liq.append(h_l)
-            h_sat_vap.append(h_v)
-
-        ax.plot(h_sat_vap, P_range, 'b-', label='Saturated Vapor', alpha=0.7)
-        ax.plot(h_sat_liq, P_range, 'b-', label='Saturated Liquid', alpha=0.7)
-
-        # Plot cycle
-        cycle_h = [points[1]['h'], points[2]['h'], points[3]['h'], points[4]['h'], points[1]['h']]
-        cycle_p = [points[1]['P'], points[2]['P'], points[3]['P'], points[4]['P'], points[1]['P']]
-
-        ax.plot(cycle_h, cycle_p, 'r-o', label='Refrigeration Cycle', linewidth=2)
-
-        # Annotate points
-        for i in range(1, 5):
-            h, p = points[i]['h'], points[i]['P']
-            ax.annotate(f'{i}', (h, p), xytext=(5, 5), textcoords='offset points', fontsize=10, fontweight='bold')
-
-        ax.set_xlabel('Enthalpy (kJ/kg)')
-        ax.set_ylabel('Pressure (kPa)')
-        ax.set_title('R32 Refrigeration Cycle P-H Diagram')
-        ax.legend()
-        ax.grid(True)
-        ax.set_xlim(min(h_sat_liq) - 50, 800)
-        ax.set_ylim(P_min, P_max)
-        st.pyplot(fig)
+        # Shared renderer: dome/axes are cached, only the cycle overlay is drawn per request
+        renderer = rendering.get_renderer(self.current_refrigerant)
+        with profiling.stage('draw'):
+            st.image(renderer.render_png(points), use_column_width=True)
 
     def setup_snapshots(self):
         st.sidebar.header("스냅샷 관리")
 
         if st.sidebar.button("저장"):
             if self.current_cycle:
-                name = f"압축_{self.current_freq:.1f}Hz_EEV_{self.current_eev:.1f}%_팬_{int(self.current_fan)}RPM"
-                if name in self.snapshots:
+                name = snapshot_store.snapshot_name(self.current_freq, self.current_eev, self.current_fan)
+                if self.store.add(self.current_freq, self.current_eev, self.current_fan, self.current_cycle,
+                                  self.current_refrigerant) is None:
                     st.sidebar.warning("이 설정의 스냅샷이 이미 존재합니다.")
                 else:
-                    self.snapshots[name] = {
-                        "cycle": self.current_cycle,
-                        "settings": {
-                            "freq": self.current_freq,
-                            "eev": self.current_eev,
-                            "fan": self.current_fan
-                        }
-                    }
-                    st.session_state.snapshots = self.snapshots
                     st.sidebar.success(f"스냅샷 '{name}' 저장됨")
             else:
                 st.sidebar.error("계산을 먼저 수행하세요")
 
-        snap_names = list(self.snapshots.keys())
-        if snap_names:
-            selected = st.sidebar.selectbox("스냅샷 선택", snap_names)
+        with st.sidebar.expander("필터"):
+            freq_range = st.slider("압축기 주파수 (Hz)", min_value=30.0, max_value=120.0, value=(30.0, 120.0),
+                                   step=0.1, key="filter_freq")
+            eer_min = st.number_input("최소 EER", min_value=0.0, value=0.0, step=0.5, key="filter_eer")
+        filters = {"refrigerant": self.refrigerant, "freq": freq_range, "eer": (eer_min or None, None)}
+
+        total = self.store.count(filters)
+        if total:
+            # Only one page of names is fetched and handed to the selectbox
+            n_pages = -(-total // SNAPSHOT_PAGE_SIZE)
+            if st.session_state.get("snapshot_page", 1) > n_pages:
+                st.session_state.snapshot_page = n_pages
+            page = st.sidebar.number_input(f"페이지 (총 {total}개, {n_pages}쪽)", min_value=1, max_value=n_pages,
+                                           value=1, step=1, key="snapshot_page")
+            ids = {name: snapshot_id for snapshot_id, name
+                   in self.store.page((page - 1) * SNAPSHOT_PAGE_SIZE, SNAPSHOT_PAGE_SIZE, filters)}
+            selected = ids[st.sidebar.selectbox("스냅샷 선택", list(ids))]
 
             if st.sidebar.button("불러오기", key="load_button"):
-                data = self.snapshots[selected]
-                st.session_state["comp_freq"] = data["settings"]["freq"]
-                st.session_state["eev_opening"] = data["settings"]["eev"]
-                st.session_state["fan_rpm"] = data["settings"]["fan"]
+                data = self.store.get(selected)
+                # Snapshots saved from the tkinter app are not on the slider grid
+                st.session_state["comp_freq"] = round(data["settings"]["freq"], 1)
+                st.session_state["eev_opening"] = round(data["settings"]["eev"], 1)
+                st.session_state["fan_rpm"] = int(round(data["settings"]["fan"], -1))
                 self.current_cycle = data["cycle"]
                 self.current_freq = data["settings"]["freq"]
                 self.current_eev = data["settings"]["eev"]
                 self.current_fan = data["settings"]["fan"]
+                self.current_refrigerant = data["refrigerant"]
                 st.session_state.current_cycle = self.current_cycle
                 st.session_state.current_freq = self.current_freq
                 st.session_state.current_eev = self.current_eev
                 st.session_state.current_fan = self.current_fan
+                st.session_state.current_refrigerant = self.current_refrigerant
                 self.update_table(self.current_cycle)
                 self.plot_cycle(self.current_cycle)
                 st.sidebar.success("스냅샷 불러옴")
 
             if st.sidebar.button("삭제"):
-                del self.snapshots[selected]
-                st.session_state.snapshots = self.snapshots
+                self.store.delete(selected)
                 st.sidebar.success("스냅샷 삭제됨")
+
+            with st.sidebar.expander("비교"):
+                compare_names = st.multiselect("비교할 스냅샷", list(ids), key="compare_names")
+                compare_all = st.checkbox(f"필터 결과 전체 비교 (최대 {COMPARE_LIMIT}개)", key="compare_all")
+                if st.button("비교", key="compare_button"):
+                    if compare_all:
+                        snapshots = self.store.query(filters, limit=COMPARE_LIMIT)
+                    else:
+                        snapshots = self.store.get_many(ids[name] for name in compare_names)
+                    if snapshots:
+                        self.compare_snapshots(snapshots)
+                    else:
+                        st.warning("비교할 스냅샷을 선택하세요")
         else:
             st.sidebar.write("저장된 스냅샷이 없습니다")
 
+    def compare_snapshots(self, snapshots):
+        st.header(f"스냅샷 비교 ({len(snapshots)}개)")
+
+        # All cycles in one batched overlay on the shared dome, coloured by EER
+        with profiling.stage('draw'):
+            st.image(rendering.render_comparison_png(snapshots, self.refrigerant), use_column_width=True)
+
+        with profiling.stage('table'):
+            import pandas as pd
+            df = pd.DataFrame(snapshot_store.comparison_rows(snapshots), columns=list(COMPARE_COLUMNS))
+            st.dataframe(df.rename(columns=COMPARE_COLUMNS).round(2), hide_index=True)
+
+def show_profile(profiler):
+    report = profiler.report()
+    with st.expander("프로파일 결과", expanded=False):
+        st.caption(profiler.summary())
+        if report["property_calls"]:
+            st.write("물성 호출 (입력 쌍별)")
+            st.table(report["property_calls"])
+        if report["stages"]:
+            st.write("단계별 시간")
+            st.table(report["stages"])
+        st.download_button("JSON 내보내기", profiler.to_json(), file_name="profile.json", mime="application/json")
+
 def main():
     app = RefrigerationCycleWebSimulator()
-    app.setup_snapshots()
-    app.setup_ui()
+    if st.sidebar.checkbox("프로파일링", key="profiling"):
+        with profiling.profile() as profiler:
+            app.select_refrigerant()
+            app.setup_snapshots()
+            app.setup_ui()
+        show_profile(profiler)
+    else:
+        app.select_refrigerant()
+        app.setup_snapshots()
+        app.setup_ui()
 
 if __name__ == "__main__":
     main()
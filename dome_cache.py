@@ -0,0 +1,72 @@
+import os
+import threading
+import numpy as np
+import cycle_model
+
+# Saturation dome for the P-h diagram. The dome only depends on the
+# refrigerant, the pressure range and the resolution, so it is built once,
+# kept in process memory (shared by every Streamlit session/rerun) and
+# persisted as a .npy file so a cold start can skip CoolProp entirely.
+
+DOME_P_RANGE = (200, 3500)  # kPa, fixed axis range of the diagram
+DOME_POINTS = 200
+
+_domes = {}
+_lock = threading.Lock()
+
+
+def dome_path(refrigerant, P_min, P_max, n_points, backend=cycle_model.DEFAULT_BACKEND):
+    backend_tag = backend.replace('&', '-')
+    return os.path.join(cycle_model.CACHE_DIR,
+                        f"dome_{refrigerant}_{P_min:g}-{P_max:g}kPa_{n_points}_{backend_tag}.npy")
+
+
+def build_dome(refrigerant, P_min, P_max, n_points, backend=cycle_model.DEFAULT_BACKEND):
+    # Fluids with a low critical pressure (R1234yf: 3382 kPa) close the dome inside the axis range
+    P_crit = cycle_model.critical_point(refrigerant)[1] / 1000
+    P_range = np.linspace(P_min, min(P_max, P_crit * 0.999), n_points)
+    h_sat_liq = cycle_model.props('H', 'P', P_range * 1000, 'Q', 0, refrigerant, backend) / 1000
+    h_sat_vap = cycle_model.props('H', 'P', P_range * 1000, 'Q', 1, refrigerant, backend) / 1000
+    return np.vstack([P_range, h_sat_liq, h_sat_vap])
+
+
+def _load_or_build(refrigerant, P_min, P_max, n_points, backend):
+    path = dome_path(refrigerant, P_min, P_max, n_points, backend)
+    try:
+        dome = np.load(path)
+        if dome.shape == (3, n_points):
+            return dome
+    except (OSError, ValueError):
+        pass
+
+    dome = build_dome(refrigerant, P_min, P_max, n_points, backend)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial array
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, dome)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # read-only checkout: keep the in-memory copy only
+    return dome
+
+
+def get_dome(refrigerant=cycle_model.REFRIGERANT, P_min=DOME_P_RANGE[0], P_max=DOME_P_RANGE[1], n_points=DOME_POINTS,
+             backend=cycle_model.DEFAULT_BACKEND):
+    key = (refrigerant, float(P_min), float(P_max), int(n_points), backend)
+    dome = _domes.get(key)
+    if dome is None:
+        with _lock:
+            dome = _domes.get(key)
+            if dome is None:
+                dome = _load_or_build(*key)
+                dome.flags.writeable = False
+                _domes[key] = dome
+    # P_range (kPa), h_sat_liq (kJ/kg), h_sat_vap (kJ/kg)
+    return dome[0], dome[1], dome[2]
+
+
+def clear_memory_cache():
+    with _lock:
+        _domes.clear()
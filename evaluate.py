@@ -0,0 +1,106 @@
+import time
+_STARTED = time.perf_counter()  # before the model imports, which dominate a cold start
+import argparse
+import sys
+from contextlib import ExitStack
+import numpy as np
+import cycle_model
+
+# Headless command-line evaluation of the cycle model. Only the core model
+# (NumPy + CoolProp) is imported; no UI, plotting or pandas code is loaded.
+#
+#   python evaluate.py 60 50 750                      # one point as JSON
+#   python evaluate.py --batch points.csv -o out.csv  # freq,eev,fan columns
+#   python evaluate.py --batch - --surrogate < points.csv
+#
+# --timing reports the time from script start (imports included) to the
+# last result on stderr, which is what a freshly spawned worker pays.
+
+INPUT_COLUMNS = ('freq', 'eev', 'fan')
+BATCH_CHUNK = 100000  # rows read, solved and written at a time
+
+
+def make_solver(refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND, surrogate_path=None):
+    if surrogate_path is None:
+        keys = cycle_model.RESULT_KEYS
+        return keys, lambda freq, eev, fan: cycle_model.solve_batch(freq, eev, fan, refrigerant, backend)
+    import surrogate
+    model = surrogate.Surrogate.load(surrogate_path or surrogate.default_path(refrigerant))
+    return surrogate.OUTPUT_KEYS, model.evaluate
+
+
+_solvers = {}
+
+
+def get_solver(refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND, surrogate_path=None):
+    # make_solver() cached per configuration and process; callers pass the
+    # configuration along instead of sharing one module-level solver, and
+    # pool initializers call it to build a worker's solver up front
+    key = (refrigerant, backend, surrogate_path)
+    solver = _solvers.get(key)
+    if solver is None:
+        solver = _solvers.setdefault(key, make_solver(*key))
+    return solver
+
+
+def _read_chunks(f):
+    header = f.readline().strip().split(',')
+    try:
+        columns = [header.index(name) for name in INPUT_COLUMNS]
+    except ValueError:
+        raise SystemExit(f"batch input needs a header with the columns {', '.join(INPUT_COLUMNS)}")
+    while True:
+        lines = [line for _, line in zip(range(BATCH_CHUNK), f)]
+        if not lines:
+            return
+        yield np.loadtxt(lines, delimiter=',', ndmin=2, usecols=columns)
+
+
+def run_batch(solver, source, out):
+    keys, solve = solver
+    out.write(','.join(INPUT_COLUMNS + tuple(keys)) + '\n')
+    count = 0
+    for table in _read_chunks(source):
+        results = solve(table[:, 0], table[:, 1], table[:, 2])
+        np.savetxt(out, np.column_stack([table] + [results[key] for key in keys]), delimiter=',', fmt='%.10g')
+        count += len(table)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the refrigeration cycle without a UI")
+    parser.add_argument('point', nargs='*', type=float, metavar='FREQ EEV FAN',
+                        help="one operating point: compressor Hz, EEV %%, fan RPM")
+    parser.add_argument('--batch', metavar='CSV', help="CSV with freq,eev,fan columns ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="batch output CSV ('-' for stdout)")
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    parser.add_argument('--surrogate', nargs='?', const='', default=None, metavar='NPZ',
+                        help="use a fitted surrogate (default artifact if no path is given)")
+    parser.add_argument('--timing', action='store_true', help="report the cold-start time on stderr")
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+    if (args.batch is None) == (len(args.point) != 3):
+        parser.error("give either FREQ EEV FAN or --batch CSV")
+
+    solver = make_solver(args.refrigerant, args.backend, args.surrogate)
+    if args.batch is None:
+        import json
+        keys, solve = solver
+        results = solve(*args.point)
+        print(json.dumps({key: float(results[key]) for key in keys}, indent=2))
+        count = 1
+    else:
+        with ExitStack() as stack:
+            source = sys.stdin if args.batch == '-' else stack.enter_context(open(args.batch, encoding='utf-8'))
+            out = (sys.stdout if args.output == '-'
+                   else stack.enter_context(open(args.output, 'w', encoding='utf-8', newline='')))
+            count = run_batch(solver, source, out)
+
+    if args.timing:
+        print(f"{count} point(s), {(time.perf_counter() - _STARTED) * 1000:.0f} ms from start", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+import ph_diagram
+import rendering
+import snapshot_store
+
+# Headless bulk export of stored snapshots for reports: one P-h chart per
+# snapshot (PNG and/or SVG) plus one state table (CSV and/or JSON) for the
+# whole set. Charts are rendered with Agg, without any UI: every worker
+# process sets up its fonts and builds the dome once per refrigerant, then
+# only draws each snapshot's cycle on top (blitted for PNG, a nested overlay
+# on a pre-rendered template for SVG).
+#
+#   python export.py reports/                          # PNG charts + CSV table
+#   python export.py reports/ --format png svg --table csv json --lang ko
+#   python export.py reports/ --where eer 5 - --refrigerant R32 --workers 4
+#
+# Charts are written to OUT_DIR/charts/<id>.<format>, the tables to
+# OUT_DIR/snapshots.csv / snapshots.json.
+
+FORMATS = ('png', 'svg')
+TABLE_FORMATS = ('csv', 'json')
+LABELS = {'en': ph_diagram.LABELS_EN, 'ko': ph_diagram.LABELS_KO}
+CHUNK_SIZE = 100  # snapshots per pool task
+TABLE_COLUMNS = ('id',) + snapshot_store.EXPORT_COLUMNS
+
+_renderers = {}
+
+
+def _init_worker():
+    # Pool initializer: font registration happens once per process
+    rendering.setup_fonts()
+
+
+def _renderer(kind, refrigerant, lang):
+    # Per-process renderers; the dome is drawn when one is first built
+    key = (kind, refrigerant, lang)
+    renderer = _renderers.get(key)
+    if renderer is None:
+        cls = rendering.CycleRenderer if kind == 'png' else rendering.CycleVectorRenderer
+        renderer = _renderers[key] = cls(refrigerant, LABELS[lang])
+    return renderer
+
+
+def chart_path(snapshot_id, fmt):
+    return os.path.join('charts', f"{snapshot_id:06d}.{fmt}")
+
+
+def render_chunk(snapshots, out_dir, formats, lang):
+    for snapshot in snapshots:
+        for fmt in formats:
+            renderer = _renderer(fmt, snapshot["refrigerant"], lang)
+            data = renderer.render_png(snapshot["cycle"]) if fmt == 'png' else renderer.render_svg(snapshot["cycle"])
+            with open(os.path.join(out_dir, chart_path(snapshot["id"], fmt)), 'wb') as f:
+                f.write(data)
+    return len(snapshots)
+
+
+def _rendered_chunks(chunks, out_dir, formats, lang, workers):
+    # Serial, or in order on a process pool with a bounded number of chunks in flight
+    if workers <= 1:
+        _init_worker()
+        for snapshots in chunks:
+            render_chunk(snapshots, out_dir, formats, lang)
+            yield snapshots
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for snapshots in chunks:
+            pending.append((snapshots, pool.submit(render_chunk, snapshots, out_dir, formats, lang)))
+            if len(pending) > 2 * workers:
+                snapshots, future = pending.popleft()
+                future.result()
+                yield snapshots
+        while pending:
+            snapshots, future = pending.popleft()
+            future.result()
+            yield snapshots
+
+
+def _table_row(snapshot):
+    values = {
+        "id": snapshot["id"],
+        "name": snapshot["name"],
+        "refrigerant": snapshot["refrigerant"],
+        **snapshot["settings"],
+        **{f"{key}{i}": point[key] for i, point in snapshot["cycle"].items() for key in ('P', 'h')},
+        **{column: snapshot["cycle"][int(column[1])].get(column[0]) for column in snapshot_store.STATE_COLUMNS},
+        **snapshot["metrics"],
+    }
+    return [values[column] for column in TABLE_COLUMNS]
+
+
+def _json_record(snapshot, formats):
+    return dict(snapshot, cycle={str(i): point for i, point in snapshot["cycle"].items()},
+                charts={fmt: chart_path(snapshot["id"], fmt) for fmt in formats})
+
+
+def export(out_dir, formats=('png',), tables=('csv',), filters=None, store_path=snapshot_store.DEFAULT_PATH,
+           workers=None, lang='en', chunk_size=CHUNK_SIZE, progress=None):
+    unknown = [fmt for fmt in formats if fmt not in FORMATS] + [fmt for fmt in tables if fmt not in TABLE_FORMATS]
+    if unknown or lang not in LABELS:
+        raise ValueError(f"Unknown export format or language: {', '.join(unknown) or lang}")
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    store = snapshot_store.SnapshotStore(store_path)
+    try:
+        ids = [snapshot_id for snapshot_id, _ in store.page(0, -1, filters)]  # LIMIT -1: no limit
+        # Snapshots are fetched one chunk at a time, while the pool renders the previous ones
+        chunks = (store.get_many(ids[start:start + chunk_size]) for start in range(0, len(ids), chunk_size))
+
+        os.makedirs(os.path.join(out_dir, 'charts'), exist_ok=True)
+        with ExitStack() as stack:
+            csv_file = json_file = None
+            if 'csv' in tables:
+                import csv
+                csv_file = csv.writer(stack.enter_context(
+                    open(os.path.join(out_dir, 'snapshots.csv'), 'w', newline='', encoding='utf-8')))
+                csv_file.writerow(TABLE_COLUMNS + tuple(formats))
+            if 'json' in tables:
+                json_file = stack.enter_context(open(os.path.join(out_dir, 'snapshots.json'), 'w', encoding='utf-8'))
+                json_file.write('[')
+
+            done = 0
+            for snapshots in _rendered_chunks(chunks, out_dir, formats, lang, workers):
+                for snapshot in snapshots:
+                    if csv_file is not None:
+                        csv_file.writerow(_table_row(snapshot) + [chart_path(snapshot["id"], fmt) for fmt in formats])
+                    if json_file is not None:
+                        json_file.write((',' if done else '') + '\n'
+                                        + json.dumps(_json_record(snapshot, formats), ensure_ascii=False))
+                    done += 1
+                if progress is not None:
+                    progress(done, len(ids))
+            if json_file is not None:
+                json_file.write('\n]\n')
+    finally:
+        store.close()
+    return {'snapshots': len(ids), 'charts': len(ids) * len(formats), 'elapsed_s': time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export P-h charts and a state table for stored snapshots")
+    parser.add_argument('out_dir')
+    parser.add_argument('--format', nargs='+', default=['png'], choices=FORMATS, help="chart formats")
+    parser.add_argument('--table', nargs='+', default=['csv'], choices=TABLE_FORMATS, help="state table formats")
+    parser.add_argument('--db', default=snapshot_store.DEFAULT_PATH, help="snapshot database")
+    parser.add_argument('--refrigerant', default=None, help="only snapshots of this refrigerant")
+    parser.add_argument('--where', nargs=3, action='append', default=[], metavar=('COLUMN', 'MIN', 'MAX'),
+                        help="range filter, '-' for an open end (repeatable)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--lang', default='en', choices=sorted(LABELS), help="chart labels")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    filters = snapshot_store.parse_filters(args.where, args.refrigerant)
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end='', file=sys.stderr, flush=True)
+
+    try:
+        stats = export(args.out_dir, tuple(args.format), tuple(args.table), filters, args.db, args.workers,
+                       args.lang, args.chunk_size, progress)
+    except ValueError as exc:
+        parser.error(str(exc))
+    rate = stats['charts'] / max(stats['elapsed_s'], 1e-9) * 60
+    print(f"\r{stats['snapshots']} snapshots, {stats['charts']} charts in {stats['elapsed_s']:.1f} s "
+          f"({rate:.0f} charts/min) -> {args.out_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
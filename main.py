@@ -1,19 +1,101 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import matplotlib.pyplot as plt
+import matplotlib
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.font_manager import FontProperties
-import json
+from matplotlib.figure import Figure
+import cycle_model
+import result_cache
+import profiling
+import ph_diagram
+import snapshot_store
+import optimizer
+import sensitivity
+import uncertainty
+import multiprocessing
 import os
-import numpy as np
-import CoolProp.CoolProp as CP
+import queue
+import threading
+from contextlib import nullcontext
+
+LIVE_DEBOUNCE_MS = 30  # wait this long after the last slider move before solving
+LIVE_POLL_MS = 15  # how often the Tk loop picks up finished background solves
+SNAPSHOT_PAGE_SIZE = 50  # snapshot names fetched per Listbox page
+OPTIMIZER_OBJECTIVES = {"최대 EER": "eer", "목표 냉방효과": "cooling_effect"}
+
+# Jacobian table: output, its value and the derivative per slider unit of each control
+SENSITIVITY_COLUMNS = (("output", "출력"), ("value", "값"), ("freq", "주파수 (/Hz)"), ("eev", "EEV (/%)"),
+                       ("fan", "팬 (/RPM)"))
+
+UNCERTAINTY_DISTRIBUTIONS = {"정규분포 (허용오차 = σ)": "normal", "균등분포 (허용오차 = ±)": "uniform"}
+UNCERTAINTY_SAMPLES = 20000  # default sample count; a few seconds with the full model
+UNCERTAINTY_WORKERS = os.cpu_count() or 1  # chunks are solved on every core
+# Metrics table: output, nominal value and the sampled spread
+UNCERTAINTY_COLUMNS = (("output", "출력"), ("value", "공칭값"), ("mean", "평균"), ("std", "표준편차"),
+                       ("low", f"{uncertainty.CONFIDENCE:.0%} 하한"), ("high", f"{uncertainty.CONFIDENCE:.0%} 상한"))
+
+COMPARE_COLUMNS = (
+    ("name", "스냅샷", "{}"), ("freq", "주파수 (Hz)", "{:.1f}"), ("eev", "EEV (%)", "{:.1f}"),
+    ("fan", "팬 (RPM)", "{:.0f}"), ("P_evap", "증발압력 (kPa)", "{:.1f}"), ("P_cond", "응축압력 (kPa)", "{:.1f}"),
+    ("cooling_effect", "냉방효과 (kJ/kg)", "{:.1f}"), ("compressor_work", "압축기 일 (kJ/kg)", "{:.1f}"),
+    ("eer", "EER", "{:.2f}"),
+)
+
+
+class LiveSolveWorker:
+    # Background solver that only ever works on the newest request: requests
+    # superseded while a solve is running are dropped, and results are handed
+    # back through a queue because Tk may only be touched from the main thread.
+    def __init__(self, solve):
+        self._solve = solve
+        self._cond = threading.Condition()
+        self._request = None
+        self._results = queue.Queue()
+        self.generation = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, *args):
+        with self._cond:
+            self.generation += 1
+            self._request = (self.generation, args)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None:
+                    self._cond.wait()
+                generation, args = self._request
+                self._request = None
+            try:
+                result = self._solve(*args)
+            except ValueError:
+                continue  # CoolProp could not solve this slider position
+            self._results.put((generation, args, result))
+
+    def poll(self):
+        # Newest finished result, or None
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                return latest
+
 
 class RefrigerationCycleSimulator:
     def __init__(self, root):
         self.root = root
         self.root.title("에어컨 냉동사이클 시뮬레이터")
-        self.snapshots = {}
+        self.store = snapshot_store.get_store()
+        self.snap_ids = []
+        self.snap_total = 0
         self.current_cycle = None
+        self.current_settings = None
+        self.refrigerant = cycle_model.REFRIGERANT
+        self.profiler = profiling.Profiler()
+        self.live_worker = None
+        self._debounce_id = None
+        self._poll_id = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -23,7 +105,8 @@ class RefrigerationCycleSimulator:
 
         ttk.Label(input_frame, text="압축기 주파수 (Hz):").grid(row=0, column=0, sticky="w")
         self.comp_freq = ttk.Scale(input_frame, from_=30, to=120, orient=tk.HORIZONTAL,
-                                   command=lambda v: self.freq_label.config(text=f"{float(v):.1f} Hz"))
+                                   command=lambda v: self.on_slider_change(self.comp_freq, result_cache.FREQ_STEP,
+                                                                           self.freq_label, "{:.1f} Hz"))
         self.comp_freq.set(60)
         self.comp_freq.grid(row=0, column=1, sticky="ew")
         self.freq_label = ttk.Label(input_frame, text="60.0 Hz")
@@ -31,7 +114,8 @@ class RefrigerationCycleSimulator:
 
         ttk.Label(input_frame, text="EEV 개도 (%):").grid(row=1, column=0, sticky="w")
         self.eev_opening = ttk.Scale(input_frame, from_=0, to=100, orient=tk.HORIZONTAL,
-                                     command=lambda v: self.eev_label.config(text=f"{float(v):.1f} %"))
+                                     command=lambda v: self.on_slider_change(self.eev_opening, result_cache.EEV_STEP,
+                                                                             self.eev_label, "{:.1f} %"))
         self.eev_opening.set(50)
         self.eev_opening.grid(row=1, column=1, sticky="ew")
         self.eev_label = ttk.Label(input_frame, text="50.0 %")
@@ -39,13 +123,27 @@ class RefrigerationCycleSimulator:
 
         ttk.Label(input_frame, text="실외팬 RPM:").grid(row=2, column=0, sticky="w")
         self.fan_rpm = ttk.Scale(input_frame, from_=0, to=1500, orient=tk.HORIZONTAL,
-                                 command=lambda v: self.fan_label.config(text=f"{int(float(v))} RPM"))
+                                 command=lambda v: self.on_slider_change(self.fan_rpm, result_cache.FAN_STEP,
+                                                                         self.fan_label, "{:.0f} RPM"))
         self.fan_rpm.set(750)
         self.fan_rpm.grid(row=2, column=1, sticky="ew")
         self.fan_label = ttk.Label(input_frame, text="750 RPM")
         self.fan_label.grid(row=2, column=2)
 
-        ttk.Button(input_frame, text="계산 및 플롯", command=self.calculate_cycle).grid(row=3, columnspan=3, pady=10)
+        ttk.Button(input_frame, text="계산 및 플롯", command=self.calculate_cycle).grid(row=3, column=0, columnspan=2, pady=10)
+        self.live_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text="실시간", variable=self.live_mode,
+                        command=self.toggle_live_mode).grid(row=3, column=2, pady=10)
+
+        ttk.Label(input_frame, text="냉매:").grid(row=4, column=0, sticky="w")
+        self.refrigerant_var = tk.StringVar(value=self.refrigerant)
+        refrigerant_box = ttk.Combobox(input_frame, textvariable=self.refrigerant_var, state="readonly",
+                                       values=cycle_model.REFRIGERANTS, width=10)
+        refrigerant_box.grid(row=4, column=1, sticky="w")
+        refrigerant_box.bind("<<ComboboxSelected>>", self.on_refrigerant_change)
+        ttk.Button(input_frame, text="최적화...", command=self.open_optimizer).grid(row=4, column=2, pady=5)
+        ttk.Button(input_frame, text="민감도...", command=self.open_sensitivity).grid(row=5, column=2, pady=5)
+        ttk.Button(input_frame, text="불확도...", command=self.open_uncertainty).grid(row=6, column=2, pady=5)
 
         # Table frame
         table_frame = ttk.LabelFrame(self.root, text="상태점 테이블 및 성능")
@@ -66,15 +164,37 @@ class RefrigerationCycleSimulator:
         self.work_label.pack(side="left", padx=10)
         self.eer_label = ttk.Label(perf_frame, text="EER: --")
         self.eer_label.pack(side="left", padx=10)
+        detail_frame = ttk.Frame(table_frame)
+        detail_frame.pack(fill="x", pady=(0, 5))
+        self.discharge_label = ttk.Label(detail_frame, text="토출 온도: -- °C")
+        self.discharge_label.pack(side="left", padx=10)
+        self.quality_label = ttk.Label(detail_frame, text="4점 건도: --")
+        self.quality_label.pack(side="left", padx=10)
+        self.ratio_label = ttk.Label(detail_frame, text="압축비: --")
+        self.ratio_label.pack(side="left", padx=10)
 
         # Plot frame
         plot_frame = ttk.LabelFrame(self.root, text="P-H 선도")
         plot_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=10, sticky="nsew")
 
-        self.fig = plt.Figure(figsize=(6, 5))
+        # Set font for Korean - try different approaches
+        try:
+            matplotlib.rcParams['font.family'] = 'Malgun Gothic'  # Windows Korean font
+        except:
+            try:
+                matplotlib.rcParams['font.family'] = ['DejaVu Sans', 'NanumGothic', 'sans-serif']
+            except:
+                matplotlib.rcParams['font.family'] = 'sans-serif'
+
+        # Ensure UTF-8 encoding for Korean text
+        matplotlib.rcParams['axes.unicode_minus'] = False
+
+        self.fig = Figure(figsize=(6, 5))
         self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # Dome and axes are drawn once; the cycle is updated in place and blitted
+        self.diagram = ph_diagram.PhDiagram(self.ax, ph_diagram.LABELS_KO)
 
         # Snapshot frame
         snap_frame = ttk.LabelFrame(self.root, text="스냅샷 관리")
@@ -83,162 +203,344 @@ class RefrigerationCycleSimulator:
         ttk.Button(snap_frame, text="스냅샷 저장", command=self.save_snapshot).grid(row=0, column=0, padx=5)
         ttk.Button(snap_frame, text="스냅샷 불러오기", command=self.load_snapshot).grid(row=0, column=1, padx=5)
         ttk.Button(snap_frame, text="스냅샷 삭제", command=self.delete_snapshot).grid(row=0, column=2, padx=5)
+        ttk.Button(snap_frame, text="비교", command=self.compare_snapshots).grid(row=0, column=3, padx=5)
 
-        self.snap_list = tk.Listbox(snap_frame, height=5)
-        self.snap_list.grid(row=1, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+        # Extended selection (Shift/Ctrl-click) picks the snapshots to compare
+        self.snap_list = tk.Listbox(snap_frame, height=5, selectmode=tk.EXTENDED, yscrollcommand=self.on_snap_scroll)
+        self.snap_list.grid(row=1, column=0, columnspan=4, sticky="ew", padx=5, pady=5)
         self.snap_list.bind("<<ListboxSelect>>", self.on_snapshot_select)
+        self.snap_scroll = ttk.Scrollbar(snap_frame, orient=tk.VERTICAL, command=self.snap_list.yview)
+        self.snap_scroll.grid(row=1, column=4, sticky="ns", pady=5)
+        snap_frame.grid_columnconfigure(2, weight=1)
+        self.update_snap_list()
+
+        # Status bar with optional profiling
+        status_frame = ttk.Frame(self.root)
+        status_frame.grid(row=3, column=0, columnspan=2, padx=10, pady=(0, 5), sticky="ew")
+        self.profiling_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(status_frame, text="프로파일링", variable=self.profiling_enabled).pack(side="left")
+        ttk.Button(status_frame, text="JSON 내보내기", command=self.export_profile).pack(side="left", padx=5)
+        self.status_label = ttk.Label(status_frame, text="", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True, padx=5)
 
         self.root.grid_columnconfigure(1, weight=1)
         self.root.grid_rowconfigure(1, weight=1)
 
-    def calculate_cycle(self):
-        freq = self.comp_freq.get()
-        eev = self.eev_opening.get()
-        fan = self.fan_rpm.get()
-
-        # Simplified model
-        # Base values for R32 at typical conditions
-        refrigerant = 'R32'
+    def slider_settings(self):
+        # The sliders snap to the cache grid, so these are the settings actually solved
+        return result_cache.snap(self.comp_freq.get(), self.eev_opening.get(), self.fan_rpm.get())
 
-        # Evaporation temperature based on EEV: base 5°C, increases with opening
-        T_evap_base = 5  # °C
-        T_evap = T_evap_base + (eev / 100) * 10  # Increase by 10°C at max opening
-
-        # Condensation temperature based on fan RPM and compressor freq:
-        # Base 50°C, decreases with fan RPM, increases with compressor freq (more heat load)
-        T_cond_base = 50  # °C
-        T_cond = T_cond_base - (fan / 1500) * 15 + (freq - 60) / 60 * 10  # Adjust for freq
-
-        # Suction superheat: base 10°C, decreases with opening
-        SH = 10 - (eev / 100) * 8  # Decrease by 8°C at max opening
-
-        # Compression ratio and discharge temp increase with freq
-        ratio_mult = freq / 60
-        discharge_temp_raise = (freq - 60) * 0.1  # 0.1°C per Hz over 60
-
-        P_evap = CP.PropsSI('P', 'T', T_evap + 273.15, 'Q', 1, refrigerant) / 1000  # kPa
-        P_cond = CP.PropsSI('P', 'T', T_cond + 273.15, 'Q', 0, refrigerant) / 1000  # kPa
-
-        T_suction = T_evap + SH
-        h1 = CP.PropsSI('H', 'T', T_suction + 273.15, 'P', P_evap * 1000, refrigerant) / 1000  # kJ/kg
-
-        # Isentropic compression
-        s1 = CP.PropsSI('S', 'T', T_suction + 273.15, 'P', P_evap * 1000, refrigerant) / 1000  # kJ/kg/K
-        P2 = P_cond * 1000
-        T2s = CP.PropsSI('T', 'P', P2, 'S', s1 * 1000, refrigerant) - 273.15 + discharge_temp_raise
-        h2s = CP.PropsSI('H', 'T', T2s + 273.15, 'P', P2, refrigerant) / 1000
-
-        # Assume some efficiency, but for simplicity use isentropic
-        h2 = h2s
-
-        # Condenser outlet: saturated liquid
-        T3 = T_cond
-        h3 = CP.PropsSI('H', 'T', T3 + 273.15, 'Q', 0, refrigerant) / 1000
-
-        # Expander: isenthalpic
-        h4 = h3
-        T4 = CP.PropsSI('T', 'H', h4 * 1000, 'P', P_evap * 1000, refrigerant) - 273.15
+    def calculate_cycle(self):
+        freq, eev, fan = self.slider_settings()
+
+        with self.profile_scope():
+            with profiling.stage('solve'):
+                points = result_cache.solve_point(freq, eev, fan, self.refrigerant)
+
+            self.current_cycle = points
+            self.current_settings = (freq, eev, fan)
+            self.update_table(points)
+            self.plot_cycle(points)
+        self.update_status()
+
+    def profile_scope(self):
+        if not self.profiling_enabled.get():
+            return nullcontext()
+        self.profiler.reset()
+        return profiling.profile(self.profiler)
+
+    def update_status(self):
+        if self.profiling_enabled.get():
+            self.status_label.config(text=self.profiler.summary())
+
+    def export_profile(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.profiler.to_json())
+
+    def open_optimizer(self):
+        window = tk.Toplevel(self.root)
+        window.title("최적화")
+
+        ttk.Label(window, text="목표:").grid(row=0, column=0, sticky="w", padx=5)
+        objective = tk.StringVar(value=list(OPTIMIZER_OBJECTIVES)[0])
+        ttk.Combobox(window, textvariable=objective, state="readonly", values=list(OPTIMIZER_OBJECTIVES),
+                     width=14).grid(row=0, column=1, columnspan=2, sticky="w", pady=2)
+        ttk.Label(window, text="목표 냉방효과 (kJ/kg):").grid(row=1, column=0, sticky="w", padx=5)
+        target = tk.DoubleVar(value=230.0)
+        ttk.Entry(window, textvariable=target, width=8).grid(row=1, column=1, sticky="w", pady=2)
+        limit_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(window, text="최대 토출 온도 (°C):", variable=limit_enabled).grid(row=2, column=0, sticky="w", padx=5)
+        limit = tk.DoubleVar(value=90.0)
+        ttk.Entry(window, textvariable=limit, width=8).grid(row=2, column=1, sticky="w", pady=2)
+
+        bounds = []
+        for row, (text, (low, high)) in enumerate(zip(("주파수 범위 (Hz):", "EEV 범위 (%):", "팬 범위 (RPM):"),
+                                                      optimizer.DEFAULT_BOUNDS), start=3):
+            ttk.Label(window, text=text).grid(row=row, column=0, sticky="w", padx=5)
+            low_var, high_var = tk.DoubleVar(value=low), tk.DoubleVar(value=high)
+            ttk.Entry(window, textvariable=low_var, width=8).grid(row=row, column=1, sticky="w", pady=2)
+            ttk.Entry(window, textvariable=high_var, width=8).grid(row=row, column=2, sticky="w", pady=2, padx=(0, 5))
+            bounds.append((low_var, high_var))
+
+        result_label = ttk.Label(window, text="", justify="left")
+        result_label.grid(row=7, column=0, columnspan=3, sticky="w", padx=5, pady=5)
+
+        def run():
+            try:
+                kwargs = {
+                    "target": target.get(),
+                    "max_discharge_temp": limit.get() if limit_enabled.get() else None,
+                    "bounds": [(low_var.get(), high_var.get()) for low_var, high_var in bounds],
+                }
+            except tk.TclError:
+                messagebox.showerror("오류", "숫자를 입력하세요.", parent=window)
+                return
+            # Warm start from the current slider position
+            start = self.slider_settings()
+            result = optimizer.optimize(OPTIMIZER_OBJECTIVES[objective.get()], start=start,
+                                        refrigerant=self.refrigerant, **kwargs)
+            if result is None:
+                result_label.config(text="조건을 만족하는 설정이 없습니다")
+                return
+            self.apply_optimum(result)
+            settings, metrics = result["settings"], result["metrics"]
+            result_label.config(text=(
+                f"최적 설정: {settings['freq']:.1f} Hz, EEV {settings['eev']:.1f} %, 팬 {int(settings['fan'])} RPM\n"
+                f"EER {metrics['eer']:.2f}, 냉방효과 {metrics['cooling_effect']:.1f} kJ/kg, "
+                f"토출 온도 {metrics['discharge_temp']:.1f} °C\n"
+                f"평가 {result['evaluations']}회, 반복 {result['iterations']}회, {result['elapsed_s'] * 1000:.1f} ms"))
+
+        ttk.Button(window, text="최적화 실행", command=run).grid(row=8, column=0, columnspan=3, pady=5)
+
+    def open_sensitivity(self):
+        freq, eev, fan = self.slider_settings()
+        with self.profile_scope(), profiling.stage('sensitivity'):
+            # Jacobian and tornado swings at the current sliders, each one batched solve
+            result = sensitivity.analyze(freq, eev, fan, refrigerant=self.refrigerant)
+        self.update_status()
+
+        window = tk.Toplevel(self.root)
+        window.title(f"민감도 분석 ({self.refrigerant}, {freq:.1f} Hz, EEV {eev:.1f} %, 팬 {int(fan)} RPM)")
+        names = ph_diagram.LABELS_KO['outputs']
+
+        tree = ttk.Treeview(window, columns=[key for key, _ in SENSITIVITY_COLUMNS], show="headings",
+                            height=len(sensitivity.OUTPUTS))
+        for key, heading in SENSITIVITY_COLUMNS:
+            tree.heading(key, text=heading)
+            tree.column(key, width=150 if key == "output" else 100, anchor="w" if key == "output" else "e")
+        for key, row in result["jacobian"].items():
+            tree.insert("", "end", values=[names[key], f"{result['base'][key]:.4g}"]
+                        + [f"{row[control]:.4g}" for control in sensitivity.CONTROLS])
+        tree.pack(fill="x", padx=5, pady=5)
+
+        outputs = {names[key]: key for key in sensitivity.OUTPUTS}
+        output = tk.StringVar(value=names["eer"])
+        chooser = ttk.Combobox(window, textvariable=output, state="readonly", values=list(outputs), width=20)
+        chooser.pack(anchor="w", padx=5)
+
+        fig = Figure(figsize=(6, 3))
+        canvas = FigureCanvasTkAgg(fig, master=window)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+
+        def draw_tornado(event=None):
+            fig.clear()
+            key = outputs[output.get()]
+            ph_diagram.draw_tornado(fig, result["swings"][key], key, ph_diagram.LABELS_KO)
+            canvas.draw()
+
+        chooser.bind("<<ComboboxSelected>>", draw_tornado)
+        draw_tornado()
+        ttk.Label(window, text=f"각 제어값을 범위의 ±{sensitivity.SWING_FRACTION:.0%}만큼 따로 움직였을 때의 변화, "
+                               f"평가 {result['evaluations']}회").pack(anchor="w", padx=5, pady=(0, 5))
+
+    def open_uncertainty(self):
+        window = tk.Toplevel(self.root)
+        window.title("불확도 분석")
+
+        tolerance = []
+        for row, (text, value) in enumerate(zip(("주파수 허용오차 (Hz):", "EEV 허용오차 (%):", "팬 허용오차 (RPM):"),
+                                                uncertainty.DEFAULT_TOLERANCE)):
+            ttk.Label(window, text=text).grid(row=row, column=0, sticky="w", padx=5)
+            var = tk.DoubleVar(value=value)
+            ttk.Entry(window, textvariable=var, width=8).grid(row=row, column=1, sticky="w", pady=2)
+            tolerance.append(var)
+        ttk.Label(window, text="분포:").grid(row=3, column=0, sticky="w", padx=5)
+        distribution = tk.StringVar(value=list(UNCERTAINTY_DISTRIBUTIONS)[0])
+        ttk.Combobox(window, textvariable=distribution, state="readonly", values=list(UNCERTAINTY_DISTRIBUTIONS),
+                     width=22).grid(row=3, column=1, sticky="w", pady=2)
+        ttk.Label(window, text="샘플 수:").grid(row=4, column=0, sticky="w", padx=5)
+        samples = tk.IntVar(value=UNCERTAINTY_SAMPLES)
+        ttk.Entry(window, textvariable=samples, width=10).grid(row=4, column=1, sticky="w", pady=2)
+
+        names = ph_diagram.LABELS_KO['outputs']
+        tree = ttk.Treeview(window, columns=[key for key, _ in UNCERTAINTY_COLUMNS], show="headings",
+                            height=len(uncertainty.METRICS))
+        for key, heading in UNCERTAINTY_COLUMNS:
+            tree.heading(key, text=heading)
+            tree.column(key, width=150 if key == "output" else 90, anchor="w" if key == "output" else "e")
+        tree.grid(row=6, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+
+        fig = Figure(figsize=(6, 5))
+        canvas = FigureCanvasTkAgg(fig, master=window)
+        canvas.get_tk_widget().grid(row=7, column=0, columnspan=2, sticky="nsew")
+        info_label = ttk.Label(window, text="")
+        info_label.grid(row=8, column=0, columnspan=2, sticky="w", padx=5, pady=(0, 5))
+
+        def run():
+            try:
+                values = [var.get() for var in tolerance]
+                n = samples.get()
+            except tk.TclError:
+                messagebox.showerror("오류", "숫자를 입력하세요.", parent=window)
+                return
+            if n < 1 or min(values) < 0:
+                messagebox.showerror("오류", "허용오차는 0 이상, 샘플 수는 1 이상이어야 합니다.", parent=window)
+                return
+            freq, eev, fan = self.slider_settings()
+            with self.profile_scope(), profiling.stage('uncertainty'):
+                # Sampled and solved in chunks on worker processes; only the running statistics are
+                # kept. Spawned, not forked: the Tk process runs the live-solve thread
+                result = uncertainty.propagate(freq, eev, fan, values, UNCERTAINTY_DISTRIBUTIONS[distribution.get()],
+                                               n, refrigerant=self.refrigerant, workers=UNCERTAINTY_WORKERS,
+                                               mp_context=multiprocessing.get_context('spawn'))
+            self.update_status()
+
+            tree.delete(*tree.get_children())
+            stats = result["stats"]
+            for key in uncertainty.METRICS:
+                tree.insert("", "end", values=[names[key], f"{result['values'][key]:.5g}"]
+                            + [f"{stats[key][column]:.5g}" for column in ("mean", "std", "low", "high")])
+            fig.clear()
+            ph_diagram.draw_uncertainty(fig, result, ph_diagram.LABELS_KO, self.refrigerant)
+            canvas.draw()
+            info_label.config(text=f"{self.refrigerant}, {freq:.1f} Hz, EEV {eev:.1f} %, 팬 {int(fan)} RPM 기준, "
+                                   f"샘플 {result['samples']}개 ({result['elapsed_s']:.1f} s)")
+
+        ttk.Button(window, text="불확도 계산", command=run).grid(row=5, column=0, columnspan=2, pady=5)
+
+    def set_sliders(self, freq, eev, fan):
+        # Sliders and labels only take cache grid positions (0.1 Hz / 0.1 % / 10 RPM)
+        freq, eev, fan = result_cache.snap(freq, eev, fan)
+        self.comp_freq.set(freq)
+        self.eev_opening.set(eev)
+        self.fan_rpm.set(fan)
+        self.freq_label.config(text=f"{freq:.1f} Hz")
+        self.eev_label.config(text=f"{eev:.1f} %")
+        self.fan_label.config(text=f"{fan:.0f} RPM")
+
+    def apply_optimum(self, result):
+        # The sliders only take grid positions: show the optimum's nearest one, solved like any other
+        settings = result["settings"]
+        self.current_settings = result_cache.snap(settings["freq"], settings["eev"], settings["fan"])
+        self.set_sliders(*self.current_settings)
+        self.current_cycle = result_cache.solve_point(*self.current_settings, self.refrigerant)
+        with self.profile_scope():
+            self.update_table(self.current_cycle)
+            self.plot_cycle(self.current_cycle)
+        self.update_status()
 
-        points = {
-            1: {"P": P_evap, "h": h1},
-            2: {"P": P_cond, "h": h2},
-            3: {"P": P_cond, "h": h3},
-            4: {"P": P_evap, "h": h4}
-        }
+    def on_refrigerant_change(self, event=None):
+        refrigerant = self.refrigerant_var.get()
+        if refrigerant == self.refrigerant:
+            return
+        self.refrigerant = refrigerant
 
-        self.current_cycle = points
-        self.update_table(points)
-        self.plot_cycle(points)
+        # New dome for the selected fluid; the old cycle and snapshot list belong to the previous one
+        self.diagram.disconnect()
+        self.ax.clear()
+        self.diagram = ph_diagram.PhDiagram(self.ax, ph_diagram.LABELS_KO, refrigerant)
+        self.canvas.draw()
+        self.current_cycle = None
+        for i in self.tree.get_children():
+            self.tree.delete(i)
+        self.cool_eff_label.config(text="냉방효과: -- kJ/kg")
+        self.work_label.config(text="압축기 일: -- kJ/kg")
+        self.eer_label.config(text="EER: --")
+        self.discharge_label.config(text="토출 온도: -- °C")
+        self.quality_label.config(text="4점 건도: --")
+        self.ratio_label.config(text="압축비: --")
+        self.update_snap_list()
+        if self.live_mode.get():
+            self.request_live_solve()
 
     def update_table(self, points):
+        with profiling.stage('table'):
+            self._update_table(points)
+
+    def _update_table(self, points):
         for i in self.tree.get_children():
             self.tree.delete(i)
         for point, props in points.items():
             self.tree.insert("", "end", values=(point, f"{props['P']:.1f}", f"{props['h']:.1f}"))
 
-        # Calculate performance
-        cooling_effect = points[1]['h'] - points[4]['h']
-        compressor_work = points[2]['h'] - points[1]['h']
-        eer = cooling_effect / compressor_work if compressor_work != 0 else 0
+        cooling_effect, compressor_work, eer = cycle_model.cycle_performance(points)
 
         self.cool_eff_label.config(text=f"냉방효과: {cooling_effect:.1f} kJ/kg")
         self.work_label.config(text=f"압축기 일: {compressor_work:.1f} kJ/kg")
         self.eer_label.config(text=f"EER: {eer:.2f}")
 
-    def plot_cycle(self, points):
-        self.ax.clear()
-
-        # Set font for Korean - try different approaches
-        try:
-            plt.rcParams['font.family'] = 'Malgun Gothic'  # Windows Korean font
-        except:
-            try:
-                plt.rcParams['font.family'] = ['DejaVu Sans', 'NanumGothic', 'sans-serif']
-            except:
-                plt.rcParams['font.family'] = 'sans-serif'
+        summary = cycle_model.cycle_summary(points)
+        discharge_temp, quality_4 = summary['discharge_temp'], summary['quality_4']
+        self.discharge_label.config(text="토출 온도: -- °C" if discharge_temp is None else f"토출 온도: {discharge_temp:.1f} °C")
+        self.quality_label.config(text="4점 건도: --" if quality_4 is None else f"4점 건도: {quality_4:.3f}")
+        self.ratio_label.config(text=f"압축비: {summary['pressure_ratio']:.2f}")
 
-        # Ensure UTF-8 encoding for Korean text
-        plt.rcParams['axes.unicode_minus'] = False
-
-        # Get saturation curve (fixed range)
-        refrigerant = 'R32'
-        T_crit = CP.PropsSI('Tcrit', refrigerant) - 273.15
-        h_sat_liq = []
-        h_sat_vap = []
-        P_min = 200  # kPa, fixed low pressure
-        P_max = 3500  # kPa, fixed high pressure (increased)
-        P_range = np.linspace(P_min, P_max, 200)
-
-        for P in P_range:
-            h_l = CP.PropsSI('H', 'P', P * 1000, 'Q', 0, refrigerant) / 1000
-            h_v = CP.PropsSI('H', 'P', P * 1000, 'Q', 1, refrigerant) / 1000
-            h_sat_liq.append(h_l)
-            h_sat_vap.append(h_v)
-
-        self.ax.plot(h_sat_vap, P_range, 'b-', label='포화 증기', alpha=0.7)
-        self.ax.plot(h_sat_liq, P_range, 'b-', label='포화 액체', alpha=0.7)
-
-        # Plot cycle (closed loop)
-        cycle_h = [points[1]['h'], points[2]['h'], points[3]['h'], points[4]['h'], points[1]['h']]
-        cycle_p = [points[1]['P'], points[2]['P'], points[3]['P'], points[4]['P'], points[1]['P']]
-
-        self.ax.plot(cycle_h, cycle_p, 'r-o', label='냉동사이클', linewidth=2)
-
-        # Annotate points
-        for i in range(1, 5):
-            h, p = points[i]['h'], points[i]['P']
-            self.ax.annotate(f'{i}', (h, p), xytext=(5, 5), textcoords='offset points', fontsize=10, fontweight='bold')
-
-        self.ax.set_xlabel('엔탈피 (kJ/kg)')
-        self.ax.set_ylabel('압력 (kPa)')
-        self.ax.set_title('냉매 R32 냉동사이클 P-H 선도')
-        self.ax.legend()
-        self.ax.grid(True)
-        # Set fixed axis limits (increased upper limits)
-        self.ax.set_xlim(min(h_sat_liq) - 50, 800)  # h up to 800
-        self.ax.set_ylim(P_min, P_max)  # P up to 3500
-        self.canvas.draw()
+    def plot_cycle(self, points):
+        with profiling.stage('draw'):
+            self.diagram.set_cycle(points)
+            self.diagram.blit()
+
+    def on_slider_change(self, scale, step, label, fmt):
+        value = round(round(scale.get() / step) * step, 6)
+        if value != scale.get():
+            scale.set(value)
+        label.config(text=fmt.format(value))
+        if not self.live_mode.get():
+            return
+        # Debounce: only the last move within LIVE_DEBOUNCE_MS triggers a solve
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(LIVE_DEBOUNCE_MS, self.request_live_solve)
+
+    def toggle_live_mode(self):
+        if self.live_mode.get():
+            if self.live_worker is None:
+                self.live_worker = LiveSolveWorker(result_cache.solve_point)
+            self._poll_id = self.root.after(LIVE_POLL_MS, self.poll_live_results)
+            self.request_live_solve()
+        elif self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def request_live_solve(self):
+        self._debounce_id = None
+        self.live_worker.submit(*self.slider_settings(), self.refrigerant)
+
+    def poll_live_results(self):
+        latest = self.live_worker.poll()
+        if latest is not None:
+            generation, args, points = latest
+            # Drop a solve for the previous fluid that finished after a switch
+            if args[3] == self.refrigerant:
+                self.current_cycle = points
+                self.current_settings = args[:3]
+                self.update_table(points)
+                self.plot_cycle(points)
+        if self.live_mode.get():
+            self._poll_id = self.root.after(LIVE_POLL_MS, self.poll_live_results)
 
     def save_snapshot(self):
         if not self.current_cycle:
             messagebox.showerror("오류", "먼저 계산을 수행하세요.")
             return
 
-        freq = self.comp_freq.get()
-        eev = self.eev_opening.get()
-        fan = self.fan_rpm.get()
-        name = f"압축_{freq:.1f}Hz_EEV_{eev:.1f}%_팬_{int(fan)}RPM"
-
-        if name in self.snapshots:
+        # The settings the shown cycle was solved at, not the raw slider positions
+        freq, eev, fan = self.current_settings
+        if self.store.add(freq, eev, fan, self.current_cycle, self.refrigerant) is None:
             messagebox.showinfo("알림", "이 설정의 스냅샷이 이미 존재합니다.")
             return
-
-        self.snapshots[name] = {
-            "comp_freq": freq,
-            "eev_opening": eev,
-            "fan_rpm": fan,
-            "cycle": self.current_cycle
-        }
         self.update_snap_list()
 
     def load_snapshot(self):
@@ -247,18 +549,18 @@ class RefrigerationCycleSimulator:
             messagebox.showerror("오류", "스냅샷을 선택하세요.")
             return
 
-        name = self.snap_list.get(sel[0])
-        if name in self.snapshots:
-            data = self.snapshots[name]
-            self.comp_freq.set(data["comp_freq"])
-            self.eev_opening.set(data["eev_opening"])
-            self.fan_rpm.set(data["fan_rpm"])
-            self.freq_label.config(text=f"{data['comp_freq']:.1f} Hz")
-            self.eev_label.config(text=f"{data['eev_opening']:.1f} %")
-            self.fan_label.config(text=f"{int(data['fan_rpm'])} RPM")
+        data = self.store.get(self.snap_ids[sel[0]])
+        if data:
+            settings = data["settings"]
+            self.current_settings = (settings["freq"], settings["eev"], settings["fan"])
+            # The sliders snap to the nearest grid position; older snapshots may hold
+            # settings off the grid, and current_settings keeps them as stored with their cycle
+            self.set_sliders(*self.current_settings)
             self.current_cycle = data["cycle"]
-            self.update_table(self.current_cycle)
-            self.plot_cycle(self.current_cycle)
+            with self.profile_scope():
+                self.update_table(self.current_cycle)
+                self.plot_cycle(self.current_cycle)
+            self.update_status()
 
     def delete_snapshot(self):
         sel = self.snap_list.curselection()
@@ -266,16 +568,55 @@ class RefrigerationCycleSimulator:
             messagebox.showerror("오류", "삭제할 스냅샷을 선택하세요.")
             return
 
-        name = self.snap_list.get(sel[0])
-        if name in self.snapshots:
-            del self.snapshots[name]
-            self.update_snap_list()
+        self.store.delete(self.snap_ids[sel[0]])
+        self.update_snap_list()
+
+    def compare_snapshots(self):
+        sel = self.snap_list.curselection()
+        if len(sel) < 2:
+            messagebox.showerror("오류", "비교할 스냅샷을 두 개 이상 선택하세요.")
+            return
+
+        snapshots = self.store.get_many(self.snap_ids[i] for i in sel)
+        window = tk.Toplevel(self.root)
+        window.title(f"스냅샷 비교 ({len(snapshots)}개)")
+
+        with self.profile_scope():
+            with profiling.stage('draw'):
+                fig = Figure(figsize=(7, 5))
+                canvas = FigureCanvasTkAgg(fig, master=window)
+                # All cycles in one batched overlay on the shared dome, coloured by EER
+                ph_diagram.draw_comparison(fig, snapshots, ph_diagram.LABELS_KO, self.refrigerant)
+                canvas.get_tk_widget().pack(fill="both", expand=True)
+                canvas.draw()
+
+            with profiling.stage('table'):
+                tree = ttk.Treeview(window, columns=[key for key, _, _ in COMPARE_COLUMNS], show="headings", height=8)
+                for key, heading, _ in COMPARE_COLUMNS:
+                    tree.heading(key, text=heading)
+                    tree.column(key, width=200 if key == "name" else 90, anchor="w" if key == "name" else "e")
+                for row in snapshot_store.comparison_rows(snapshots):
+                    tree.insert("", "end", values=[fmt.format(row[key]) for key, _, fmt in COMPARE_COLUMNS])
+                tree.pack(fill="both", expand=True, padx=5, pady=5)
+        self.update_status()
 
     def update_snap_list(self):
         self.snap_list.delete(0, tk.END)
-        for name in self.snapshots:
+        self.snap_ids = []
+        self.snap_total = self.store.count({"refrigerant": self.refrigerant})
+        self.load_more_snapshots()
+
+    def load_more_snapshots(self):
+        for snapshot_id, name in self.store.page(len(self.snap_ids), SNAPSHOT_PAGE_SIZE, {"refrigerant": self.refrigerant}):
+            self.snap_ids.append(snapshot_id)
             self.snap_list.insert(tk.END, name)
 
+    def on_snap_scroll(self, first, last):
+        self.snap_scroll.set(first, last)
+        # Fetch the next page once the end of the loaded names scrolls into view
+        if float(last) >= 1.0 and len(self.snap_ids) < self.snap_total:
+            self.root.after_idle(self.load_more_snapshots)
+
     def on_snapshot_select(self, event):
         # Can be used to preview or something, but not needed
         pass
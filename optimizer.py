@@ -0,0 +1,118 @@
+import time
+import numpy as np
+import cycle_model
+import result_cache
+
+# Inverse mode: search the control space for the settings that best meet an
+# objective. Every iteration solves a small grid around the current best
+# point as one batch and shrinks the box around the winner, so the search
+# needs a few hundred cycle evaluations per digit of resolution. The search
+# runs on the interpolation tables for fluids they are validated for
+# (cycle_model.VALIDATED_BACKENDS), on the exact backend otherwise, and the
+# winner is re-solved on the exact backend at slider resolution.
+#
+#   result = optimize('eer', max_discharge_temp=85)
+#   result = optimize('cooling_effect', target=230, start=(60, 50, 750))
+
+OBJECTIVES = ('eer', 'cooling_effect')
+SEARCH_BACKEND = 'BICUBIC&HEOS'
+GRID_POINTS = 5  # per axis and iteration
+MAX_ITERATIONS = 30
+
+# Search stops once the box is down to the slider resolution
+STEPS = (result_cache.FREQ_STEP, result_cache.EEV_STEP, result_cache.FAN_STEP)
+DEFAULT_BOUNDS = (cycle_model.FREQ_RANGE, cycle_model.EEV_RANGE, cycle_model.FAN_RANGE)
+
+
+def score(results, objective, target=None, max_discharge_temp=None):
+    # Higher is better; infeasible or failed points score -inf
+    if objective == 'eer':
+        values = results['eer']
+    elif objective == 'cooling_effect':
+        if target is None:
+            raise ValueError("The cooling_effect objective needs a target")
+        values = -np.abs(results['cooling_effect'] - target)
+    else:
+        raise ValueError(f"Unknown objective: {objective}")
+    values = np.where(np.isfinite(values), values, -np.inf)
+    if max_discharge_temp is not None:
+        values = np.where(results['discharge_temp'] <= max_discharge_temp, values, -np.inf)
+    return values
+
+
+def _snap(value, step, low, high):
+    # Nearest slider position inside the bounds
+    value = round(round(value / step) * step, 6)
+    return min(max(value, low), high)
+
+
+def optimize(objective='eer', target=None, max_discharge_temp=None, bounds=DEFAULT_BOUNDS, start=None,
+             refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND,
+             search_backend=SEARCH_BACKEND):
+    started = time.perf_counter()
+    low = np.array([bound[0] for bound in bounds], dtype=float)
+    high = np.array([bound[1] for bound in bounds], dtype=float)
+    steps = np.array(STEPS)
+
+    # Warm start: begin with a quarter-size box around the previous optimum
+    # (or the current slider position) instead of the whole control space
+    if start is not None:
+        center = np.clip(np.asarray(start, dtype=float), low, high)
+        half = (high - low) / 8
+    else:
+        center = (low + high) / 2
+        half = (high - low) / 2
+
+    evaluations = 0
+    best_settings, best_score = None, -np.inf
+    offsets = np.linspace(-1, 1, GRID_POINTS)
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        axes = [np.unique(np.clip(c + h * offsets, lo, hi)) for c, h, lo, hi in zip(center, half, low, high)]
+        grid = np.meshgrid(*axes, indexing='ij')
+        results = cycle_model.solve_batch(*grid, refrigerant=refrigerant,
+                                          backend=cycle_model.validated_backend(refrigerant, search_backend))
+        scores = score(results, objective, target, max_discharge_temp).ravel()
+        evaluations += scores.size
+
+        index = int(np.argmax(scores))
+        if scores[index] > best_score:
+            best_score = scores[index]
+            best_settings = np.array([axis.ravel()[index] for axis in grid])
+
+        if best_settings is None:
+            # Nothing feasible in a warm-started box yet: widen it to the bounds
+            center, half = (low + high) / 2, (high - low) / 2
+            continue
+        # A winner on the inner edge of the box may lie further out: move without shrinking
+        on_edge = (np.abs(best_settings - center) >= half * 0.999) & (best_settings > low) & (best_settings < high)
+        center = best_settings
+        if not on_edge.any():
+            half = half * 2 / (GRID_POINTS - 1)
+            if np.all(half <= steps):
+                break
+
+    if best_settings is None:
+        return None
+
+    # Re-solve the neighbouring slider positions on the exact backend
+    candidates = [np.unique([_snap(value + k * step, step, lo, hi) for k in (-1, 0, 1)])
+                  for value, step, lo, hi in zip(best_settings, steps, low, high)]
+    grid = np.meshgrid(*candidates, indexing='ij')
+    results = cycle_model.solve_batch(*grid, refrigerant=refrigerant, backend=backend)
+    scores = score(results, objective, target, max_discharge_temp)
+    evaluations += scores.size
+    index = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    if not np.isfinite(scores[index]):
+        return None
+
+    freq, eev, fan = (float(axis[index]) for axis in grid)
+    return {
+        'objective': objective,
+        'settings': {'freq': freq, 'eev': eev, 'fan': fan},
+        'metrics': {key: float(results[key][index]) for key in
+                    ('cooling_effect', 'compressor_work', 'eer', 'discharge_temp', 'quality_4', 'pressure_ratio')},
+        'points': cycle_model.points_from_results(results, index),
+        'evaluations': evaluations,
+        'iterations': iteration,
+        'elapsed_s': time.perf_counter() - started,
+    }
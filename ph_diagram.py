@@ -0,0 +1,199 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+import cycle_model
+import dome_cache
+import profiling
+
+# P-h diagram that is built once and then only updated in place: the dome,
+# axes, grid and legend are static and cached as a pixel background, while the
+# cycle line and the state-point labels are animated artists that get blitted
+# on top of it.
+
+LABELS_KO = {
+    'vapor': '포화 증기',
+    'liquid': '포화 액체',
+    'cycle': '냉동사이클',
+    'xlabel': '엔탈피 (kJ/kg)',
+    'ylabel': '압력 (kPa)',
+    'title': '냉매 {refrigerant} 냉동사이클 P-H 선도',
+    'compare_title': '냉매 {refrigerant} 냉동사이클 비교 ({count}개)',
+    'tornado_title': '{output} 민감도',
+    'tornado_xlabel': '{output} 변화',
+    'tornado_low': '제어값 감소',
+    'tornado_high': '제어값 증가',
+    'uncertainty_title': '냉매 {refrigerant} 냉동사이클 불확도 ({confidence:.0%} 구간)',
+    'median_cycle': '중앙값 사이클',
+    'interval': '{confidence:.0%} 구간',
+    'controls': {'freq': '압축기 주파수', 'eev': 'EEV 개도', 'fan': '실외팬 RPM'},
+    'outputs': {'eer': 'EER', 'cooling_effect': '냉방효과 (kJ/kg)', 'compressor_work': '압축기 일 (kJ/kg)',
+                'P1': '증발압력 (kPa)', 'P2': '응축압력 (kPa)', 'h2': '토출 엔탈피 (kJ/kg)', 'discharge_temp': '토출 온도 (°C)'},
+}
+
+LABELS_EN = {
+    'vapor': 'Saturated Vapor',
+    'liquid': 'Saturated Liquid',
+    'cycle': 'Refrigeration Cycle',
+    'xlabel': 'Enthalpy (kJ/kg)',
+    'ylabel': 'Pressure (kPa)',
+    'title': '{refrigerant} Refrigeration Cycle P-H Diagram',
+    'compare_title': '{refrigerant} Cycle Comparison ({count} cycles)',
+    'tornado_title': 'Sensitivity of {output}',
+    'tornado_xlabel': 'Change in {output}',
+    'tornado_low': 'Control decreased',
+    'tornado_high': 'Control increased',
+    'uncertainty_title': '{refrigerant} Cycle Uncertainty ({confidence:.0%} interval)',
+    'median_cycle': 'Median cycle',
+    'interval': '{confidence:.0%} interval',
+    'controls': {'freq': 'Compressor freq.', 'eev': 'EEV opening', 'fan': 'Outdoor fan'},
+    'outputs': {'eer': 'EER', 'cooling_effect': 'Cooling effect (kJ/kg)', 'compressor_work': 'Compressor work (kJ/kg)',
+                'P1': 'Evaporating pressure (kPa)', 'P2': 'Condensing pressure (kPa)', 'h2': 'Discharge enthalpy (kJ/kg)',
+                'discharge_temp': 'Discharge temp. (°C)'},
+}
+
+H_MAX = 800  # kJ/kg, fixed right edge of the diagram
+
+
+def cycle_xy(points):
+    # Closed loop 1-2-3-4-1
+    cycle_h = [points[i]['h'] for i in (1, 2, 3, 4, 1)]
+    cycle_p = [points[i]['P'] for i in (1, 2, 3, 4, 1)]
+    return cycle_h, cycle_p
+
+
+def draw_dome(ax, labels=LABELS_EN, refrigerant=cycle_model.REFRIGERANT):
+    # Static part of the diagram: saturation dome, labels, grid and fixed limits
+    P_min, P_max = dome_cache.DOME_P_RANGE
+    with profiling.stage('dome'):
+        P_range, h_sat_liq, h_sat_vap = dome_cache.get_dome(refrigerant, P_min, P_max)
+
+    ax.plot(h_sat_vap, P_range, 'b-', label=labels['vapor'], alpha=0.7)
+    ax.plot(h_sat_liq, P_range, 'b-', label=labels['liquid'], alpha=0.7)
+    ax.set_xlabel(labels['xlabel'])
+    ax.set_ylabel(labels['ylabel'])
+    ax.set_title(labels['title'].format(refrigerant=refrigerant))
+    ax.grid(True)
+    ax.set_xlim(min(h_sat_liq) - 50, H_MAX)
+    ax.set_ylim(P_min, P_max)
+
+
+def draw_overlay(ax, cycles, eers, cmap='viridis'):
+    # All cycles go into one LineCollection and all state points into one
+    # scatter, both colour-mapped by EER, so the draw cost barely depends on
+    # how many cycles are compared.
+    segments = np.array([np.column_stack(cycle_xy(points)) for points in cycles])
+    eers = np.asarray(eers, dtype=float)
+    norm = Normalize(eers.min(), eers.max()) if eers.min() < eers.max() else Normalize(eers.min() - 0.5, eers.max() + 0.5)
+
+    lines = LineCollection(segments, cmap=cmap, norm=norm, linewidths=1.5, alpha=0.8)
+    lines.set_array(eers)
+    ax.add_collection(lines, autolim=False)
+    markers = ax.scatter(segments[:, :4, 0].ravel(), segments[:, :4, 1].ravel(), c=np.repeat(eers, 4),
+                         cmap=cmap, norm=norm, s=12, zorder=3)
+    return lines, markers
+
+
+class PhDiagram:
+    def __init__(self, ax, labels=LABELS_EN, refrigerant=cycle_model.REFRIGERANT, animated=True):
+        # animated=False keeps the cycle as ordinary artists for vector output
+        # (savefig to SVG/PDF), which has no pixel background to blit onto
+        self.ax = ax
+        self.background = None
+
+        draw_dome(ax, labels, refrigerant)
+        self.cycle_line, = ax.plot([], [], 'r-o', label=labels['cycle'], linewidth=2, animated=animated)
+        self.annotations = [
+            ax.annotate(f'{i}', (0, 0), xytext=(5, 5), textcoords='offset points', fontsize=10,
+                        fontweight='bold', animated=animated, visible=False)
+            for i in range(1, 5)
+        ]
+        ax.legend()
+
+        # Any full redraw (first show, resize, ...) refreshes the cached background
+        self._draw_cid = ax.figure.canvas.mpl_connect('draw_event', self._on_draw) if animated else None
+
+    @property
+    def artists(self):
+        return [self.cycle_line] + self.annotations
+
+    def set_cycle(self, points):
+        cycle_h, cycle_p = cycle_xy(points)
+        self.cycle_line.set_data(cycle_h, cycle_p)
+        for i, annotation in enumerate(self.annotations, start=1):
+            annotation.xy = (points[i]['h'], points[i]['P'])
+            annotation.set_visible(True)
+
+    def _on_draw(self, event):
+        canvas = self.ax.figure.canvas
+        self.background = canvas.copy_from_bbox(self.ax.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def blit(self):
+        canvas = self.ax.figure.canvas
+        if self.background is None:
+            canvas.draw()  # draw_event captures the background and draws the overlay
+            return
+        canvas.restore_region(self.background)
+        self._draw_artists()
+        canvas.blit(self.ax.figure.bbox)
+
+    def disconnect(self):
+        if self._draw_cid is not None:
+            self.ax.figure.canvas.mpl_disconnect(self._draw_cid)
+
+
+def draw_comparison(fig, snapshots, labels=LABELS_EN, refrigerant=cycle_model.REFRIGERANT):
+    # Overlay of stored snapshots on one dome, coloured by EER
+    ax = fig.add_subplot(111)
+    draw_dome(ax, labels, refrigerant)
+    lines, _ = draw_overlay(ax, [snapshot["cycle"] for snapshot in snapshots],
+                            [snapshot["metrics"]["eer"] for snapshot in snapshots])
+    ax.set_title(labels['compare_title'].format(refrigerant=refrigerant, count=len(snapshots)))
+    ax.legend(loc='upper right')
+    fig.colorbar(lines, ax=ax, label='EER')
+    return ax
+
+
+def draw_tornado(fig, rows, output, labels=LABELS_EN):
+    # Output change with each control moved down and up on its own (rows as
+    # returned by sensitivity.swings, widest first), drawn top to bottom
+    ax = fig.add_subplot(111)
+    y = np.arange(len(rows))[::-1]
+    ax.barh(y, [row['delta_low'] for row in rows], color='tab:blue', label=labels['tornado_low'])
+    ax.barh(y, [row['delta_high'] for row in rows], color='tab:red', label=labels['tornado_high'])
+    ax.set_yticks(y, [f"{labels['controls'][row['control']]}\n{row['low']:g} / {row['high']:g}" for row in rows])
+    ax.axvline(0, color='k', linewidth=0.8)
+    name = labels['outputs'].get(output, output)
+    ax.set_xlabel(labels['tornado_xlabel'].format(output=name))
+    ax.set_title(labels['tornado_title'].format(output=name))
+    ax.grid(True, axis='x')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.2), ncol=2, fontsize='small', frameon=False)
+    fig.subplots_adjust(left=0.3, bottom=0.3)
+    return ax
+
+
+def draw_uncertainty(fig, result, labels=LABELS_EN, refrigerant=cycle_model.REFRIGERANT):
+    # Median cycle of a Monte Carlo run (as returned by uncertainty.propagate)
+    # with the confidence interval of every state point's P and h as error bars
+    ax = fig.add_subplot(111)
+    draw_dome(ax, labels, refrigerant)
+    stats = result['stats']
+    median = {i: {key: stats[f'{key}{i}']['median'] for key in ('P', 'h')} for i in range(1, 5)}
+    ax.plot(*cycle_xy(median), 'r-o', label=labels['median_cycle'], linewidth=2)
+
+    h = np.array([median[i]['h'] for i in range(1, 5)])
+    P = np.array([median[i]['P'] for i in range(1, 5)])
+    h_err = [h - [stats[f'h{i}']['low'] for i in range(1, 5)], [stats[f'h{i}']['high'] for i in range(1, 5)] - h]
+    P_err = [P - [stats[f'P{i}']['low'] for i in range(1, 5)], [stats[f'P{i}']['high'] for i in range(1, 5)] - P]
+    ax.errorbar(h, P, xerr=np.clip(h_err, 0, None), yerr=np.clip(P_err, 0, None), fmt='none', ecolor='k',
+                elinewidth=1.5, capsize=4, zorder=3, label=labels['interval'].format(confidence=result['confidence']))
+    for i in range(1, 5):
+        ax.annotate(f'{i}', (median[i]['h'], median[i]['P']), xytext=(5, 5), textcoords='offset points',
+                    fontsize=10, fontweight='bold')
+    ax.set_title(labels['uncertainty_title'].format(refrigerant=refrigerant, confidence=result['confidence']))
+    ax.legend()
+    return ax
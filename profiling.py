@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Optional hot-path instrumentation. A Profiler is activated per thread (each
+# Streamlit session runs its script in its own thread), and the instrumented
+# code only pays for a thread-local lookup while profiling is off.
+#
+#   with profiling.profile() as prof:
+#       with profiling.stage('solve'):
+#           cycle_model.solve_point(60, 50, 750)
+#   print(prof.to_json())
+
+_local = threading.local()
+_NO_STAGE = nullcontext()
+
+
+class Profiler:
+    def __init__(self):
+        self.property_calls = {}  # input pair -> [calls, points, seconds]
+        self.stages = {}  # stage name -> [calls, seconds]
+        self._lock = threading.Lock()
+
+    def record_property_call(self, input_pair, n_points, elapsed):
+        with self._lock:
+            entry = self.property_calls.setdefault(input_pair, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += n_points
+            entry[2] += elapsed
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.stages.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def reset(self):
+        with self._lock:
+            self.property_calls.clear()
+            self.stages.clear()
+
+    def report(self):
+        with self._lock:
+            calls = {
+                pair: {
+                    "calls": n_calls,
+                    "points": n_points,
+                    "total_ms": seconds * 1000,
+                    "us_per_point": seconds / n_points * 1e6 if n_points else 0.0,
+                }
+                for pair, (n_calls, n_points, seconds) in sorted(self.property_calls.items())
+            }
+            stages = {name: {"calls": n_calls, "total_ms": seconds * 1000}
+                      for name, (n_calls, seconds) in self.stages.items()}
+        return {
+            "property_calls": calls,
+            "stages": stages,
+            "total_property_calls": sum(entry["calls"] for entry in calls.values()),
+            "total_property_ms": sum(entry["total_ms"] for entry in calls.values()),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report(), indent=indent)
+
+    def summary(self):
+        report = self.report()
+        parts = [f"물성 호출 {report['total_property_calls']}회 ({report['total_property_ms']:.1f} ms)"]
+        parts += [f"{name} {entry['total_ms']:.1f} ms" for name, entry in report["stages"].items()]
+        return " | ".join(parts)
+
+
+def current():
+    return getattr(_local, 'profiler', None)
+
+
+@contextmanager
+def profile(profiler=None):
+    # Activate a profiler for the current thread for the duration of the block
+    profiler = profiler if profiler is not None else Profiler()
+    previous = current()
+    _local.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _local.profiler = previous
+
+
+def stage(name):
+    profiler = current()
+    if profiler is None:
+        return _NO_STAGE
+    return profiler.stage(name)
@@ -0,0 +1,145 @@
+import io
+import os
+import threading
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+import cycle_model
+import ph_diagram
+
+# Server-side P-h rendering for the Streamlit app. Figures are created with
+# the object-oriented API (never registered with pyplot, so nothing to leak),
+# one renderer per refrigerant is shared by every session, and each request
+# only blits the cycle overlay onto the cached dome background.
+
+FONT_PATH = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
+FIGSIZE = (6, 5)
+TORNADO_FIGSIZE = (6, 3)
+RENDER_DPI = 100  # same pixel size st.pyplot produced
+
+_fonts_ready = False
+_renderers = {}
+_lock = threading.Lock()
+
+
+def setup_fonts():
+    # Streamlit re-executes the app script on every rerun; register the font once per process
+    global _fonts_ready
+    with _lock:
+        if _fonts_ready:
+            return
+        # Streamlit Cloud 환경에서 NanumGothic 설치 후 사용
+        if os.path.exists(FONT_PATH):
+            from matplotlib import font_manager
+            font_manager.fontManager.addfont(FONT_PATH)
+            matplotlib.rcParams['font.family'] = 'NanumGothic'
+        else:
+            matplotlib.rcParams['font.family'] = 'DejaVu Sans'  # 기본 폰트
+        matplotlib.rcParams['axes.unicode_minus'] = False
+        _fonts_ready = True
+
+
+class CycleRenderer:
+    def __init__(self, refrigerant=cycle_model.REFRIGERANT, labels=ph_diagram.LABELS_EN):
+        setup_fonts()
+        self.figure = Figure(figsize=FIGSIZE, dpi=RENDER_DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.diagram = ph_diagram.PhDiagram(self.figure.add_subplot(111), labels, refrigerant)
+        self.canvas.draw()  # caches the dome background
+        self._lock = threading.Lock()
+
+    def render_png(self, points):
+        with self._lock:
+            self.diagram.set_cycle(points)
+            self.diagram.blit()
+            image = _canvas_image(self.canvas)
+        return _encode_png(image)
+
+
+class CycleVectorRenderer:
+    # SVG counterpart of CycleRenderer for bulk export. The dome, axes and
+    # legend are written to SVG once as a template; per chart only a second,
+    # transparent copy of the diagram with everything but the cycle hidden
+    # is saved and nested on top of it, so the axes are never laid out again.
+    def __init__(self, refrigerant=cycle_model.REFRIGERANT, labels=ph_diagram.LABELS_EN):
+        setup_fonts()
+        self._template = _save_svg(self._figure(refrigerant, labels)[0]).rsplit(b'</svg>', 1)[0]
+        self.figure, self.diagram = self._figure(refrigerant, labels)
+        self.figure.patch.set_visible(False)
+        self.diagram.ax.patch.set_visible(False)
+        self.diagram.ax.set_axis_off()
+        self.diagram.ax.get_legend().set_visible(False)
+        self.diagram.ax.title.set_visible(False)
+        for artist in self.diagram.ax.lines:
+            artist.set_visible(artist is self.diagram.cycle_line)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _figure(refrigerant, labels):
+        figure = Figure(figsize=FIGSIZE, dpi=RENDER_DPI)
+        FigureCanvasAgg(figure)
+        return figure, ph_diagram.PhDiagram(figure.add_subplot(111), labels, refrigerant, animated=False)
+
+    def render_svg(self, points):
+        with self._lock:
+            self.diagram.set_cycle(points)
+            overlay = _save_svg(self.figure)
+        # Drop the XML prolog and keep the overlay's ids apart from the template's
+        overlay = overlay[overlay.index(b'<svg'):]
+        overlay = overlay.replace(b' id="', b' id="cycle_').replace(b'url(#', b'url(#cycle_') \
+            .replace(b'href="#', b'href="#cycle_')
+        return self._template + overlay + b'</svg>\n'
+
+
+def _save_svg(figure):
+    buf = io.BytesIO()
+    figure.savefig(buf, format='svg')
+    return buf.getvalue()
+
+
+def _canvas_image(canvas):
+    return Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1).convert('RGB')
+
+
+def _encode_png(image):
+    # PNG encoding dominates the per-request cost: opaque RGB at a fast zlib level
+    buf = io.BytesIO()
+    image.save(buf, format='png', compress_level=1)
+    return buf.getvalue()
+
+
+def render_comparison_png(snapshots, refrigerant=cycle_model.REFRIGERANT, labels=ph_diagram.LABELS_EN):
+    # One-off figure per comparison; it is dropped with its canvas when this returns
+    setup_fonts()
+    figure = Figure(figsize=FIGSIZE, dpi=RENDER_DPI)
+    canvas = FigureCanvasAgg(figure)
+    ph_diagram.draw_comparison(figure, snapshots, labels, refrigerant)
+    canvas.draw()
+    return _encode_png(_canvas_image(canvas))
+
+
+def render_tornado_png(rows, output, labels=ph_diagram.LABELS_EN):
+    setup_fonts()
+    figure = Figure(figsize=TORNADO_FIGSIZE, dpi=RENDER_DPI)
+    canvas = FigureCanvasAgg(figure)
+    ph_diagram.draw_tornado(figure, rows, output, labels)
+    canvas.draw()
+    return _encode_png(_canvas_image(canvas))
+
+
+def render_uncertainty_png(result, refrigerant=cycle_model.REFRIGERANT, labels=ph_diagram.LABELS_EN):
+    setup_fonts()
+    figure = Figure(figsize=FIGSIZE, dpi=RENDER_DPI)
+    canvas = FigureCanvasAgg(figure)
+    ph_diagram.draw_uncertainty(figure, result, labels, refrigerant)
+    canvas.draw()
+    return _encode_png(_canvas_image(canvas))
+
+
+def get_renderer(refrigerant=cycle_model.REFRIGERANT):
+    renderer = _renderers.get(refrigerant)
+    if renderer is None:
+        # Built outside the lock (setup_fonts takes it); a lost race only discards one renderer
+        renderer = _renderers.setdefault(refrigerant, CycleRenderer(refrigerant))
+    return renderer
@@ -0,0 +1,267 @@
+import argparse
+import io
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+import numpy as np
+import cycle_model
+import evaluate
+
+# Replay of logged control trajectories (freq, EEV, fan, e.g. at 1 Hz over
+# days) through the cycle model. The log is read as a stream of fixed-size
+# chunks; each chunk is solved as one vectorized batch and appended to the
+# output before the next one is read, so memory is bounded by the chunk size
+# and not the log length. Logs repeat the same readings a lot (steady
+# operation, quantized sensors), so a chunk only solves its distinct rows.
+#
+# Input is a CSV whose header names freq, eev and fan (a time or timestamp
+# column is passed through), or a .npy file (memory-mapped) holding either a
+# structured array with those fields or plain freq, eev, fan columns.
+#
+#   python replay.py week.csv -o week_out.csv
+#   python replay.py week.npy -o week_out.csv --surrogate --workers 4
+#   python replay.py day.csv --plot            # scrolling trend + animated P-h
+
+INPUT_COLUMNS = evaluate.INPUT_COLUMNS
+TIME_COLUMNS = ('time', 'timestamp')
+DEFAULT_KEYS = ('eer', 'cooling_effect', 'compressor_work', 'P1', 'P2', 'discharge_temp')
+PLOT_KEYS = ('P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4', 'eer')
+CHUNK_SIZE = 86400  # one day at 1 Hz
+MEMO_SIZE = 100000  # distinct rows remembered across chunks (per process, least recently used evicted)
+
+TREND_POINTS = 2000  # samples kept on the scrolling trend
+TREND_WINDOW = 6 * 3600  # samples (seconds at 1 Hz) visible on the trend
+FRAMES_PER_CHUNK = 24  # P-h animation frames drawn per chunk
+
+_memo = {}  # (refrigerant, backend, surrogate, keys) -> OrderedDict of rows
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    # Yields (times or None, (n, 3) float array of freq, eev, fan)
+    if path.endswith('.npy'):
+        yield from _read_npy(path, chunk_size)
+        return
+    with ExitStack() as stack:
+        f = sys.stdin if path == '-' else stack.enter_context(open(path, encoding='utf-8'))
+        yield from _read_csv(f, chunk_size)
+
+
+def _read_csv(f, chunk_size):
+    header = [name.strip() for name in f.readline().split(',')]
+    try:
+        columns = [header.index(name) for name in INPUT_COLUMNS]
+    except ValueError:
+        raise SystemExit(f"the log needs a header with the columns {', '.join(INPUT_COLUMNS)}")
+    time_column = next((header.index(name) for name in TIME_COLUMNS if name in header), None)
+    while True:
+        lines = [line for _, line in zip(range(chunk_size), f)]
+        if not lines:
+            return
+        times = None if time_column is None else [line.split(',')[time_column].strip() for line in lines]
+        yield times, np.loadtxt(lines, delimiter=',', ndmin=2, usecols=columns)
+
+
+def _read_npy(path, chunk_size):
+    log = np.load(path, mmap_mode='r')  # only the chunk being read is paged in
+    names = log.dtype.names
+    if names is None and (log.ndim != 2 or log.shape[1] != len(INPUT_COLUMNS)):
+        raise SystemExit(f"{path}: expected a structured array or {len(INPUT_COLUMNS)} columns, got {log.shape}")
+    if names is not None and not set(INPUT_COLUMNS) <= set(names):
+        raise SystemExit(f"{path}: missing fields {', '.join(sorted(set(INPUT_COLUMNS) - set(names)))}")
+    time_field = next((name for name in TIME_COLUMNS if names and name in names), None)
+    for start in range(0, len(log), chunk_size):
+        block = log[start:start + chunk_size]
+        if names is None:
+            yield None, np.array(block, dtype=float)
+        else:
+            times = None if time_field is None else block[time_field].tolist()
+            yield times, np.column_stack([block[name] for name in INPUT_COLUMNS]).astype(float)
+
+
+def solve_chunk(table, keys, solver_args):
+    # Distinct rows only, and of those only the ones not seen in earlier
+    # chunks for the same solver; returns the results expanded back to the
+    # chunk and the number of rows actually solved
+    _, solve = evaluate.get_solver(*solver_args)
+    unique, inverse = np.unique(table, axis=0, return_inverse=True)
+    rows = list(map(tuple, unique.tolist()))
+    memo = _memo.setdefault(tuple(solver_args) + (keys,), OrderedDict())
+    values = np.empty((len(rows), len(keys)))
+    missing = []
+    for i, row in enumerate(rows):
+        hit = memo.get(row)
+        if hit is None:
+            missing.append(i)
+        else:
+            values[i] = hit
+            memo.move_to_end(row)  # least recently used rows are evicted first
+    if missing:
+        solved = solve(unique[missing, 0], unique[missing, 1], unique[missing, 2])
+        values[missing] = np.column_stack([solved[key] for key in keys])
+        for i in missing:
+            memo[rows[i]] = tuple(values[i].tolist())
+        # The chunk's values are complete, so eviction may drop any of its rows too
+        while len(memo) > MEMO_SIZE:
+            memo.popitem(last=False)
+    values = values[inverse.ravel()]
+    return {key: values[:, j] for j, key in enumerate(keys)}, len(missing)
+
+
+def _solved_chunks(chunks, keys, workers, solver_args):
+    # Serial, or in order on a process pool with a bounded number of chunks in flight
+    if workers <= 1:
+        for times, table in chunks:
+            yield (times, table) + solve_chunk(table, keys, solver_args)
+        return
+    # The initializer builds every worker's solver before its first chunk
+    with ProcessPoolExecutor(workers, initializer=evaluate.get_solver, initargs=solver_args) as pool:
+        pending = deque()
+        for times, table in chunks:
+            pending.append((times, table, pool.submit(solve_chunk, table, keys, solver_args)))
+            if len(pending) > 2 * workers:
+                times, table, future = pending.popleft()
+                yield (times, table) + future.result()
+        while pending:
+            times, table, future = pending.popleft()
+            yield (times, table) + future.result()
+
+
+def write_chunk(out, times, table, results, keys):
+    buf = io.StringIO()
+    np.savetxt(buf, np.column_stack([table] + [results[key] for key in keys]), delimiter=',', fmt='%.10g')
+    if times is None:
+        out.write(buf.getvalue())
+    else:
+        out.write(''.join(f"{t},{line}\n" for t, line in zip(times, buf.getvalue().splitlines())))
+    out.flush()
+
+
+def replay(path, out=None, keys=DEFAULT_KEYS, chunk_size=CHUNK_SIZE, workers=1,
+           refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND, surrogate_path=None,
+           plot=None):
+    solve_keys = tuple(dict.fromkeys(keys + (PLOT_KEYS if plot is not None else ())))
+    if surrogate_path is None:
+        available = cycle_model.RESULT_KEYS
+    else:
+        import surrogate
+        available = surrogate.OUTPUT_KEYS
+    unknown = [key for key in solve_keys if key not in available]
+    if unknown:
+        raise ValueError(f"Unknown result keys: {', '.join(unknown)}")
+    rows = solved = 0
+    header_written = False
+    started = time.perf_counter()
+    for times, table, results, n_unique in _solved_chunks(read_chunks(path, chunk_size), solve_keys, workers,
+                                                            (refrigerant, backend, surrogate_path)):
+        if out is not None:
+            if not header_written:
+                out.write(','.join((('time',) if times is not None else ()) + INPUT_COLUMNS + tuple(keys)) + '\n')
+                header_written = True
+            write_chunk(out, times, table, results, keys)
+        if plot is not None:
+            plot.update(rows, results)
+        rows += len(table)
+        solved += n_unique
+    return {'rows': rows, 'solved': solved, 'elapsed_s': time.perf_counter() - started}
+
+
+class ReplayPlot:
+    # Scrolling EER / pressure trend next to an animated P-h cycle. The trend
+    # keeps a decimated, bounded history; per chunk the figure is redrawn
+    # once and the P-h frames are blitted on top of it.
+    def __init__(self, refrigerant=cycle_model.REFRIGERANT):
+        import matplotlib.pyplot as plt
+        import ph_diagram
+        import rendering
+        rendering.setup_fonts()
+        self.plt = plt
+        plt.ion()
+        self.fig = plt.figure(figsize=(12, 5))
+        self.trend_ax = self.fig.add_subplot(1, 2, 1)
+        self.pressure_ax = self.trend_ax.twinx()
+        self.diagram = ph_diagram.PhDiagram(self.fig.add_subplot(1, 2, 2), ph_diagram.LABELS_EN, refrigerant)
+
+        self.history = deque(maxlen=TREND_POINTS)
+        self.eer_line, = self.trend_ax.plot([], [], 'g-', label='EER')
+        self.p1_line, = self.pressure_ax.plot([], [], 'b-', linewidth=1, label='P evap')
+        self.p2_line, = self.pressure_ax.plot([], [], 'r-', linewidth=1, label='P cond')
+        self.trend_ax.set_xlabel('Sample (s at 1 Hz)')
+        self.trend_ax.set_ylabel('EER')
+        self.pressure_ax.set_ylabel('Pressure (kPa)')
+        self.trend_ax.legend(handles=[self.eer_line, self.p1_line, self.p2_line], loc='upper left')
+        self.trend_ax.grid(True)
+        self.fig.tight_layout()
+        plt.show(block=False)
+
+    @property
+    def open(self):
+        return self.plt.fignum_exists(self.fig.number)
+
+    def update(self, start, results):
+        if not self.open:
+            return
+        n = len(results['eer'])
+        # Decimated so the bounded history still spans the visible window
+        index = np.arange(0, n, -(-TREND_WINDOW // TREND_POINTS))
+        self.history.extend(zip((start + index).tolist(), results['eer'][index].tolist(),
+                                results['P1'][index].tolist(), results['P2'][index].tolist()))
+        x, eer, p1, p2 = np.array(self.history).T
+        self.eer_line.set_data(x, eer)
+        self.p1_line.set_data(x, p1)
+        self.p2_line.set_data(x, p2)
+        self.trend_ax.set_xlim(max(x[-1] - TREND_WINDOW, x[0]), x[-1] + 1)
+        self.trend_ax.set_ylim(np.nanmin(eer) - 0.1, np.nanmax(eer) + 0.1)
+        self.pressure_ax.set_ylim(0, np.nanmax([p1, p2]) * 1.05)
+        self.fig.canvas.draw()  # refreshes the P-h background as well
+
+        for i in np.linspace(0, n - 1, min(n, FRAMES_PER_CHUNK)).astype(int):
+            self.diagram.set_cycle({k: {'P': results[f'P{k}'][i], 'h': results[f'h{k}'][i]} for k in range(1, 5)})
+            self.diagram.blit()
+            self.fig.canvas.flush_events()
+
+    def show(self):
+        if self.open:
+            self.plt.ioff()
+            self.plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a logged control trajectory through the cycle model")
+    parser.add_argument('log', help="CSV ('-' for stdin) or .npy log with freq, eev, fan")
+    parser.add_argument('-o', '--output', default=None, help="result CSV ('-' for stdout)")
+    parser.add_argument('--keys', nargs='+', default=list(DEFAULT_KEYS), help="result columns to write")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help="solve chunks on this many processes")
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    parser.add_argument('--surrogate', nargs='?', const='', default=None, metavar='NPZ',
+                        help="use a fitted surrogate (default artifact if no path is given)")
+    parser.add_argument('--plot', action='store_true', help="show a scrolling trend and an animated P-h cycle")
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+    if args.output is None and not args.plot:
+        parser.error("give -o/--output and/or --plot")
+
+    plot = ReplayPlot(args.refrigerant) if args.plot else None
+    with ExitStack() as stack:
+        out = None
+        if args.output == '-':
+            out = sys.stdout
+        elif args.output is not None:
+            out = stack.enter_context(open(args.output, 'w', encoding='utf-8', newline=''))
+        try:
+            stats = replay(args.log, out, tuple(args.keys), args.chunk_size, args.workers,
+                           args.refrigerant, args.backend, args.surrogate, plot)
+        except ValueError as exc:
+            parser.error(str(exc))
+    print(f"{stats['rows']} rows ({stats['solved']} solved) in {stats['elapsed_s']:.1f} s, "
+          f"{stats['rows'] / max(stats['elapsed_s'], 1e-9):.0f} rows/s", file=sys.stderr)
+    if plot is not None:
+        plot.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+import cycle_model
+
+# Process-wide memo of solved operating points. Keys are quantized to the
+# Streamlit slider resolution so that every session asking for the same
+# slider position shares one entry; the least recently used entries are
+# evicted once the cache is full.
+
+FREQ_STEP = 0.1  # Hz
+EEV_STEP = 0.1  # %
+FAN_STEP = 10  # RPM
+
+DEFAULT_MAXSIZE = 4096
+
+
+def quantize(freq, eev, fan):
+    return int(round(freq / FREQ_STEP)), int(round(eev / EEV_STEP)), int(round(fan / FAN_STEP))
+
+
+def snap(freq, eev, fan):
+    # The settings a cache entry is actually solved at
+    return tuple(round(n * step, 6) for n, step in zip(quantize(freq, eev, fan), (FREQ_STEP, EEV_STEP, FAN_STEP)))
+
+
+class CycleResultCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def solve_point(self, freq, eev, fan, refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND):
+        key = (refrigerant, backend) + quantize(freq, eev, fan)
+        with self._lock:
+            points = self._entries.get(key)
+            if points is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if points is None:
+            # Solve outside the lock so other sessions are not blocked meanwhile
+            points = cycle_model.solve_point(*snap(freq, eev, fan), refrigerant, backend)
+            with self._lock:
+                self._entries[key] = points
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        # Callers keep results in session state / snapshots; never hand out the cached dicts
+        return {i: dict(props) for i, props in points.items()}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+shared_cache = CycleResultCache()
+
+
+def solve_point(freq, eev, fan, refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND):
+    return shared_cache.solve_point(freq, eev, fan, refrigerant, backend)
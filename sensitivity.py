@@ -0,0 +1,216 @@
+import argparse
+import json
+import numpy as np
+import cycle_model
+
+# Sensitivity of the cycle outputs to the controls (the Jacobian
+# d output / d freq, eev, fan) around an operating point, e.g. how much EER
+# changes per Hz.
+#
+# jacobian() uses central differences at steps h and h/2 for every point
+# and control, all solved as one batch, and combines them by Richardson
+# extrapolation. Their difference is the error estimate; where it is above
+# the tolerance the step is halved and only those derivatives are refined,
+# re-using the previous h/2 solves, so each extra level costs two cycles per
+# derivative. sensitivity_map() differentiates a solved grid directly
+# (np.gradient), one solve per grid point.
+#
+#   python sensitivity.py 60 50 750
+#   python sensitivity.py --map map.csv --freq 30 120 46 --eev 0 100 51 --fan 750 750 1
+
+CONTROLS = ('freq', 'eev', 'fan')
+OUTPUTS = ('eer', 'cooling_effect', 'compressor_work', 'P2', 'h2', 'discharge_temp')
+RANGES = (cycle_model.FREQ_RANGE, cycle_model.EEV_RANGE, cycle_model.FAN_RANGE)
+SPANS = np.array([high - low for low, high in RANGES])
+
+INITIAL_STEP = 0.02  # fraction of the slider range
+RTOL = 1e-5
+MAX_LEVELS = 8
+SWING_FRACTION = 0.1  # tornado bars: each control moved by this fraction of its range
+
+
+def _outputs(results, outputs):
+    return np.stack([results[key] for key in outputs], axis=-1)
+
+
+def jacobian(freq, eev, fan, outputs=OUTPUTS, refrigerant=cycle_model.REFRIGERANT,
+             backend=cycle_model.DEFAULT_BACKEND, rtol=RTOL):
+    # Returns {output: array of shape point_shape + (3,)} with the
+    # derivatives along CONTROLS, plus the error estimates and steps used
+    base = np.broadcast_arrays(np.asarray(freq, dtype=float), np.asarray(eev, dtype=float),
+                               np.asarray(fan, dtype=float))
+    shape = base[0].shape
+    x = np.column_stack([b.ravel() for b in base])
+
+    # One row per (point, control) derivative
+    point = np.repeat(np.arange(len(x)), len(CONTROLS))
+    control = np.tile(np.arange(len(CONTROLS)), len(x))
+    step = SPANS[control] * INITIAL_STEP
+    value = np.full((len(point), len(outputs)), np.nan)
+    error = np.full(len(point), np.inf)
+
+    active = np.arange(len(point))
+    coarse = None  # central difference at the current step, carried over from the previous level
+    evaluations = 0
+    for level in range(1, MAX_LEVELS + 1):
+        h = step[active]
+        offsets = np.array([0.5, -0.5]) if coarse is not None else np.array([1, -1, 0.5, -0.5])
+        stencil = np.repeat(x[point[active]][:, None, :], len(offsets), axis=1)
+        stencil[np.arange(len(active)), :, control[active]] += h[:, None] * offsets
+        f = _outputs(cycle_model.solve_batch(stencil[..., 0], stencil[..., 1], stencil[..., 2],
+                                             refrigerant, backend), outputs)
+        evaluations += stencil.shape[0] * stencil.shape[1]
+
+        if coarse is None:
+            coarse = (f[:, 0] - f[:, 1]) / (2 * h[:, None])
+        fine = (f[:, -2] - f[:, -1]) / h[:, None]
+        estimate = fine + (fine - coarse) / 3
+        # Tolerance relative to the derivative, or to the output itself over the
+        # slider range for derivatives that are (numerically) zero
+        scale = np.abs(estimate) + np.abs(f[:, -2]) / SPANS[control[active]][:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relative = np.where(np.isfinite(estimate), np.abs(fine - coarse) / 3 / scale, np.inf)
+        relative = np.where(np.isnan(relative), 0.0, relative).max(axis=1)  # 0/0: output constant
+
+        better = relative < error[active]
+        value[active[better]] = estimate[better]
+        error[active[better]] = relative[better]
+
+        refine = relative > rtol
+        if not refine.any():
+            break
+        active = active[refine]
+        coarse = fine[refine]
+        step[active] /= 2
+
+    full = shape + (len(CONTROLS),)
+    return {
+        'jacobian': {key: value[:, j].reshape(full) for j, key in enumerate(outputs)},
+        'relative_error': error.reshape(full),
+        'step': step.reshape(full),
+        'evaluations': evaluations,
+        'levels': level,
+    }
+
+
+def swings(freq, eev, fan, outputs=OUTPUTS, refrigerant=cycle_model.REFRIGERANT,
+           backend=cycle_model.DEFAULT_BACKEND, fraction=SWING_FRACTION):
+    # Tornado data: the output change when each control alone is moved down/up
+    # by `fraction` of its range (clipped to the sliders), one batch of seven cycles
+    x = np.array([freq, eev, fan], dtype=float)
+    stencil = np.repeat(x[None, :], 1 + 2 * len(CONTROLS), axis=0)
+    for k, (low, high) in enumerate(RANGES):
+        stencil[1 + 2 * k, k] = max(x[k] - fraction * SPANS[k], low)
+        stencil[2 + 2 * k, k] = min(x[k] + fraction * SPANS[k], high)
+    f = _outputs(cycle_model.solve_batch(stencil[:, 0], stencil[:, 1], stencil[:, 2], refrigerant, backend), outputs)
+
+    rows = {}
+    for j, key in enumerate(outputs):
+        rows[key] = [{'control': name, 'low': float(stencil[1 + 2 * k, k]), 'high': float(stencil[2 + 2 * k, k]),
+                      'delta_low': float(f[1 + 2 * k, j] - f[0, j]), 'delta_high': float(f[2 + 2 * k, j] - f[0, j])}
+                     for k, name in enumerate(CONTROLS)]
+        # Widest bar first
+        rows[key].sort(key=lambda row: -max(abs(row['delta_low']), abs(row['delta_high'])))
+    return {'base': {key: float(f[0, j]) for j, key in enumerate(outputs)}, 'swings': rows}
+
+
+def analyze(freq, eev, fan, outputs=OUTPUTS, refrigerant=cycle_model.REFRIGERANT,
+            backend=cycle_model.DEFAULT_BACKEND):
+    # Table and tornado data for one operating point, as shown by the UIs
+    result = jacobian(freq, eev, fan, outputs, refrigerant, backend)
+    result.update(swings(freq, eev, fan, outputs, refrigerant, backend))
+    result['evaluations'] += 1 + 2 * len(CONTROLS)
+    result['jacobian'] = {key: dict(zip(CONTROLS, map(float, values))) for key, values in result['jacobian'].items()}
+    return result
+
+
+def sensitivity_map(freq, eev, fan, outputs=OUTPUTS, refrigerant=cycle_model.REFRIGERANT,
+                    backend=cycle_model.DEFAULT_BACKEND):
+    # Jacobian over a whole (freq, eev, fan) grid given by its 1-D axes. Axes
+    # with three or more points are differentiated on the grid itself
+    # (second order, also at the edges); for shorter axes the grid is solved
+    # once more on either side of it.
+    axes = [np.atleast_1d(np.asarray(axis, dtype=float)) for axis in (freq, eev, fan)]
+    grid = np.meshgrid(*axes, indexing='ij')
+    f = _outputs(cycle_model.solve_batch(*grid, refrigerant=refrigerant, backend=backend), outputs)
+    evaluations = f[..., 0].size
+
+    derivatives = []
+    for k, axis in enumerate(axes):
+        if len(axis) >= 3:
+            derivatives.append(np.gradient(f, axis, axis=k, edge_order=2))
+            continue
+        h = SPANS[k] * INITIAL_STEP
+        sides = []
+        for sign in (1, -1):
+            shifted = list(grid)
+            shifted[k] = grid[k] + sign * h
+            sides.append(_outputs(cycle_model.solve_batch(*shifted, refrigerant=refrigerant, backend=backend),
+                                  outputs))
+        derivatives.append((sides[0] - sides[1]) / (2 * h))
+        evaluations += 2 * f[..., 0].size
+    derivatives = np.stack(derivatives, axis=-1)  # grid shape + (outputs, controls)
+
+    return {
+        'axes': dict(zip(CONTROLS, axes)),
+        'values': {key: f[..., j] for j, key in enumerate(outputs)},
+        'jacobian': {key: derivatives[..., j, :] for j, key in enumerate(outputs)},
+        'evaluations': evaluations,
+    }
+
+
+def write_map_csv(path, result):
+    grid = np.meshgrid(*result['axes'].values(), indexing='ij')
+    columns = list(CONTROLS)
+    table = [g.ravel() for g in grid]
+    for key, values in result['values'].items():
+        columns.append(key)
+        table.append(values.ravel())
+        for k, name in enumerate(CONTROLS):
+            columns.append(f"d{key}_d{name}")
+            table.append(result['jacobian'][key][..., k].ravel())
+    np.savetxt(path, np.column_stack(table), delimiter=',', fmt='%.10g', header=','.join(columns), comments='')
+
+
+def print_table(result):
+    print(f"{'output':<18}{'value':>12}" + ''.join(f"{'d/d' + name:>14}" for name in CONTROLS))
+    for key, row in result['jacobian'].items():
+        print(f"{key:<18}{result['base'][key]:>12.4g}" + ''.join(f"{row[name]:>14.4g}" for name in CONTROLS))
+    print(f"{result['evaluations']} cycle evaluations, {result['levels']} level(s), "
+          f"max relative error {result['relative_error'].max():.1e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensitivity of the cycle outputs to the controls")
+    parser.add_argument('point', nargs='*', type=float, metavar='FREQ EEV FAN')
+    parser.add_argument('--map', metavar='CSV', help="write a sensitivity map over the --freq/--eev/--fan grid")
+    parser.add_argument('--freq', nargs=3, type=float, default=[30, 120, 46], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--eev', nargs=3, type=float, default=[0, 100, 51], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--fan', nargs=3, type=float, default=[750, 750, 1], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    parser.add_argument('--json', action='store_true', help="print the point result as JSON")
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+    if (args.map is None) == (len(args.point) != 3):
+        parser.error("give either FREQ EEV FAN or --map CSV")
+
+    if args.map:
+        axes = [np.linspace(start, stop, int(num)) for start, stop, num in (args.freq, args.eev, args.fan)]
+        result = sensitivity_map(*axes, refrigerant=args.refrigerant, backend=args.backend)
+        write_map_csv(args.map, result)
+        print(f"{result['evaluations']} cycle evaluations -> {args.map}")
+        return
+
+    result = analyze(*args.point, refrigerant=args.refrigerant, backend=args.backend)
+    if args.json:
+        result['relative_error'] = result['relative_error'].tolist()
+        result['step'] = result['step'].tolist()
+        print(json.dumps(result, indent=2))
+    else:
+        print_table(result)
+
+
+if __name__ == "__main__":
+    main()
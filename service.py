@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import cycle_model
+import result_cache
+
+# Local evaluation service speaking JSON lines over TCP. One request per
+# line, one response per line (matched by "id", responses may come out of
+# order):
+#
+#   -> {"id": 1, "freq": 60, "eev": 50, "fan": 750, "refrigerant": "R32"}
+#   <- {"id": 1, "settings": {...}, "result": {"P1": ..., "eer": ...}}
+#
+# Requests arriving within WINDOW_S of each other are coalesced into one
+# batched solve, requests for the same slider position (quantized like the
+# result cache) share one in-flight evaluation, and the batches run on a
+# process pool so the event loop only does I/O.
+#
+#   python service.py --port 8765
+
+DEFAULT_PORT = 8765
+WINDOW_S = 0.002
+MAX_BATCH = 4096
+MIN_CHUNK = 256  # smallest batch worth shipping to a separate worker
+
+
+def _warm_up():
+    # Pool initializer: create the fluid state before the first real batch
+    cycle_model.solve_point(60, 50, 750)
+
+
+def _solve(refrigerant, backend, freq, eev, fan):
+    # A table backend serves the fluids it is validated for; the others are solved on HEOS
+    return cycle_model.solve_batch(freq, eev, fan, refrigerant, cycle_model.validated_backend(refrigerant, backend))
+
+
+def _json_value(value):
+    value = float(value)
+    return value if math.isfinite(value) else None  # JSON has no NaN (e.g. quality outside the dome)
+
+
+class CycleService:
+    def __init__(self, workers=None, window=WINDOW_S, max_batch=MAX_BATCH, backend=cycle_model.DEFAULT_BACKEND):
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window
+        self.max_batch = max_batch
+        self.backend = backend
+        self.pool = self._new_pool()
+        self._pending = {}  # (refrigerant, steps) -> future, waiting for the next flush
+        self._in_flight = {}  # same key -> future, pending or being solved
+        self._flush_handle = None
+        self.stats = {"requests": 0, "coalesced": 0, "solved": 0, "batches": 0}
+
+    def _new_pool(self):
+        # Spawned, not forked: a forked worker would inherit the open client
+        # sockets and keep those connections from ever closing
+        return ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'), initializer=_warm_up)
+
+    async def start(self):
+        # Bring every worker up (imports + fluid state) before the first request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers)))
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def evaluate(self, freq, eev, fan, refrigerant=cycle_model.REFRIGERANT):
+        if refrigerant not in cycle_model.REFRIGERANTS:
+            raise ValueError(f"Unknown refrigerant: {refrigerant}")
+        if not all(math.isfinite(value) for value in (freq, eev, fan)):
+            raise ValueError("freq, eev and fan must be finite numbers")  # json.loads accepts NaN/Infinity
+        self.stats["requests"] += 1
+        key = (refrigerant,) + result_cache.quantize(freq, eev, fan)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._pending[key] = future
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+
+        by_refrigerant = {}
+        for key, future in pending.items():
+            by_refrigerant.setdefault(key[0], []).append((key, future))
+        for refrigerant, items in by_refrigerant.items():
+            # Large batches are split so every worker gets a share
+            n_chunks = max(1, min(self.workers, len(items) // MIN_CHUNK))
+            for chunk in np.array_split(np.arange(len(items)), n_chunks):
+                asyncio.ensure_future(self._solve_batch(refrigerant, [items[i] for i in chunk]))
+
+    async def _solve_batch(self, refrigerant, items):
+        steps = np.array([key[1:] for key, _ in items], dtype=float)
+        settings = np.round(steps * (result_cache.FREQ_STEP, result_cache.EEV_STEP, result_cache.FAN_STEP), 6)
+        self.stats["batches"] += 1
+        self.stats["solved"] += len(items)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, _solve, refrigerant, self.backend, settings[:, 0], settings[:, 1], settings[:, 2])
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                # A worker died; later batches get a fresh pool
+                self.pool.shutdown(wait=False)
+                self.pool = self._new_pool()
+            for key, future in items:
+                self._in_flight.pop(key, None)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        columns = {key: results[key].tolist() for key in cycle_model.RESULT_KEYS}
+        for i, (key, future) in enumerate(items):
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result({
+                    "settings": {"freq": settings[i, 0], "eev": settings[i, 1], "fan": settings[i, 2],
+                                 "refrigerant": refrigerant},
+                    "result": {name: _json_value(values[i]) for name, values in columns.items()},
+                })
+
+    async def _respond(self, request, writer):
+        try:
+            response = await self.evaluate(float(request["freq"]), float(request["eev"]), float(request["fan"]),
+                                           request.get("refrigerant", cycle_model.REFRIGERANT))
+            response = dict(response, id=request.get("id"))
+        except Exception as exc:
+            # Every request gets an answer: bad input, but also a failed batch (e.g. a broken pool)
+            response = {"id": request.get("id"), "error": str(exc) or type(exc).__name__}
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client has gone
+
+    async def handle_client(self, reader, writer):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as exc:
+                    writer.write(json.dumps({"id": None, "error": str(exc)}).encode() + b"\n")
+                    continue
+                task = asyncio.ensure_future(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, workers=None, window=WINDOW_S, backend=cycle_model.DEFAULT_BACKEND):
+    service = CycleService(workers, window, backend=backend)
+    await service.start()
+    server = await asyncio.start_server(service.handle_client, host, port, limit=2 ** 20)
+    host, port = server.sockets[0].getsockname()[:2]
+    # Parsed by the load generator when started with --port 0
+    print(f"listening on {host}:{port} ({service.workers} workers)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        print(f"served {service.stats}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched JSON-lines cycle evaluation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--window-ms', type=float, default=WINDOW_S * 1000,
+                        help="how long to collect requests into one batch")
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS,
+                        help="used for the refrigerants it is validated for, HEOS for the rest")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.window_ms / 1000, args.backend))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
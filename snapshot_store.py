@@ -0,0 +1,302 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+import cycle_model
+
+# Durable snapshot store shared by both apps. Snapshots live in one SQLite
+# table with the control settings, the four state points and the derived
+# performance figures as plain columns, indexed for range queries. Besides P
+# and h, the discharge temperature (T2) and point-4 quality (Q4) are kept so a
+# loaded snapshot shows the same figures as a fresh solve. Settings
+# are de-duplicated on the same resolution the snapshot names show
+# (0.1 Hz / 0.1 % / 1 RPM) through a unique index instead of name strings.
+#
+#   store = SnapshotStore()
+#   store.add(60, 50, 750, points)
+#   store.query({"freq": (50, 70), "eer": (5, None)})
+#
+#   python snapshot_store.py export snapshots.csv --where eer 5 - --refrigerant R32
+#   python snapshot_store.py import snapshots.csv --db other.db
+
+DEFAULT_PATH = os.environ.get('CYCLE_SIM_SNAPSHOT_DB',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots.db'))
+
+POINT_COLUMNS = ('P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4')
+METRIC_COLUMNS = ('cooling_effect', 'compressor_work', 'eer')
+# Nullable: snapshots saved before these were stored, or imported without them, lack them
+STATE_COLUMNS = ('T2', 'Q4')
+EXPORT_COLUMNS = ('name', 'refrigerant', 'freq', 'eev', 'fan') + POINT_COLUMNS + METRIC_COLUMNS + STATE_COLUMNS
+# Columns that may be filtered on with (min, max) ranges
+RANGE_COLUMNS = ('freq', 'eev', 'fan') + POINT_COLUMNS + METRIC_COLUMNS + STATE_COLUMNS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    refrigerant TEXT NOT NULL,
+    freq_key INTEGER NOT NULL,
+    eev_key INTEGER NOT NULL,
+    fan_key INTEGER NOT NULL,
+    freq REAL NOT NULL,
+    eev REAL NOT NULL,
+    fan REAL NOT NULL,
+    {', '.join(f'{column} REAL NOT NULL' for column in POINT_COLUMNS + METRIC_COLUMNS)},
+    {', '.join(f'{column} REAL' for column in STATE_COLUMNS)},
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_snapshots_key ON snapshots (refrigerant, freq_key, eev_key, fan_key);
+CREATE INDEX IF NOT EXISTS idx_snapshots_settings ON snapshots (freq, eev, fan);
+CREATE INDEX IF NOT EXISTS idx_snapshots_eer ON snapshots (eer);
+"""
+
+MAX_SQL_PARAMS = 900  # below SQLite's default host-parameter limit
+
+INSERT_COLUMNS = ('name', 'refrigerant', 'freq_key', 'eev_key', 'fan_key', 'freq', 'eev', 'fan') \
+    + POINT_COLUMNS + METRIC_COLUMNS + STATE_COLUMNS + ('created_at',)
+INSERT_SQL = (f"INSERT OR IGNORE INTO snapshots ({', '.join(INSERT_COLUMNS)}) "
+              f"VALUES ({', '.join('?' * len(INSERT_COLUMNS))})")
+
+
+def snapshot_name(freq, eev, fan):
+    return f"압축_{freq:.1f}Hz_EEV_{eev:.1f}%_팬_{int(fan)}RPM"
+
+
+def _row_values(freq, eev, fan, points, refrigerant, created_at):
+    freq, eev, fan = float(freq), float(eev), float(fan)
+    cooling_effect, compressor_work, eer = cycle_model.cycle_performance(points)
+    point_values = [points[i][key] for i in range(1, 5) for key in ('P', 'h')]
+    return ([snapshot_name(freq, eev, fan), refrigerant, round(freq * 10), round(eev * 10), int(fan), freq, eev, fan]
+            + point_values + [cooling_effect, compressor_work, eer, points[2].get('T'), points[4].get('Q'),
+                              created_at])
+
+
+def comparison_rows(snapshots):
+    # One row per snapshot for the combined compare-mode metrics table
+    return [{
+        "name": snapshot["name"],
+        "freq": snapshot["settings"]["freq"],
+        "eev": snapshot["settings"]["eev"],
+        "fan": snapshot["settings"]["fan"],
+        "P_evap": snapshot["cycle"][1]["P"],
+        "P_cond": snapshot["cycle"][2]["P"],
+        **snapshot["metrics"],
+    } for snapshot in snapshots]
+
+
+def _where(filters):
+    # filters: {"refrigerant": "R32", column: (min or None, max or None), ...}
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if column == 'refrigerant':
+            clauses.append("refrigerant = ?")
+            params.append(value)
+            continue
+        if column not in RANGE_COLUMNS:
+            raise ValueError(f"Cannot filter snapshots on {column!r}")
+        low, high = value
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(high)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def parse_filters(where=(), refrigerant=None):
+    # Command-line filters: (column, min, max) triples with '-' for an open end
+    filters = {column: tuple(None if bound == '-' else float(bound) for bound in (low, high))
+               for column, low, high in where}
+    if refrigerant:
+        filters['refrigerant'] = refrigerant
+    return filters
+
+
+def _write_csv(cursor, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                return count
+            writer.writerows(rows)
+            count += len(rows)
+
+
+def _cycle(record, convert=None):
+    # State points from a row or CSV record; T2/Q4 only where they were stored
+    convert = convert or (lambda value: value)
+    cycle = {i: {"P": convert(record[f"P{i}"]), "h": convert(record[f"h{i}"])} for i in range(1, 5)}
+    for column in STATE_COLUMNS:
+        value = record[column] if column in record.keys() else None
+        if value not in (None, ''):
+            cycle[int(column[1])][column[0]] = convert(value)
+    return cycle
+
+
+def _snapshot_from_row(row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "refrigerant": row["refrigerant"],
+        "settings": {"freq": row["freq"], "eev": row["eev"], "fan": row["fan"]},
+        "cycle": _cycle(row),
+        "metrics": {column: row[column] for column in METRIC_COLUMNS},
+    }
+
+
+class SnapshotStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by the UI threads, serialized by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            # Databases created before T2/Q4 were stored
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(snapshots)")}
+            for column in STATE_COLUMNS:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE snapshots ADD COLUMN {column} REAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, freq, eev, fan, points, refrigerant=cycle_model.REFRIGERANT):
+        # Returns the new id, or None when a snapshot with these settings already exists
+        values = _row_values(freq, eev, fan, points, refrigerant, time.time())
+        with self._lock, self._conn:
+            cursor = self._conn.execute(INSERT_SQL, values)
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def add_many(self, rows):
+        # rows: iterable of (freq, eev, fan, points[, refrigerant]); one transaction for the lot
+        now = time.time()
+        values = (_row_values(*row[:4], row[4] if len(row) > 4 else cycle_model.REFRIGERANT, now) for row in rows)
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(INSERT_SQL, values)
+            return self._conn.total_changes - before
+
+    def get(self, snapshot_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return _snapshot_from_row(row) if row is not None else None
+
+    def get_many(self, snapshot_ids):
+        # Snapshots in the order of snapshot_ids; missing ids are skipped
+        snapshot_ids = list(snapshot_ids)
+        rows = {}
+        with self._lock:
+            for start in range(0, len(snapshot_ids), MAX_SQL_PARAMS):
+                chunk = snapshot_ids[start:start + MAX_SQL_PARAMS]
+                sql = f"SELECT * FROM snapshots WHERE id IN ({', '.join('?' * len(chunk))})"
+                rows.update((row["id"], row) for row in self._conn.execute(sql, chunk))
+        return [_snapshot_from_row(rows[i]) for i in snapshot_ids if i in rows]
+
+    def delete(self, snapshot_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def count(self, filters=None):
+        where, params = _where(filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM snapshots{where}", params).fetchone()[0]
+
+    def page(self, offset=0, limit=50, filters=None):
+        # (id, name) pairs for list widgets; full snapshots are fetched on selection
+        where, params = _where(filters)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, name FROM snapshots{where} ORDER BY id LIMIT ? OFFSET ?",
+                                      params + [limit, offset]).fetchall()
+        return [(row["id"], row["name"]) for row in rows]
+
+    def query(self, filters=None, order_by='id', limit=None):
+        if order_by not in ('id',) + RANGE_COLUMNS:
+            raise ValueError(f"Cannot order snapshots by {order_by!r}")
+        where, params = _where(filters)
+        sql = f"SELECT * FROM snapshots{where} ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_snapshot_from_row(row) for row in rows]
+
+    def export_csv(self, path, filters=None):
+        where, params = _where(filters)
+        sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM snapshots{where} ORDER BY id"
+        if self.path == ':memory:':
+            # No other connection can see an in-memory database
+            with self._lock:
+                return _write_csv(self._conn.execute(sql, params), path)
+        # A long export reads on its own connection (a consistent WAL snapshot),
+        # so the UI threads keep using the shared one meanwhile
+        with closing(sqlite3.connect(self.path)) as conn:
+            return _write_csv(conn.execute(sql, params), path)
+
+    def import_csv(self, path):
+        # Accepts files written by export_csv; derived metrics are recomputed from the points
+        def rows():
+            with open(path, newline='', encoding='utf-8') as f:
+                for record in csv.DictReader(f):
+                    points = _cycle(record, float)
+                    yield (record['freq'], record['eev'], record['fan'], points,
+                           record.get('refrigerant') or cycle_model.REFRIGERANT)
+        return self.add_many(rows())
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_store():
+    # Process-wide store on DEFAULT_PATH, shared by every Streamlit session
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SnapshotStore()
+        return _default_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import stored snapshots as CSV")
+    parser.add_argument('command', choices=('export', 'import'))
+    parser.add_argument('path', help="CSV file")
+    parser.add_argument('--db', default=DEFAULT_PATH, help="snapshot database")
+    parser.add_argument('--refrigerant', default=None, help="export only snapshots of this refrigerant")
+    parser.add_argument('--where', nargs=3, action='append', default=[], metavar=('COLUMN', 'MIN', 'MAX'),
+                        help="export range filter, '-' for an open end (repeatable)")
+    args = parser.parse_args()
+    if args.command == 'import' and (args.where or args.refrigerant):
+        parser.error("--where/--refrigerant only apply to export")
+
+    store = SnapshotStore(args.db)
+    try:
+        if args.command == 'export':
+            count = store.export_csv(args.path, parse_filters(args.where, args.refrigerant))
+            print(f"{count} snapshots -> {args.path}", file=sys.stderr)
+        else:
+            count = store.import_csv(args.path)
+            print(f"{count} snapshots imported into {args.db}", file=sys.stderr)
+    except (ValueError, KeyError) as exc:
+        parser.error(f"{type(exc).__name__}: {exc}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import cycle_model
+
+# Fitted surrogate of the cycle model for hardware/controller-in-the-loop
+# runs that need millions of evaluations. The full model is sampled once on
+# a regular (freq, EEV, fan) grid and evaluated with vectorized trilinear
+# interpolation, about a microsecond per point. Only the state quantities
+# are interpolated; cooling effect, compressor work, EER and pressure ratio
+# are derived from them exactly as in the model (interpolating EER itself is
+# two orders of magnitude less accurate).
+#
+#   python surrogate.py build --points 31 31 16
+#   python surrogate.py validate --samples 100000
+
+DEFAULT_POINTS = (31, 31, 16)  # grid points on the freq, EEV and fan axes
+FIT_KEYS = ('P1', 'P2', 'h1', 'h2', 'h3', 'h4', 'discharge_temp')
+OUTPUT_KEYS = ('P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4',
+               'cooling_effect', 'compressor_work', 'eer', 'discharge_temp', 'pressure_ratio')
+RANGES = (cycle_model.FREQ_RANGE, cycle_model.EEV_RANGE, cycle_model.FAN_RANGE)
+
+
+def default_path(refrigerant=cycle_model.REFRIGERANT):
+    return os.path.join(cycle_model.CACHE_DIR, f"surrogate_{refrigerant}.npz")
+
+
+class Surrogate:
+    def __init__(self, axes, values, refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND):
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = np.asarray(values, dtype=float)  # (len(FIT_KEYS), n_freq, n_eev, n_fan)
+        self.refrigerant = refrigerant
+        self.backend = backend
+        # Flattened per output so each cell corner is one gather for all outputs
+        self._flat = self.values.reshape(len(FIT_KEYS), -1)
+        self._strides = np.array([self.values.shape[2] * self.values.shape[3], self.values.shape[3], 1])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(data['keys']) != FIT_KEYS:
+                raise ValueError(f"{path} was fitted for outputs {tuple(data['keys'])}, expected {FIT_KEYS}")
+            return cls([data['freq'], data['eev'], data['fan']], data['values'],
+                       str(data['refrigerant']), str(data['backend']))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Temp file + rename so a reader never loads a partial artifact
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, freq=self.axes[0], eev=self.axes[1], fan=self.axes[2], values=self.values,
+                     keys=np.array(FIT_KEYS), refrigerant=self.refrigerant, backend=self.backend)
+        os.replace(tmp_path, path)
+
+    def evaluate(self, freq, eev, fan):
+        # Same keys and units as cycle_model.solve_batch; inputs are clipped to the fitted ranges
+        inputs = np.broadcast_arrays(np.asarray(freq, dtype=float), np.asarray(eev, dtype=float),
+                                     np.asarray(fan, dtype=float))
+        shape = inputs[0].shape
+        base = 0
+        weights = []
+        for axis, stride, x in zip(self.axes, self._strides, inputs):
+            x = np.clip(x.ravel(), axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+            weights.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+            base = base + i * stride
+
+        fitted = 0
+        for corner in range(8):
+            offset = 0
+            weight = 1
+            for bit, (stride, t) in enumerate(zip(self._strides, weights)):
+                if corner >> bit & 1:
+                    offset += stride
+                    weight = weight * t
+                else:
+                    weight = weight * (1 - t)
+            fitted = fitted + self._flat[:, base + offset] * weight
+        fitted = dict(zip(FIT_KEYS, fitted))
+
+        cooling_effect = fitted['h1'] - fitted['h4']
+        compressor_work = fitted['h2'] - fitted['h1']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eer = np.where(compressor_work != 0, cooling_effect / compressor_work, 0.0)
+        results = dict(fitted, P3=fitted['P2'], P4=fitted['P1'], cooling_effect=cooling_effect,
+                       compressor_work=compressor_work, eer=eer, pressure_ratio=fitted['P2'] / fitted['P1'])
+        return {key: results[key].reshape(shape) for key in OUTPUT_KEYS}
+
+
+def build(points=DEFAULT_POINTS, refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND):
+    axes = [np.linspace(low, high, n) for (low, high), n in zip(RANGES, points)]
+    results = cycle_model.solve_batch(*np.meshgrid(*axes, indexing='ij'), refrigerant=refrigerant, backend=backend)
+    values = np.array([results[key] for key in FIT_KEYS])
+    if not np.all(np.isfinite(values)):
+        raise ValueError(f"The {refrigerant} model fails inside the slider ranges; cannot fit a surrogate")
+    return Surrogate(axes, values, refrigerant, backend)
+
+
+def validate(surrogate, n_samples=20000, seed=0):
+    # Error against the full model at random points across the slider ranges
+    rng = np.random.default_rng(seed)
+    samples = [rng.uniform(low, high, n_samples) for low, high in RANGES]
+
+    start = time.perf_counter()
+    reference = cycle_model.solve_batch(*samples, refrigerant=surrogate.refrigerant, backend=surrogate.backend)
+    model_time = time.perf_counter() - start
+    start = time.perf_counter()
+    estimate = surrogate.evaluate(*samples)
+    surrogate_time = time.perf_counter() - start
+
+    errors = {}
+    for key in OUTPUT_KEYS:
+        error = estimate[key] - reference[key]
+        errors[key] = {
+            'max_abs': float(np.max(np.abs(error))),
+            'rms': float(np.sqrt(np.mean(error ** 2))),
+            'max_rel': float(np.max(np.abs(error / reference[key]))),
+        }
+    return {
+        'refrigerant': surrogate.refrigerant,
+        'backend': surrogate.backend,
+        'grid': [len(axis) for axis in surrogate.axes],
+        'samples': n_samples,
+        'model_us_per_point': model_time / n_samples * 1e6,
+        'surrogate_us_per_point': surrogate_time / n_samples * 1e6,
+        'errors': errors,
+    }
+
+
+def print_report(report):
+    print(f"{report['refrigerant']} surrogate, grid {'x'.join(map(str, report['grid']))}, "
+          f"{report['samples']} random samples")
+    print(f"model {report['model_us_per_point']:.1f} us/point, "
+          f"surrogate {report['surrogate_us_per_point']:.3f} us/point")
+    print(f"{'output':<18}{'max abs':>12}{'rms':>12}{'max rel':>12}")
+    for key, error in report['errors'].items():
+        print(f"{key:<18}{error['max_abs']:>12.4g}{error['rms']:>12.4g}{error['max_rel']:>12.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and validate the cycle surrogate model")
+    parser.add_argument('command', choices=('build', 'validate'))
+    parser.add_argument('--path', default=None, help="artifact location (default: cache directory)")
+    parser.add_argument('--points', nargs=3, type=int, default=list(DEFAULT_POINTS),
+                        metavar=('FREQ', 'EEV', 'FAN'))
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--json', action='store_true', help="print the validation report as JSON")
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+    path = args.path or default_path(args.refrigerant)
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        surrogate = build(args.points, args.refrigerant, args.backend)
+        surrogate.save(path)
+        print(f"fitted {int(np.prod(args.points))} points in {time.perf_counter() - start:.1f} s, "
+              f"{os.path.getsize(path) / 1024:.0f} KiB -> {path}")
+    else:
+        surrogate = Surrogate.load(path)
+
+    report = validate(surrogate, args.samples)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import cycle_model
+
+# Parallel performance-map sweep over (freq, EEV, fan).
+#
+# The grid is never materialized: every worker derives its operating points
+# from the chunk index, solves them with solve_batch() and writes its own
+# chunk_XXXXXX.csv next to a manifest.json. A chunk file only appears once it
+# is complete (temp file + rename), so an interrupted sweep is resumed by
+# skipping the chunk files that already exist.
+#
+#   python sweep.py maps/r32 --freq 30 120 91 --eev 0 100 101 --fan 0 1500 151
+
+AXES = ('freq', 'eev', 'fan')
+COLUMNS = AXES + cycle_model.RESULT_KEYS
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def make_spec(freq, eev, fan, chunk_size=DEFAULT_CHUNK_SIZE,
+              refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND):
+    # Each axis is (start, stop, num) as for np.linspace
+    axes = {name: [float(axis[0]), float(axis[1]), int(axis[2])] for name, axis in zip(AXES, (freq, eev, fan))}
+    return {"axes": axes, "chunk_size": int(chunk_size), "refrigerant": refrigerant, "backend": backend}
+
+
+def grid_shape(spec):
+    return tuple(spec["axes"][name][2] for name in AXES)
+
+
+def n_chunks(spec):
+    total = int(np.prod(grid_shape(spec)))
+    return -(-total // spec["chunk_size"])
+
+
+def chunk_path(out_dir, index):
+    return os.path.join(out_dir, f"chunk_{index:06d}.csv")
+
+
+def chunk_points(spec, index):
+    shape = grid_shape(spec)
+    total = int(np.prod(shape))
+    flat = np.arange(index * spec["chunk_size"], min((index + 1) * spec["chunk_size"], total))
+    coords = np.unravel_index(flat, shape)
+    return tuple(np.linspace(*spec["axes"][name])[coord] for name, coord in zip(AXES, coords))
+
+
+def solve_chunk(spec, index, out_dir):
+    freq, eev, fan = chunk_points(spec, index)
+    results = cycle_model.solve_batch(freq, eev, fan, spec["refrigerant"], spec["backend"])
+    table = np.column_stack([freq, eev, fan] + [results[key] for key in cycle_model.RESULT_KEYS])
+
+    path = chunk_path(out_dir, index)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    np.savetxt(tmp_path, table, delimiter=',', fmt='%.10g', header=','.join(COLUMNS), comments='')
+    os.replace(tmp_path, path)
+    return index, len(freq)
+
+
+def _check_manifest(out_dir, spec):
+    path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            existing = json.load(f)
+        if existing != spec:
+            raise ValueError(f"{out_dir} holds a different sweep; use a new output directory")
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(spec, f, indent=2)
+
+
+def pending_chunks(spec, out_dir):
+    return [i for i in range(n_chunks(spec)) if not os.path.exists(chunk_path(out_dir, i))]
+
+
+def run_sweep(spec, out_dir, workers=None, progress=None):
+    _check_manifest(out_dir, spec)
+    todo = pending_chunks(spec, out_dir)
+    workers = workers or os.cpu_count() or 1
+
+    # Keep only a couple of chunks per worker in flight so memory stays flat
+    # no matter how large the grid is
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        for index in todo:
+            running.add(pool.submit(solve_chunk, spec, index, out_dir))
+            if len(running) >= 2 * workers:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    done += 1
+                    if progress:
+                        progress(done, len(todo))
+        for future in wait(running).done:
+            future.result()
+            done += 1
+            if progress:
+                progress(done, len(todo))
+    return done
+
+
+def iter_chunks(out_dir):
+    # Read a finished sweep back chunk by chunk, in grid order
+    with open(os.path.join(out_dir, "manifest.json"), encoding='utf-8') as f:
+        spec = json.load(f)
+    for index in range(n_chunks(spec)):
+        yield np.loadtxt(chunk_path(out_dir, index), delimiter=',', skiprows=1, ndmin=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel EER/capacity performance-map sweep")
+    parser.add_argument('out_dir')
+    parser.add_argument('--freq', nargs=3, type=float, default=[30, 120, 91], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--eev', nargs=3, type=float, default=[0, 100, 101], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--fan', nargs=3, type=float, default=[0, 1500, 151], metavar=('START', 'STOP', 'NUM'))
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+
+    spec = make_spec(args.freq, args.eev, args.fan, args.chunk_size, args.refrigerant, args.backend)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} chunks ({time.perf_counter() - start:.1f} s)", end='', flush=True)
+
+    total_chunks = n_chunks(spec)
+    remaining = len(pending_chunks(spec, args.out_dir)) if os.path.isdir(args.out_dir) else total_chunks
+    print(f"{int(np.prod(grid_shape(spec)))} points in {total_chunks} chunks, {total_chunks - remaining} already done")
+    run_sweep(spec, args.out_dir, args.workers, progress)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from benchmarks.suite import compare
+
+
+def _regressions(current, baseline):
+    return compare({'metrics': current}, {'metrics': baseline}, 0.2)[1]
+
+
+def test_increase_over_zero_baseline_regresses():
+    assert _regressions({'cold_start_ui_modules': 3}, {'cold_start_ui_modules': 0}) == ['cold_start_ui_modules']
+    assert _regressions({'cold_start_ui_modules': 0}, {'cold_start_ui_modules': 0}) == []
+
+
+def test_relative_threshold():
+    assert _regressions({'batch_10k_s': 1.3, 'batch_points_per_s': 9000},
+                        {'batch_10k_s': 1.0, 'batch_points_per_s': 10000}) == ['batch_10k_s']
+    assert _regressions({'batch_points_per_s': 0}, {'batch_points_per_s': 10}) == ['batch_points_per_s']
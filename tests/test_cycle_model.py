@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import cycle_model
+
+EER_TOLERANCE = 0.02
+H_TOLERANCE = 0.05  # kJ/kg
+
+
+RANGES = (cycle_model.FREQ_RANGE, cycle_model.EEV_RANGE, cycle_model.FAN_RANGE)
+
+
+def _controls(n=6, samples=500):
+    # A grid over the slider ranges plus random points between its nodes
+    axes = [np.linspace(*bounds, n) for bounds in RANGES]
+    rng = np.random.default_rng(0)
+    random = [rng.uniform(*bounds, samples) for bounds in RANGES]
+    return [np.concatenate([grid.ravel(), extra]) for grid, extra in zip(np.meshgrid(*axes, indexing='ij'), random)]
+
+
+@pytest.mark.parametrize('refrigerant, backend', [
+    (refrigerant, backend) for refrigerant in cycle_model.REFRIGERANTS
+    for backend in cycle_model.backends_for(refrigerant) if backend != 'HEOS'])
+def test_validated_tables_match_heos(refrigerant, backend):
+    controls = _controls()
+    exact = cycle_model.solve_batch(*controls, refrigerant)
+    tabular = cycle_model.solve_batch(*controls, refrigerant, backend)
+    assert np.max(np.abs(tabular['eer'] - exact['eer'])) < EER_TOLERANCE
+    for i in range(1, 5):
+        assert np.max(np.abs(tabular[f'h{i}'] - exact[f'h{i}'])) < H_TOLERANCE
+
+
+@pytest.mark.parametrize('refrigerant, backend', [
+    (refrigerant, backend) for refrigerant in cycle_model.REFRIGERANTS
+    for backend in cycle_model.BACKENDS if backend not in cycle_model.backends_for(refrigerant)])
+def test_unvalidated_tables_are_refused(refrigerant, backend):
+    with pytest.raises(ValueError, match='not validated'):
+        cycle_model.solve_point(60, 50, 750, refrigerant, backend)
+    with cycle_model.unvalidated_backends():
+        cycle_model.solve_point(60, 50, 750, refrigerant, backend)
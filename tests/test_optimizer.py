@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+import cycle_model
+import optimizer
+
+CASES = [('eer', {}), ('eer', {'max_discharge_temp': 75}), ('cooling_effect', {'target': 230})]
+
+
+def _grid_best(refrigerant, objective, kwargs):
+    # Coarse exhaustive search on the exact backend
+    axes = [np.linspace(*bounds, n) for bounds, n in zip(optimizer.DEFAULT_BOUNDS, (10, 11, 7))]
+    results = cycle_model.solve_batch(*np.meshgrid(*axes, indexing='ij'), refrigerant)
+    return np.max(optimizer.score(results, objective, **kwargs))
+
+
+@pytest.mark.parametrize('refrigerant', cycle_model.REFRIGERANTS)
+@pytest.mark.parametrize('objective, kwargs', CASES)
+def test_optimum_is_at_least_the_grid_best(refrigerant, objective, kwargs):
+    result = optimizer.optimize(objective, refrigerant=refrigerant, **kwargs)
+    metrics = {key: np.array(value) for key, value in result['metrics'].items()}
+    found = optimizer.score(metrics, objective, **kwargs)
+    assert found >= _grid_best(refrigerant, objective, kwargs) - 1e-9
+    # The reported metrics are an exact solve of the reported settings
+    settings = result['settings']
+    exact = cycle_model.solve_point(settings['freq'], settings['eev'], settings['fan'], refrigerant)
+    assert cycle_model.cycle_performance(exact)[2] == pytest.approx(result['metrics']['eer'], rel=1e-9)
@@ -0,0 +1,80 @@
+import io
+import numpy as np
+import cycle_model
+import replay
+
+KEYS = ('eer', 'P1')
+SOLVER = (cycle_model.REFRIGERANT, cycle_model.DEFAULT_BACKEND, None)
+
+
+def _direct(table, refrigerant=cycle_model.REFRIGERANT):
+    results = cycle_model.solve_batch(table[:, 0], table[:, 1], table[:, 2], refrigerant)
+    return {key: results[key] for key in KEYS}
+
+
+def _table(rows):
+    return np.array(rows, dtype=float)
+
+
+def _solve(table):
+    return replay.solve_chunk(table, KEYS, SOLVER)
+
+
+def test_chunk_larger_than_memo(monkeypatch):
+    monkeypatch.setattr(replay, 'MEMO_SIZE', 10)
+    monkeypatch.setattr(replay, '_memo', {})
+    table = _table([(60 + i / 10, 50, 750) for i in range(25)] * 2)
+    results, solved = _solve(table)
+    assert solved == 25
+    for key, values in _direct(table).items():
+        np.testing.assert_array_equal(results[key], values)
+
+
+def test_reused_row_survives_eviction(monkeypatch):
+    # A row hit in every chunk is refreshed, so it is not the one evicted
+    # when the chunk's new rows overflow the memo
+    monkeypatch.setattr(replay, 'MEMO_SIZE', 100)
+    monkeypatch.setattr(replay, '_memo', {})
+    first = _table([(60.0, 50, 750)] + [(30 + i / 10, 20, 500) for i in range(99)])
+    second = _table([(60.0, 50, 750)] + [(30 + i / 10, 80, 1000) for i in range(60)])
+    third = _table([(60.0, 50, 750)] + [(30 + i / 10, 60, 1200) for i in range(60)])
+    _solve(first)
+    for table in (second, third):
+        results, solved = _solve(table)
+        assert solved == len(table) - 1
+        for key, values in _direct(table).items():
+            np.testing.assert_array_equal(results[key], values)
+    assert len(replay._memo[SOLVER + (KEYS,)]) == 100
+
+
+def _replay(log, refrigerant=cycle_model.REFRIGERANT):
+    out = io.StringIO()
+    stats = replay.replay(str(log), out, KEYS, chunk_size=64, refrigerant=refrigerant)
+    return stats, np.loadtxt(io.StringIO(out.getvalue()), delimiter=',', skiprows=1)
+
+
+def _write_log(path, n=500):
+    rng = np.random.default_rng(0)
+    table = np.column_stack([rng.integers(300, 400, n) / 10, rng.integers(40, 60, n), np.full(n, 750.0)])
+    np.savetxt(path, table, delimiter=',', fmt='%g', header='freq,eev,fan', comments='')
+    return table
+
+
+def test_replay_matches_direct_solve(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, 'MEMO_SIZE', 50)
+    monkeypatch.setattr(replay, '_memo', {})
+    table = _write_log(tmp_path / 'log.csv')
+    stats, written = _replay(tmp_path / 'log.csv')
+    assert stats['rows'] == 500
+    expected = _direct(table)
+    np.testing.assert_allclose(written[:, 3], expected['eer'], rtol=1e-9)
+    np.testing.assert_allclose(written[:, 4], expected['P1'], rtol=1e-9)
+
+
+def test_memo_is_per_refrigerant(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, '_memo', {})
+    table = _write_log(tmp_path / 'log.csv', 100)
+    _replay(tmp_path / 'log.csv', 'R32')
+    stats, written = _replay(tmp_path / 'log.csv', 'R410A')
+    assert stats['solved'] == len(np.unique(table, axis=0))
+    np.testing.assert_allclose(written[:, 3], _direct(table, 'R410A')['eer'], rtol=1e-9)
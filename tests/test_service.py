@@ -0,0 +1,50 @@
+import asyncio
+import json
+from concurrent.futures.process import BrokenProcessPool
+import service
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, *args, **kwargs):
+        pass
+
+
+async def _exchange(requests, break_pool=False):
+    svc = service.CycleService(workers=1)
+    await svc.start()
+    real_pool = svc.pool
+    if break_pool:
+        svc.pool = BrokenPool()
+    server = await asyncio.start_server(svc.handle_client, '127.0.0.1', 0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        responses = []
+        for line in requests:
+            writer.write(line.encode() + b"\n")
+            responses.append(json.loads(await asyncio.wait_for(reader.readline(), 30)))
+        writer.close()
+        return {response["id"]: response for response in responses}
+    finally:
+        server.close()
+        svc.close()
+        real_pool.shutdown()
+
+
+def test_non_finite_input_gets_an_error():
+    responses = asyncio.run(_exchange([
+        '{"id": 1, "freq": Infinity, "eev": 50, "fan": 750}',
+        '{"id": 2, "freq": 60, "eev": NaN, "fan": 750}',
+        '{"id": 3, "freq": 60, "eev": 50, "fan": 750}',
+    ]))
+    assert "error" in responses[1] and "error" in responses[2]
+    assert abs(responses[3]["result"]["eer"] - 6.872) < 1e-3
+
+
+def test_broken_pool_still_answers_and_recovers():
+    responses = asyncio.run(_exchange(['{"id": 1, "freq": 60, "eev": 50, "fan": 750}',
+                                       '{"id": 2, "freq": 60, "eev": 50, "fan": 750}'], break_pool=True))
+    assert responses[1]["error"] == "worker died"
+    assert abs(responses[2]["result"]["eer"] - 6.872) < 1e-3
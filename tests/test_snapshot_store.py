@@ -0,0 +1,71 @@
+import sqlite3
+import sys
+import threading
+import cycle_model
+import snapshot_store
+
+
+def _fill(path, n=20):
+    store = snapshot_store.SnapshotStore(str(path))
+    store.add_many((50 + i, 50, 750, cycle_model.solve_point(50 + i, 50, 750)) for i in range(n))
+    return store
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['snapshot_store.py', *argv])
+    snapshot_store.main()
+
+
+def test_cli_round_trip(tmp_path, monkeypatch):
+    _fill(tmp_path / 'a.db').close()
+    csv_path = str(tmp_path / 'out.csv')
+    _run(monkeypatch, 'export', csv_path, '--db', str(tmp_path / 'a.db'), '--where', 'freq', '55', '-')
+    _run(monkeypatch, 'import', csv_path, '--db', str(tmp_path / 'b.db'))
+    store = snapshot_store.SnapshotStore(str(tmp_path / 'b.db'))
+    assert [snapshot["settings"]["freq"] for snapshot in store.query()] == [float(f) for f in range(55, 70)]
+    store.close()
+
+
+def test_export_does_not_hold_the_store_lock(tmp_path):
+    store = _fill(tmp_path / 'a.db')
+    result = []
+    with store._lock:
+        # Another thread is mid-write on the shared connection; the export still finishes
+        worker = threading.Thread(target=lambda: result.append(store.export_csv(str(tmp_path / 'out.csv'))))
+        worker.start()
+        worker.join(10)
+    assert result == [20]
+    store.close()
+
+
+def test_snapshot_keeps_discharge_temp_and_quality(tmp_path, monkeypatch):
+    points = cycle_model.solve_point(60, 50, 750)
+    store = snapshot_store.SnapshotStore(str(tmp_path / 'a.db'))
+    summary = cycle_model.cycle_summary(store.get(store.add(60, 50, 750, points))["cycle"])
+    assert summary['discharge_temp'] == points[2]['T']
+    assert summary['quality_4'] == points[4]['Q']
+    store.close()
+
+    csv_path = str(tmp_path / 'out.csv')
+    _run(monkeypatch, 'export', csv_path, '--db', str(tmp_path / 'a.db'))
+    _run(monkeypatch, 'import', csv_path, '--db', str(tmp_path / 'b.db'))
+    store = snapshot_store.SnapshotStore(str(tmp_path / 'b.db'))
+    cycle = store.query()[0]["cycle"]
+    assert (cycle[2]['T'], cycle[4]['Q']) == (points[2]['T'], points[4]['Q'])
+    store.close()
+
+
+def test_old_database_gains_state_columns(tmp_path):
+    # A database from before T2/Q4 were stored: its rows load with P and h only
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(snapshot_store.SCHEMA.replace(
+        f"{', '.join(f'{column} REAL' for column in snapshot_store.STATE_COLUMNS)},", ""))
+    conn.close()
+    store = snapshot_store.SnapshotStore(path)
+    store.add(60, 50, 750, {i: {"P": p["P"], "h": p["h"]} for i, p in cycle_model.solve_point(60, 50, 750).items()})
+    snapshot = store.query()[0]
+    assert cycle_model.cycle_summary(snapshot["cycle"])['discharge_temp'] is None
+    store.add(61, 50, 750, cycle_model.solve_point(61, 50, 750))
+    assert store.query({"T2": (0, None)})[0]["settings"]["freq"] == 61
+    store.close()
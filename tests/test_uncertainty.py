@@ -0,0 +1,47 @@
+import multiprocessing
+import threading
+import numpy as np
+import uncertainty
+
+
+def test_streaming_stats_match_numpy():
+    rng = np.random.default_rng(3)
+    x = np.column_stack([rng.normal(5, 2, 100000), rng.exponential(1, 100000)])
+    x[::97, 0] = np.nan
+    stats = uncertainty.StreamingStats(('a', 'b'), [-1, 0], [11, 6])
+    for chunk in np.array_split(x, 7):
+        stats.add(chunk)
+    a = x[np.isfinite(x[:, 0]), 0]
+    np.testing.assert_allclose(stats.mean, [a.mean(), x[:, 1].mean()])
+    np.testing.assert_allclose(stats.std(), [a.std(ddof=1), x[:, 1].std(ddof=1)])
+    np.testing.assert_allclose(stats.quantile(0.5), [np.median(a), np.median(x[:, 1])], atol=0.02)
+    assert stats.invalid.tolist() == [len(x) - len(a), 0]
+
+
+def test_concurrent_runs_keep_their_refrigerant():
+    # Streamlit sessions call propagate() from separate threads
+    alone = {ref: uncertainty.propagate(60, 50, 750, samples=2000, refrigerant=ref)['stats']['eer']['mean']
+             for ref in ('R32', 'R1234yf')}
+    assert alone['R32'] != alone['R1234yf']
+    concurrent = {}
+
+    def run(ref):
+        for _ in range(3):
+            concurrent.setdefault(ref, []).append(
+                uncertainty.propagate(60, 50, 750, samples=2000, refrigerant=ref)['stats']['eer']['mean'])
+
+    threads = [threading.Thread(target=run, args=(ref,)) for ref in alone]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for ref, means in concurrent.items():
+        assert means == [alone[ref]] * 3
+
+
+def test_spawned_workers_match_a_serial_run():
+    # What the UIs run: several chunks on spawned processes give the serial result
+    kwargs = dict(samples=6000, chunk_size=2000, outputs=('eer', 'discharge_temp'))
+    serial = uncertainty.propagate(60, 50, 750, **kwargs)
+    pooled = uncertainty.propagate(60, 50, 750, workers=2, mp_context=multiprocessing.get_context('spawn'), **kwargs)
+    assert pooled['stats'] == serial['stats']
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cycle_model
+import evaluate
+
+# Monte Carlo propagation of sensor tolerances: the controls are read with
+# some error, so instead of one cycle there is a spread of cycles around the
+# reading. propagate() samples the controls around a nominal point, solves
+# them in vectorized chunks (on a process pool for large runs) and folds
+# every chunk into StreamingStats, which keeps count/mean/variance (Welford,
+# merged pairwise across chunks) and a fixed-bin histogram per output for
+# the quantiles. Memory does not grow with the number of samples.
+#
+#   python uncertainty.py 60 50 750
+#   python uncertainty.py 60 50 750 --tolerance 1 2 20 --dist uniform
+#   python uncertainty.py 60 50 750 --samples 5000000 --surrogate --workers 4
+
+CONTROLS = ('freq', 'eev', 'fan')
+RANGES = (cycle_model.FREQ_RANGE, cycle_model.EEV_RANGE, cycle_model.FAN_RANGE)
+OUTPUTS = ('eer', 'cooling_effect', 'compressor_work', 'discharge_temp',
+           'P1', 'h1', 'P2', 'h2', 'P3', 'h3', 'P4', 'h4')
+METRICS = ('eer', 'cooling_effect', 'compressor_work', 'discharge_temp', 'P1', 'P2')  # UI tables
+DISTRIBUTIONS = ('normal', 'uniform')
+DEFAULT_TOLERANCE = (0.5, 1.0, 10.0)  # Hz, %, RPM: one sigma (normal) or half width (uniform)
+DEFAULT_SAMPLES = 100000
+CONFIDENCE = 0.95
+
+CHUNK_SIZE = 5000  # samples drawn and solved at a time
+PILOT_SIZE = 2000  # samples used to place the histogram bins
+HIST_BINS = 1024
+
+
+class StreamingStats:
+    # Per-output running statistics over samples given as (n, len(outputs))
+    # arrays. NaN results (no valid cycle) are counted separately. The
+    # histogram spans fixed edges, with one extra bin on either side for
+    # samples outside them, so stats from different chunks/processes built
+    # on the same edges can be merged.
+    def __init__(self, outputs, low, high, bins=HIST_BINS):
+        n = len(outputs)
+        self.outputs = tuple(outputs)
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.bins = bins
+        self.count = np.zeros(n, dtype=np.int64)
+        self.invalid = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.hist = np.zeros((n, bins + 2), dtype=np.int64)
+
+    def _empty(self):
+        return StreamingStats(self.outputs, self.low, self.high, self.bins)
+
+    def add(self, values):
+        valid = np.isfinite(values)
+        chunk = self._empty()
+        chunk.count = valid.sum(axis=0)
+        chunk.invalid = len(values) - chunk.count
+        if chunk.invalid.any():
+            with np.errstate(invalid='ignore', divide='ignore'):
+                chunk.mean = np.nan_to_num(np.where(valid, values, 0).sum(axis=0) / chunk.count)
+            chunk.m2 = (np.where(valid, values - chunk.mean, 0) ** 2).sum(axis=0)
+            chunk.min = np.where(valid, values, np.inf).min(axis=0)
+            chunk.max = np.where(valid, values, -np.inf).max(axis=0)
+        else:
+            # Usual case, every sample gave a cycle: no masking
+            chunk.mean = values.mean(axis=0)
+            chunk.m2 = ((values - chunk.mean) ** 2).sum(axis=0)
+            chunk.min = values.min(axis=0)
+            chunk.max = values.max(axis=0)
+
+        # Bin 0 / bins + 1 take the samples below / above the edges; invalid
+        # samples go to one more bin that is dropped
+        scaled = (values - self.low) * (self.bins / (self.high - self.low))
+        np.clip(scaled, -1, self.bins, out=scaled)
+        np.floor(scaled, out=scaled)
+        index = np.where(valid, scaled, self.bins + 1).astype(np.int64) + 1
+        index += np.arange(len(self.outputs)) * (self.bins + 3)
+        hist = np.bincount(index.ravel(), minlength=len(self.outputs) * (self.bins + 3))
+        chunk.hist = hist.reshape(len(self.outputs), self.bins + 3)[:, :-1]
+        self.merge(chunk)
+
+    def merge(self, other):
+        # Pairwise combination of the two means and sums of squares (Chan et al.)
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            self.mean = np.where(count > 0, self.mean + delta * other.count / count, 0.0)
+            self.m2 = np.where(count > 0, self.m2 + other.m2 + delta ** 2 * self.count * other.count / count, 0.0)
+        self.count = count
+        self.invalid = self.invalid + other.invalid
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.hist = self.hist + other.hist
+        return self
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.m2 / (self.count - 1))
+
+    def quantile(self, q):
+        # Linear interpolation inside the histogram bin holding the q-th sample
+        result = np.full(len(self.outputs), np.nan)
+        for j in range(len(self.outputs)):
+            if self.count[j] == 0:
+                continue
+            edges = np.concatenate([[min(self.min[j], self.low[j])],
+                                    np.linspace(self.low[j], self.high[j], self.bins + 1),
+                                    [max(self.max[j], self.high[j])]])
+            cumulative = np.concatenate([[0], np.cumsum(self.hist[j])])
+            target = q * self.count[j]
+            k = min(np.searchsorted(cumulative, target, side='left'), len(cumulative) - 1)
+            k = max(k, 1)
+            inside = self.hist[j][k - 1]
+            fraction = (target - cumulative[k - 1]) / inside if inside else 0.0
+            result[j] = np.clip(edges[k - 1] + fraction * (edges[k] - edges[k - 1]), self.min[j], self.max[j])
+        return result
+
+    def summary(self, confidence=CONFIDENCE):
+        low, median, high = (self.quantile(q) for q in ((1 - confidence) / 2, 0.5, (1 + confidence) / 2))
+        std = self.std()
+        return {key: {'mean': float(self.mean[j]), 'std': float(std[j]), 'min': float(self.min[j]),
+                      'max': float(self.max[j]), 'low': float(low[j]), 'median': float(median[j]),
+                      'high': float(high[j]), 'count': int(self.count[j]), 'invalid': int(self.invalid[j])}
+                for j, key in enumerate(self.outputs)}
+
+
+def sample_controls(rng, n, nominal, tolerance, distribution):
+    # (n, 3) control readings around the nominal point, clipped to the slider ranges
+    if distribution == 'normal':
+        noise = rng.standard_normal((n, len(CONTROLS)))
+    else:
+        noise = rng.uniform(-1.0, 1.0, (n, len(CONTROLS)))
+    x = np.asarray(nominal, dtype=float) + noise * np.asarray(tolerance, dtype=float)
+    return np.clip(x, [low for low, _ in RANGES], [high for _, high in RANGES])
+
+
+def _solve_samples(x, outputs, solver_args):
+    # The solver configuration is passed along rather than kept in a module
+    # global: the Streamlit sessions run propagate() concurrently in threads
+    _, solve = evaluate.get_solver(*solver_args)
+    results = solve(x[:, 0], x[:, 1], x[:, 2])
+    return np.column_stack([np.asarray(results[key], dtype=float) for key in outputs])
+
+
+def run_chunk(seed, n, nominal, tolerance, distribution, outputs, low, high, solver_args):
+    stats = StreamingStats(outputs, low, high)
+    stats.add(_solve_samples(sample_controls(np.random.default_rng(seed), n, nominal, tolerance, distribution),
+                             outputs, solver_args))
+    return stats
+
+
+def propagate(freq, eev, fan, tolerance=DEFAULT_TOLERANCE, distribution='normal', samples=DEFAULT_SAMPLES,
+              refrigerant=cycle_model.REFRIGERANT, backend=cycle_model.DEFAULT_BACKEND, surrogate_path=None,
+              workers=1, seed=0, confidence=CONFIDENCE, outputs=OUTPUTS, chunk_size=CHUNK_SIZE, mp_context=None):
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    if len(tolerance) != len(CONTROLS) or min(tolerance) < 0:
+        raise ValueError("tolerance needs three non-negative values (freq, eev, fan)")
+    started = time.perf_counter()
+    nominal = (float(freq), float(eev), float(fan))
+    tolerance = tuple(float(t) for t in tolerance)
+    solver_args = (refrigerant, backend, surrogate_path)
+
+    # One seed per chunk, so the samples do not depend on the number of workers
+    pilot_seed, *seeds = np.random.SeedSequence(seed).spawn(1 + -(-samples // chunk_size))
+    sizes = [min(chunk_size, samples - i * chunk_size) for i in range(len(seeds))]
+
+    # Histogram edges from a small pilot run, widened so nearly every sample lands inside
+    pilot = _solve_samples(sample_controls(np.random.default_rng(pilot_seed), PILOT_SIZE, nominal, tolerance,
+                                           distribution), outputs, solver_args)
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanmin(pilot, axis=0), np.nanmax(pilot, axis=0)
+    low, high = np.nan_to_num(low), np.nan_to_num(high)
+    pad = np.maximum(high - low, np.maximum(np.abs(high), 1.0) * 1e-9)
+    low, high = low - pad, high + pad
+
+    stats = StreamingStats(outputs, low, high)
+    args = [(s, n, nominal, tolerance, distribution, outputs, low, high, solver_args) for s, n in zip(seeds, sizes)]
+    workers = min(workers, len(args))  # no more processes than chunks
+    if workers <= 1:
+        for chunk_args in args:
+            stats.merge(run_chunk(*chunk_args))
+    else:
+        # The initializer builds every worker's solver before its first chunk
+        with ProcessPoolExecutor(workers, mp_context, initializer=evaluate.get_solver, initargs=solver_args) as pool:
+            for chunk in pool.map(run_chunk, *zip(*args)):
+                stats.merge(chunk)
+
+    nominal_values = _solve_samples(np.array([nominal]), outputs, solver_args)[0]
+    return {
+        'nominal': dict(zip(CONTROLS, nominal)),
+        'tolerance': dict(zip(CONTROLS, tolerance)),
+        'distribution': distribution,
+        'samples': samples,
+        'confidence': confidence,
+        'values': {key: float(value) for key, value in zip(outputs, nominal_values)},
+        'stats': stats.summary(confidence),
+        'elapsed_s': time.perf_counter() - started,
+    }
+
+
+def print_table(result):
+    level = f"{result['confidence']:.0%}"
+    print(f"{'output':<18}{'nominal':>12}{'mean':>12}{'std':>12}{level + ' low':>12}{level + ' high':>12}")
+    for key, row in result['stats'].items():
+        print(f"{key:<18}{result['values'][key]:>12.5g}{row['mean']:>12.5g}{row['std']:>12.4g}"
+              f"{row['low']:>12.5g}{row['high']:>12.5g}")
+    invalid = max(row['invalid'] for row in result['stats'].values())
+    print(f"{result['samples']} samples ({result['distribution']}, tolerance "
+          + ", ".join(f"{name} {value:g}" for name, value in result['tolerance'].items())
+          + f"), {invalid} without a valid cycle, {result['elapsed_s']:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo spread of the cycle outputs from sensor tolerances")
+    parser.add_argument('point', nargs=3, type=float, metavar='FREQ EEV FAN')
+    parser.add_argument('--tolerance', nargs=3, type=float, default=list(DEFAULT_TOLERANCE),
+                        metavar=('FREQ', 'EEV', 'FAN'), help="one sigma (normal) or half width (uniform)")
+    parser.add_argument('--dist', default='normal', choices=DISTRIBUTIONS)
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument('--confidence', type=float, default=CONFIDENCE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="0 uses every core")
+    parser.add_argument('--refrigerant', default=cycle_model.REFRIGERANT)
+    parser.add_argument('--backend', default=cycle_model.DEFAULT_BACKEND, choices=cycle_model.BACKENDS)
+    parser.add_argument('--surrogate', nargs='?', const='', default=None, metavar='NPZ',
+                        help="use a fitted surrogate (default artifact if no path is given)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    if args.backend not in cycle_model.backends_for(args.refrigerant):
+        parser.error(f"--backend {args.backend} is not validated for {args.refrigerant}")
+    if args.samples < 1 or not 0 < args.confidence < 1:
+        parser.error("--samples must be positive and --confidence between 0 and 1")
+
+    try:
+        result = propagate(*args.point, args.tolerance, args.dist, args.samples, args.refrigerant, args.backend,
+                           args.surrogate, args.workers or os.cpu_count() or 1, args.seed, args.confidence)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_table(result)
+
+
+if __name__ == "__main__":
+    main()